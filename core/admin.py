@@ -5,6 +5,8 @@ from .models import (
     ServiceCardIndividual,
     ServiceCardGroup,
     Account,
+    Payment,
+    OutboxEvent,
 )
 
 
@@ -116,3 +118,25 @@ class ServiceCardGroup(admin.ModelAdmin):
     list_display = ("name", "image", "date", "specialist", "price", "completed", "completed_by")
     list_display_links = ("name", "date", "specialist", "price", "completed")
     list_filter = ("id", "name", "date", "price", "completed")
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "amount", "currency", "status", "created")
+    list_filter = ("status", "currency")
+    search_fields = ("intent_id", "description")
+    readonly_fields = ("intent_id", "error", "created", "updated")
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "task",
+        "attempts",
+        "created",
+        "dispatched_at",
+        "failed_at",
+    )
+    list_filter = ("task",)
+    readonly_fields = ("created", "dispatched_at", "failed_at")
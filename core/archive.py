@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import (
+    ArchivedReview,
+    ArchivedServiceCard,
+    Enrollment,
+    ReviewGroup,
+    ReviewIndividual,
+    ServiceCardGroup,
+    ServiceCardIndividual,
+)
+
+
+def _snapshot(kind, card, participants=()):
+    return ArchivedServiceCard(
+        kind=kind,
+        original_id=card.pk,
+        name=card.name,
+        image=card.image.name,
+        description=card.description,
+        date=getattr(card, "date", None),
+        specialist_id=card.specialist_id,
+        price=card.price,
+        completed_at=card.completed_at,
+        participants=list(participants),
+    )
+
+
+def archive_individual_batch(cutoff, batch_size):
+    with transaction.atomic():
+        cards = list(
+            ServiceCardIndividual.objects.select_for_update(skip_locked=True)
+            .filter(completed=True, completed_at__lt=cutoff)
+            .order_by("pk")[:batch_size]
+        )
+        if not cards:
+            return 0
+        archived = ArchivedServiceCard.objects.bulk_create(
+            [_snapshot(ArchivedServiceCard.INDIVIDUAL, card) for card in cards]
+        )
+        by_original = {card.original_id: card for card in archived}
+        reviews = ReviewIndividual.objects.filter(service_card__in=cards)
+        ArchivedReview.objects.bulk_create(
+            [
+                ArchivedReview(
+                    card=by_original[review.service_card_id],
+                    original_id=review.pk,
+                    rating=review.rating,
+                    completed_by_id=review.completed_by_id,
+                    created=review.created,
+                )
+                for review in reviews
+            ]
+        )
+        ServiceCardIndividual.objects.filter(
+            pk__in=[card.pk for card in cards]
+        ).delete()
+    return len(cards)
+
+
+def archive_group_batch(cutoff, batch_size):
+    with transaction.atomic():
+        cards = list(
+            ServiceCardGroup.objects.select_for_update(skip_locked=True)
+            .filter(completed=True, completed_at__lt=cutoff)
+            .order_by("pk")[:batch_size]
+        )
+        if not cards:
+            return 0
+        participants = defaultdict(list)
+        for card_id, student_id in Enrollment.objects.filter(
+            service_card_group__in=cards, status=Enrollment.ENROLLED
+        ).values_list("service_card_group_id", "student_id"):
+            participants[card_id].append(student_id)
+
+        archived = ArchivedServiceCard.objects.bulk_create(
+            [
+                _snapshot(
+                    ArchivedServiceCard.GROUP, card, participants[card.pk]
+                )
+                for card in cards
+            ]
+        )
+        by_original = {card.original_id: card for card in archived}
+        reviews = ReviewGroup.objects.filter(service_card_group__in=cards)
+        ArchivedReview.objects.bulk_create(
+            [
+                ArchivedReview(
+                    card=by_original[review.service_card_group_id],
+                    original_id=review.pk,
+                    rating=review.rating,
+                    completed_by_id=review.completed_by_id,
+                    created=review.created,
+                )
+                for review in reviews
+            ]
+        )
+        ServiceCardGroup.objects.filter(
+            pk__in=[card.pk for card in cards]
+        ).delete()
+    return len(cards)
+
+
+def archive_completed_cards(cutoff, batch_size=500):
+    """
+    Переносит завершенные до cutoff карточки с отзывами в архив пачками.
+    Каждая пачка — отдельная короткая транзакция.
+    """
+    archived = 0
+    for archive_batch in (archive_individual_batch, archive_group_batch):
+        while True:
+            moved = archive_batch(cutoff, batch_size)
+            archived += moved
+            if moved < batch_size:
+                break
+    return archived
@@ -0,0 +1,134 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+# Поля аккаунта, которые кладутся в токен при выдаче
+TOKEN_USER_CLAIMS = ("user_type", "is_active", "is_staff", "is_superuser")
+# Аккаунт удален, но его токен еще не истек
+DELETED = object()
+
+
+class UserCache:
+    """
+    LRU-кэш аккаунтов процесса с ограниченным сроком жизни записей.
+    Другие процессы не сбрасывают его записи, изменения аккаунта оттуда
+    видны через ttl, см. AUTH_USER_CACHE_TTL.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, pk):
+        with self._lock:
+            item = self._items.get(pk)
+            if item is None:
+                return None
+            user, expires = item
+            if expires < time.monotonic():
+                del self._items[pk]
+                return None
+            self._items.move_to_end(pk)
+            return user
+
+    def set(self, pk, user):
+        with self._lock:
+            self._items[pk] = (user, time.monotonic() + self.ttl)
+            self._items.move_to_end(pk)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, pk):
+        with self._lock:
+            self._items.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def remember_user(user):
+    """
+    Кладет сохраненный аккаунт в кэш вместо устаревшей записи.
+    Снимок берется сразу, а в кэш попадает после коммита: откат не должен
+    оставить в кэше несохраненные поля.
+    """
+    snapshot = copy.copy(user)
+    transaction.on_commit(lambda: user_cache.set(snapshot.pk, snapshot))
+
+
+def forget_user(pk):
+    """Помечает аккаунт удаленным до истечения его токенов, после коммита"""
+    transaction.on_commit(lambda: user_cache.set(pk, DELETED))
+
+
+user_cache = UserCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT без запроса к базе: аккаунт берется из кэша процесса или
+    собирается из подписанных полей токена. Остальные поля аккаунта
+    отложены и загрузятся только при обращении к ним.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = self.user_from_claims(validated_token)
+            if user is None:
+                # Токен выдан до появления полей: один раз читаем базу
+                user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        if user is DELETED:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        # Копия, чтобы запросы не меняли общий экземпляр
+        return copy.copy(user)
+
+    def user_from_claims(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_USER_CLAIMS):
+            return None
+        claims = {
+            self.user_model._meta.pk.attname: validated_token[
+                api_settings.USER_ID_CLAIM
+            ],
+            **{claim: validated_token[claim] for claim in TOKEN_USER_CLAIMS},
+        }
+        # from_db ждет значения в порядке полей модели
+        field_names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in claims
+        ]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS,
+            field_names,
+            [claims[name] for name in field_names],
+        )
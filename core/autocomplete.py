@@ -0,0 +1,261 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+SPECIALIST = "specialist"
+SERVICE_CARD = "service_card"
+SERVICE_CARD_GROUP = "service_card_group"
+# Префиксы не длиннее этого совпадают с большой частью индекса: лучшие
+# ключи для них поддерживаются при каждом изменении
+SHORT_PREFIX_LENGTH = 2
+# Сколько лучших ключей хранится на префикс, не меньше limit в API
+TOP_PER_PREFIX = 50
+
+
+def _terms(label):
+    """Ключи поиска: вся подпись и каждое слово в нижнем регистре"""
+    normalized = " ".join(label.lower().split())
+    terms = set(normalized.split())
+    terms.add(normalized)
+    return terms
+
+
+def _prefixes(terms, shortest, longest=None):
+    return {
+        term[:length]
+        for term in terms
+        for length in range(shortest, (longest or len(term)) + 1)
+        if len(term) >= length
+    }
+
+
+class PrefixIndex:
+    """
+    Отсортированный список ключей (терм, тип, id) в памяти процесса.
+    Лучшие по весу ключи хранятся на каждый префикс: для коротких они
+    строятся заранее, для длинных — двумя bisect при первом запросе.
+    Изменение записи правит только списки ее префиксов.
+    """
+
+    def __init__(self, memo_size=1024):
+        self._keys = []
+        # (тип, id) -> (подпись, вес, термы)
+        self._entries = {}
+        # id репетитора -> ключи его карточек, вес которых равен его рейтингу
+        self._cards = {}
+        # короткий префикс -> лучшие ключи по убыванию веса
+        self._top = {}
+        # длинный префикс -> лучшие ключи, до memo_size префиксов
+        self._memo = {}
+        self._memo_size = memo_size
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def _weight(self, key):
+        return self._entries[key][1]
+
+    def _ranked_lists(self, terms, create):
+        """Списки лучших ключей для префиксов термов записи"""
+        for prefix in _prefixes(terms, 1, SHORT_PREFIX_LENGTH):
+            if create:
+                yield self._top.setdefault(prefix, [])
+            elif prefix in self._top:
+                yield self._top[prefix]
+        for prefix in _prefixes(terms, SHORT_PREFIX_LENGTH + 1):
+            if prefix in self._memo:
+                yield self._memo[prefix]
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for term in entry[2]:
+            i = bisect_left(self._keys, (term, *key))
+            if i < len(self._keys) and self._keys[i] == (term, *key):
+                del self._keys[i]
+        # Освободившееся место займет ключ при следующей перестройке
+        for top in self._ranked_lists(entry[2], create=False):
+            if key in top:
+                top.remove(key)
+
+    def _rank(self, key, terms):
+        for top in self._ranked_lists(terms, create=True):
+            if key not in top:
+                top.append(key)
+            top.sort(key=self._weight, reverse=True)
+            del top[TOP_PER_PREFIX:]
+
+    def _best(self, prefix):
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + "\uffff",))
+        matches = {self._keys[i][1:] for i in range(lo, hi)}
+        return heapq.nlargest(TOP_PER_PREFIX, matches, key=self._weight)
+
+    def add(self, kind, pk, label, weight, specialist_id=None):
+        key = (kind, pk)
+        terms = _terms(label)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (label, weight, terms)
+            for term in terms:
+                insort(self._keys, (term, kind, pk))
+            self._rank(key, terms)
+            if specialist_id is not None:
+                self._cards.setdefault(specialist_id, set()).add(key)
+
+    def remove(self, kind, pk):
+        with self._lock:
+            self._discard((kind, pk))
+
+    def reweight_cards(self, specialist_id, weight):
+        with self._lock:
+            for key in self._cards.get(specialist_id, ()):
+                if key in self._entries:
+                    label, _, terms = self._entries[key]
+                    self._entries[key] = (label, weight, terms)
+                    self._rank(key, terms)
+
+    def load(self, entries):
+        """
+        Полная перестройка: entries — (тип, id, подпись, вес, id репетитора)
+        """
+        keys, index, cards, matches = [], {}, {}, {}
+        for kind, pk, label, weight, specialist_id in entries:
+            terms = _terms(label)
+            index[(kind, pk)] = (label, weight, terms)
+            keys.extend((term, kind, pk) for term in terms)
+            for prefix in _prefixes(terms, 1, SHORT_PREFIX_LENGTH):
+                matches.setdefault(prefix, []).append((kind, pk))
+            if specialist_id is not None:
+                cards.setdefault(specialist_id, set()).add((kind, pk))
+        keys.sort()
+        top = {
+            prefix: heapq.nlargest(
+                TOP_PER_PREFIX, found, key=lambda key: index[key][1]
+            )
+            for prefix, found in matches.items()
+        }
+        with self._lock:
+            self._keys, self._entries, self._cards = keys, index, cards
+            self._top = top
+            self._memo.clear()
+            self.built_at = time.monotonic()
+
+    def search(self, prefix, limit=10):
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH:
+                best = self._top.get(prefix, ())
+            else:
+                best = self._memo.get(prefix)
+                if best is None:
+                    best = self._best(prefix)
+                    if len(self._memo) >= self._memo_size:
+                        self._memo.clear()
+                    self._memo[prefix] = best
+            return [
+                {"type": kind, "id": pk, "label": self._entries[(kind, pk)][0]}
+                for kind, pk in best[:limit]
+            ]
+
+
+index = PrefixIndex()
+
+
+def load_entries():
+    from .models import ServiceCardGroup, ServiceCardIndividual, Specialist
+
+    for pk, first_name, last_name, rating in Specialist.objects.values_list(
+        "pk", "first_name", "last_name", "rating"
+    ):
+        yield SPECIALIST, pk, f"{first_name} {last_name}", rating, None
+    for kind, model in (
+        (SERVICE_CARD, ServiceCardIndividual),
+        (SERVICE_CARD_GROUP, ServiceCardGroup),
+    ):
+        cards = model.objects.filter(completed=False).values_list(
+            "pk", "name", "specialist__rating", "specialist_id"
+        )
+        for pk, name, rating, specialist_id in cards:
+            yield kind, pk, name, rating, specialist_id
+
+
+# Одна перестройка на процесс, остальные запросы ее не ждут
+_rebuild_lock = threading.Lock()
+
+
+def _rebuild_in_background():
+    try:
+        index.load(load_entries())
+    except Exception:
+        logger.exception("Autocomplete index rebuild failed")
+    finally:
+        connections.close_all()
+        _rebuild_lock.release()
+
+
+def get_index():
+    """
+    Индекс строится при первом запросе и периодически перестраивается:
+    сигналы обновляют только индекс своего процесса. Устаревший индекс
+    продолжает отвечать, пока новый строится в фоновом потоке.
+    """
+    if index.built_at is None:
+        # Первые запросы процесса ждут одну общую сборку
+        with _rebuild_lock:
+            if index.built_at is None:
+                index.load(load_entries())
+    elif (
+        time.monotonic() - index.built_at
+        > settings.AUTOCOMPLETE_REBUILD_INTERVAL
+        and _rebuild_lock.acquire(blocking=False)
+    ):
+        threading.Thread(
+            target=_rebuild_in_background,
+            name="autocomplete-rebuild",
+            daemon=True,
+        ).start()
+    return index
+
+
+def update_specialist(specialist):
+    if index.built_at is None:
+        return
+    index.add(
+        SPECIALIST,
+        specialist.pk,
+        f"{specialist.first_name} {specialist.last_name}",
+        specialist.rating,
+    )
+    index.reweight_cards(specialist.pk, specialist.rating)
+
+
+def update_card(kind, card):
+    if index.built_at is None:
+        return
+    if card.completed:
+        index.remove(kind, card.pk)
+    else:
+        index.add(
+            kind,
+            card.pk,
+            card.name,
+            card.specialist.rating,
+            specialist_id=card.specialist_id,
+        )
+
+
+def remove(kind, pk):
+    if index.built_at is not None:
+        index.remove(kind, pk)
@@ -0,0 +1,52 @@
+import logging
+
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = "catalog:version"
+# Недоступный кэш не должен ломать запись и чтение каталога
+CACHE_ERRORS = (RedisError, OSError)
+
+
+def catalog_version():
+    """
+    Версия каталога: входит в ключи кэша, растет при любом изменении.
+    None, если кэш недоступен.
+    """
+    try:
+        return cache.get_or_set(CATALOG_VERSION_KEY, 1, timeout=None)
+    except CACHE_ERRORS as e:
+        logger.warning("Catalog version is unavailable: %s", e)
+        return None
+
+
+def bump_catalog_version():
+    """
+    Вызывается после коммита. Если кэш недоступен, старые записи
+    доживут до своего таймаута.
+    """
+    try:
+        try:
+            cache.incr(CATALOG_VERSION_KEY)
+        except ValueError:
+            cache.set(CATALOG_VERSION_KEY, 1, timeout=None)
+    except CACHE_ERRORS as e:
+        logger.warning("Catalog version was not bumped: %s", e)
+
+
+def profile_key(user_id):
+    return f"me:{user_id}"
+
+
+def invalidate_profiles(*user_ids):
+    """
+    Сбрасывает кэш /me/ для перечисленных аккаунтов. Вызывается после
+    коммита: до него параллельный запрос закэширует старые данные.
+    """
+    try:
+        cache.delete_many([profile_key(pk) for pk in user_ids if pk])
+    except CACHE_ERRORS as e:
+        logger.warning("Profiles were not invalidated: %s", e)
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Subquery
+
+
+def _kind(card):
+    from .models import CatalogEntry, ServiceCardGroup
+
+    if isinstance(card, ServiceCardGroup):
+        return CatalogEntry.GROUP
+    return CatalogEntry.INDIVIDUAL
+
+
+def _entry_fields(card, specialist_name, rating):
+    return {
+        "name": card.name,
+        "image": card.image.name,
+        "price": card.price,
+        "date": getattr(card, "date", None),
+        "completed": card.completed,
+        "specialist_id": card.specialist_id,
+        "specialist_name": specialist_name,
+        "rating": rating,
+    }
+
+
+def sync_card(card):
+    from .models import CatalogEntry, Specialist
+
+    specialist_name, rating = Specialist.objects.values_list(
+        "user__last_name", "rating"
+    ).get(pk=card.specialist_id)
+    CatalogEntry.objects.update_or_create(
+        kind=_kind(card),
+        card_id=card.pk,
+        defaults=_entry_fields(card, specialist_name, rating),
+    )
+
+
+def remove_card(card):
+    from .models import CatalogEntry
+
+    CatalogEntry.objects.filter(kind=_kind(card), card_id=card.pk).delete()
+
+
+def complete_cards(cards):
+    """Отметка о завершении для набора карточек одного типа одним UPDATE"""
+    from .models import CatalogEntry
+
+    CatalogEntry.objects.filter(
+        kind=_kind(cards[0]), card_id__in=[card.pk for card in cards]
+    ).update(completed=True)
+
+
+def sync_specialist(specialist):
+    from .models import Account, CatalogEntry
+
+    # Имя берется подзапросом, чтобы обойтись одним UPDATE
+    CatalogEntry.objects.filter(specialist_id=specialist.pk).update(
+        rating=specialist.rating,
+        specialist_name=Subquery(
+            Account.objects.filter(pk=specialist.user_id).values("last_name")
+        ),
+    )
+
+
+def sync_account(account):
+    from .models import CatalogEntry
+
+    CatalogEntry.objects.filter(specialist__user_id=account.pk).update(
+        specialist_name=account.last_name
+    )
+
+
+def rebuild_catalog(batch_size=1000):
+    """Полная пересборка каталога из карточек в одной транзакции"""
+    from .models import CatalogEntry, ServiceCardGroup, ServiceCardIndividual
+
+    entries = []
+    for kind, model in (
+        (CatalogEntry.INDIVIDUAL, ServiceCardIndividual),
+        (CatalogEntry.GROUP, ServiceCardGroup),
+    ):
+        cards = model.objects.select_related("specialist__user").iterator(
+            chunk_size=batch_size
+        )
+        for card in cards:
+            specialist = card.specialist
+            entries.append(
+                CatalogEntry(
+                    kind=kind,
+                    card_id=card.pk,
+                    **_entry_fields(
+                        card, specialist.user.last_name, specialist.rating
+                    ),
+                )
+            )
+    with transaction.atomic():
+        CatalogEntry.objects.all().delete()
+        CatalogEntry.objects.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
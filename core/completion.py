@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import autocomplete, catalog, events
+from .caching import bump_catalog_version, invalidate_profiles
+from .models import Enrollment, ServiceCardGroup, Specialist
+
+
+def _topic(model):
+    if model is ServiceCardGroup:
+        return "service_card_group"
+    return "service_card"
+
+
+def _autocomplete_kind(model):
+    if model is ServiceCardGroup:
+        return autocomplete.SERVICE_CARD_GROUP
+    return autocomplete.SERVICE_CARD
+
+
+def complete_cards(model, cards):
+    """
+    Завершает карточки одним UPDATE. Вызывается внутри транзакции с уже
+    заблокированными строками. update() обходит post_save, поэтому
+    производные данные обновляются здесь один раз на весь набор.
+    """
+    if not cards:
+        return []
+    ids = [card.pk for card in cards]
+    now = timezone.now()
+    model.objects.filter(pk__in=ids).update(
+        completed=True, completed_by=F("specialist"), completed_at=now
+    )
+    for card in cards:
+        card.completed = True
+        card.completed_by_id = card.specialist_id
+        card.completed_at = now
+
+    catalog.complete_cards(cards)
+    transaction.on_commit(bump_catalog_version)
+    for card in cards:
+        events.card_event(_topic(model), card, False)
+
+    kind = _autocomplete_kind(model)
+    transaction.on_commit(lambda: [autocomplete.remove(kind, pk) for pk in ids])
+
+    # По одному сбросу кэша /me/ на репетитора и на записанных учеников
+    specialist_ids = {card.specialist_id for card in cards}
+    user_ids = set(
+        Specialist.objects.filter(pk__in=specialist_ids).values_list(
+            "user_id", flat=True
+        )
+    )
+    if model is ServiceCardGroup:
+        user_ids.update(
+            Enrollment.objects.filter(
+                service_card_group__in=ids, status=Enrollment.ENROLLED
+            ).values_list("student__user_id", flat=True)
+        )
+    transaction.on_commit(lambda: invalidate_profiles(*user_ids))
+    return ids
@@ -0,0 +1,137 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import invalidate_profiles
+from .models import Enrollment, ServiceCardGroup
+
+
+def _claim_seat(service_card_group_id):
+    # Условный UPDATE блокирует строку занятия только до коммита
+    return ServiceCardGroup.objects.filter(
+        pk=service_card_group_id,
+        completed=False,
+        seats_taken__lt=F("capacity"),
+    ).update(seats_taken=F("seats_taken") + 1)
+
+
+def enroll(service_card_group, student):
+    """
+    Записывает ученика на групповое занятие или ставит в лист ожидания.
+    Место занимается одним условным UPDATE, поэтому переполнение
+    невозможно даже при одновременных запросах.
+    """
+    try:
+        with transaction.atomic():
+            enrollment, _ = Enrollment.objects.update_or_create(
+                service_card_group=service_card_group,
+                student=student,
+                status=Enrollment.CANCELLED,
+                defaults={
+                    "status": Enrollment.WAITLISTED,
+                    "created": timezone.now(),
+                },
+            )
+            if _claim_seat(service_card_group.pk):
+                enrollment.status = Enrollment.ENROLLED
+                enrollment.save(update_fields=["status"])
+    except IntegrityError:
+        # Ученик уже записан или стоит в очереди
+        enrollment = Enrollment.objects.get(
+            service_card_group=service_card_group, student=student
+        )
+        if enrollment.status == Enrollment.WAITLISTED:
+            enrollment = _retry_waitlisted(enrollment)
+    return enrollment
+
+
+def _retry_waitlisted(enrollment):
+    """Повторная запись из листа ожидания: место могло освободиться"""
+    with transaction.atomic():
+        waiting = (
+            Enrollment.objects.select_for_update()
+            .filter(pk=enrollment.pk, status=Enrollment.WAITLISTED)
+            .first()
+        )
+        if waiting is None:
+            # Запись успели отменить или перевести в записанные
+            return Enrollment.objects.get(pk=enrollment.pk)
+        if _claim_seat(waiting.service_card_group_id):
+            waiting.status = Enrollment.ENROLLED
+            waiting.save(update_fields=["status"])
+        return waiting
+
+
+def fill_from_waitlist(service_card_group_id):
+    """
+    Отдает свободные места первым из листа ожидания, например после
+    увеличения capacity. Возвращает число переведенных записей.
+    """
+    with transaction.atomic():
+        session = (
+            ServiceCardGroup.objects.select_for_update()
+            .filter(pk=service_card_group_id, completed=False)
+            .only("capacity", "seats_taken")
+            .first()
+        )
+        if session is None or session.seats_taken >= session.capacity:
+            return 0
+        waiting = list(
+            Enrollment.objects.filter(
+                service_card_group_id=service_card_group_id,
+                status=Enrollment.WAITLISTED,
+            )
+            .order_by("created", "id")
+            .values_list("pk", "student__user_id")[
+                : session.capacity - session.seats_taken
+            ]
+        )
+        if not waiting:
+            return 0
+        # Условие на статус: запись могли отменить после выборки
+        promoted = Enrollment.objects.filter(
+            pk__in=[pk for pk, _ in waiting], status=Enrollment.WAITLISTED
+        ).update(status=Enrollment.ENROLLED)
+        ServiceCardGroup.objects.filter(pk=service_card_group_id).update(
+            seats_taken=F("seats_taken") + promoted
+        )
+        # update() обходит post_save
+        user_ids = [user_id for _, user_id in waiting]
+        transaction.on_commit(lambda: invalidate_profiles(*user_ids))
+    return promoted
+
+
+def cancel(enrollment):
+    """Отменяет запись и передает место первому из листа ожидания"""
+    user_id = enrollment.student.user_id
+    with transaction.atomic():
+        # Статус меняется через update(), без сигнала post_save
+        transaction.on_commit(lambda: invalidate_profiles(user_id))
+        was_enrolled = Enrollment.objects.filter(
+            pk=enrollment.pk, status=Enrollment.ENROLLED
+        ).update(status=Enrollment.CANCELLED)
+        if not was_enrolled:
+            Enrollment.objects.filter(
+                pk=enrollment.pk, status=Enrollment.WAITLISTED
+            ).update(status=Enrollment.CANCELLED)
+            return
+
+        waiting = Enrollment.objects.filter(
+            service_card_group_id=enrollment.service_card_group_id,
+            status=Enrollment.WAITLISTED,
+        ).order_by("created", "id")
+        # SKIP LOCKED: параллельные отмены забирают разных ожидающих,
+        # а не выстраиваются в очередь за одной строкой
+        next_in_line = waiting.select_for_update(skip_locked=True).first()
+        if next_in_line is None:
+            # Пусто или все ожидающие заняты другими отменами. Во втором
+            # случае ждем их коммита: строка, которую другая отмена
+            # перевела в ENROLLED, перестанет подходить под условие
+            next_in_line = waiting.select_for_update().first()
+        if next_in_line is not None:
+            next_in_line.status = Enrollment.ENROLLED
+            next_in_line.save(update_fields=["status"])
+        else:
+            ServiceCardGroup.objects.filter(
+                pk=enrollment.service_card_group_id
+            ).update(seats_taken=F("seats_taken") - 1)
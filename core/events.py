@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from urllib.parse import parse_qs
+
+import orjson
+from django.conf import settings
+from django.db import transaction
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from .redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "catalog:events"
+
+
+def publish(topic, action, payload):
+    """Событие уходит в Redis только после коммита транзакции"""
+    message = orjson.dumps(
+        {"type": f"{topic}.{action}", "topic": topic, **payload},
+        default=str,
+    )
+
+    def send():
+        client = get_redis()
+        if client is None:
+            # Без Redis события видят только клиенты этого процесса
+            hub.dispatch_threadsafe(message)
+            return
+        try:
+            client.publish(EVENTS_CHANNEL, message)
+        except RedisError:
+            logger.warning(
+                "Catalog event %s.%s was not published", topic, action
+            )
+
+    transaction.on_commit(send)
+
+
+def card_event(topic, card, created):
+    if created:
+        action = "created"
+    elif card.completed:
+        action = "completed"
+    else:
+        action = "updated"
+    publish(
+        topic,
+        action,
+        {
+            "id": card.pk,
+            "name": card.name,
+            "specialist": card.specialist_id,
+            "price": card.price,
+            "date": getattr(card, "date", None),
+            "completed": card.completed,
+        },
+    )
+
+
+class EventHub:
+    """
+    Одна подписка на Redis на процесс. Каждый клиент получает свою
+    ограниченную очередь, медленный клиент отключается и переподключается.
+    """
+
+    def __init__(self):
+        self._clients = set()
+        self._listener = None
+        self._loop = None
+
+    def subscribe(self):
+        self._loop = asyncio.get_running_loop()
+        if settings.REDIS_URL and (
+            self._listener is None or self._listener.done()
+        ):
+            self._listener = asyncio.create_task(self._listen())
+        queue = asyncio.Queue(maxsize=settings.SSE_CLIENT_QUEUE_SIZE)
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._clients.discard(queue)
+
+    def dispatch(self, message):
+        # Разбираем один раз на процесс, а не на каждого клиента
+        event = orjson.loads(message)
+        item = (event["topic"], event["type"], message)
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # None закрывает поток: клиент переподключится сам
+                self._clients.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def dispatch_threadsafe(self, message):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.dispatch, message)
+
+    async def _listen(self):
+        while True:
+            client = aioredis.Redis.from_url(settings.REDIS_URL)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(EVENTS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.dispatch(message["data"])
+            except (RedisError, OSError):
+                logger.warning("Catalog events subscription lost, retrying")
+                await asyncio.sleep(1)
+            finally:
+                await client.close()
+
+
+hub = EventHub()
+
+
+async def stream(queue, topics):
+    """SSE-поток для одного клиента; без событий шлет комментарий-пинг"""
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    queue.get(), timeout=settings.SSE_HEARTBEAT_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if message is None:
+                break
+            topic, event_type, data = message
+            if topics and topic not in topics:
+                continue
+            yield b"event: %s\ndata: %s\n\n" % (event_type.encode(), data)
+    finally:
+        hub.unsubscribe(queue)
+
+
+async def _pump(send, chunks):
+    async for chunk in chunks:
+        await send(
+            {"type": "http.response.body", "body": chunk, "more_body": True}
+        )
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _disconnected(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def events_app(scope, receive, send):
+    """
+    SSE-поток изменений карточек и рейтингов вместо опроса списков.
+    ?topics=service_card,service_card_group,specialist ограничивает события.
+    Голое ASGI-приложение: Django не сообщает об отключении клиента, а
+    здесь http.disconnect сразу снимает подписку. Подключается только
+    в online_tutor.asgi, под WSGI поток занимал бы воркер целиком.
+    """
+    if scope["method"] != "GET":
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 405,
+                "headers": [(b"allow", b"GET")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    query = parse_qs(scope["query_string"].decode())
+    topics = {t for t in query.get("topics", [""])[0].split(",") if t}
+    queue = hub.subscribe()
+    chunks = stream(queue, topics)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    tasks = [
+        asyncio.create_task(_pump(send, chunks)),
+        asyncio.create_task(_disconnected(receive)),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # finally в stream снимает подписку
+        await chunks.aclose()
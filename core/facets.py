@@ -0,0 +1,87 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import CACHE_ERRORS, catalog_version
+
+
+# Границы полуинтервалов [нижняя, верхняя), None — без ограничения
+PRICE_BUCKETS = ((None, 500), (500, 1000), (1000, 2000), (2000, None))
+RATING_BUCKETS = ((None, 1), (1, 2), (2, 3), (3, 4), (4, None))
+
+
+def _bucket_filter(field, lower, upper):
+    condition = Q()
+    if lower is not None:
+        condition &= Q(**{f"{field}__gte": lower})
+    if upper is not None:
+        condition &= Q(**{f"{field}__lt": upper})
+    return condition
+
+
+def _bucket_label(lower, upper):
+    lower = "" if lower is None else lower
+    upper = "" if upper is None else upper
+    return f"{lower}-{upper}"
+
+
+def compute_facets(queryset):
+    """Все счетчики фасетов одним запросом с условной агрегацией"""
+    aggregates = {
+        "total": Count("pk"),
+        "completed": Count("pk", filter=Q(completed=True)),
+    }
+    for i, (lower, upper) in enumerate(PRICE_BUCKETS):
+        aggregates[f"price_{i}"] = Count(
+            "pk", filter=_bucket_filter("price", lower, upper)
+        )
+    for i, (lower, upper) in enumerate(RATING_BUCKETS):
+        aggregates[f"rating_{i}"] = Count(
+            "pk", filter=_bucket_filter("specialist__rating", lower, upper)
+        )
+    row = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        "total": row["total"],
+        "completed": {
+            "open": row["total"] - row["completed"],
+            "completed": row["completed"],
+        },
+        "price": [
+            {"range": _bucket_label(lower, upper), "count": row[f"price_{i}"]}
+            for i, (lower, upper) in enumerate(PRICE_BUCKETS)
+        ],
+        "rating": [
+            {"range": _bucket_label(lower, upper), "count": row[f"rating_{i}"]}
+            for i, (lower, upper) in enumerate(RATING_BUCKETS)
+        ],
+    }
+
+
+def cached_facets(queryset, params):
+    """
+    Кэширует фасеты по сигнатуре фильтра. Версия каталога в ключе
+    сбрасывает кэш при изменении карточек и рейтингов.
+    """
+    version = catalog_version()
+    if version is None:
+        # Кэш недоступен: считаем без него
+        return compute_facets(queryset)
+    signature = hashlib.sha1(
+        json.dumps(params, sort_keys=True).encode()
+    ).hexdigest()
+    key = f"facets:{queryset.model._meta.label_lower}:{version}:{signature}"
+    try:
+        facets = cache.get(key)
+    except CACHE_ERRORS:
+        facets = None
+    if facets is None:
+        facets = compute_facets(queryset)
+        try:
+            cache.set(key, facets, settings.FACETS_CACHE_TIMEOUT)
+        except CACHE_ERRORS:
+            pass
+    return facets
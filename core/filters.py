@@ -0,0 +1,22 @@
+import django_filters
+from .models import ReviewIndividual, ReviewGroup
+
+
+class ReviewIndividualFilter(django_filters.FilterSet):
+    specialist = django_filters.NumberFilter(
+        field_name="service_card__specialist"
+    )
+
+    class Meta:
+        model = ReviewIndividual
+        fields = ("service_card", "specialist")
+
+
+class ReviewGroupFilter(django_filters.FilterSet):
+    specialist = django_filters.NumberFilter(
+        field_name="service_card_group__specialist"
+    )
+
+    class Meta:
+        model = ReviewGroup
+        fields = ("service_card_group", "specialist")
@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.middleware import brotli, compress
+from core.renderers import ORJSONRenderer
+
+
+def build_payload(size):
+    """Список, похожий на выдачу каталога карточек"""
+    now = timezone.now()
+    return [
+        {
+            "id": i,
+            "name": f"Карточка услуги {i}",
+            "image": f"http://localhost/media/images/{i}.png",
+            "description": "Подготовка к экзамену по математике. " * 4,
+            "specialist": i % 50,
+            "specialist_name": f"Специалист {i % 50}",
+            "price": Decimal(1000 + i % 700) / 100,
+            "completed": i % 3 == 0,
+            "completed_by": None,
+            "rating": 3.5 + (i % 15) / 10,
+            "date": now + timedelta(hours=i),
+        }
+        for i in range(size)
+    ]
+
+
+def best_of(repeat, func):
+    result, best = None, float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+class Command(BaseCommand):
+    help = "Время сериализации и сжатия ответа в зависимости от размера"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000]
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, sizes, repeat, **options):
+        encodings = ["gzip"] + (["br"] if brotli is not None else [])
+        header = f"{'rows':>7} {'bytes':>10} {'json ms':>9} {'orjson ms':>10}"
+        for encoding in encodings:
+            header += f" {encoding + ' ms':>9} {encoding + ' bytes':>11}"
+        self.stdout.write(header)
+
+        for size in sizes:
+            payload = build_payload(size)
+            _, drf_time = best_of(
+                repeat, lambda: JSONRenderer().render(payload)
+            )
+            content, orjson_time = best_of(
+                repeat, lambda: ORJSONRenderer().render(payload)
+            )
+            line = (
+                f"{size:>7} {len(content):>10} "
+                f"{drf_time * 1000:>9.2f} {orjson_time * 1000:>10.2f}"
+            )
+            for encoding in encodings:
+                compressed, elapsed = best_of(
+                    repeat, lambda: compress(content, encoding)
+                )
+                line += f" {elapsed * 1000:>9.2f} {len(compressed):>11}"
+            self.stdout.write(line)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.catalog import rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = "Пересборка плоского каталога карточек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        count = rebuild_catalog(batch_size)
+        self.stdout.write(f"Карточек в каталоге: {count}")
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.outbox import relay_outbox
+
+
+class Command(BaseCommand):
+    help = "Отправка событий outbox в Celery"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Разобрать очередь и выйти"
+        )
+
+    def handle(self, *args, once, **options):
+        while True:
+            sent = relay_outbox()
+            # Пока есть полные пачки, забираем следующую без паузы
+            if sent < settings.OUTBOX_BATCH_SIZE:
+                if once:
+                    break
+                time.sleep(settings.OUTBOX_POLL_INTERVAL)
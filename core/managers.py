@@ -1,10 +1,15 @@
+from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
+from django.core import signing
 
 
 TUTOR: str = "Репетитор"
 STUDENT: str = "Студент"
 ADMIN: str = "Админ"
 
+ACTIVATION_TOKEN_SALT: str = "core.activation"
+PAYMENT_STATUS_SALT: str = "core.payment-status"
+
 
 class MyAccountManager(BaseUserManager):
     use_in_migrations = True
@@ -20,6 +25,17 @@ class MyAccountManager(BaseUserManager):
 
         return user
 
+    def get_by_activation_token(self, token):
+        try:
+            data = signing.loads(
+                token,
+                salt=ACTIVATION_TOKEN_SALT,
+                max_age=settings.ACTIVATION_TOKEN_MAX_AGE,
+            )
+        except signing.BadSignature:
+            raise self.model.DoesNotExist("Activation token is invalid.")
+        return self.get(pk=data["id"], activation_code=data["code"])
+
     def create_user(self, email, password, **extra_fields):
         extra_fields.setdefault("user_type", STUDENT)
         return self._create_user(email, password, **extra_fields)
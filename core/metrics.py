@@ -0,0 +1,45 @@
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """Счетчики и таймеры текущего процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        # name -> [количество, суммарное время, максимум]
+        self._timings = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self._timings[name]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timings": {
+                    name: {
+                        "count": count,
+                        "avg": total / count if count else 0.0,
+                        "max": peak,
+                    }
+                    for name, (count, total, peak) in self._timings.items()
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,78 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещенных через q=0"""
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(
+            content, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    return gzip.compress(
+        content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+    )
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжатие ответов brotli или gzip по Accept-Encoding клиента.
+    Ответы меньше COMPRESSION_MIN_SIZE и потоковые ответы не сжимаются.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encodings = accepted_encodings(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if brotli is not None and "br" in encodings:
+            encoding = "br"
+        elif "gzip" in encodings:
+            encoding = "gzip"
+        else:
+            return response
+
+        compressed = compress(response.content, encoding)
+        # Сжатие не всегда выгодно
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = encoding
+        # Тело изменилось, сильный ETag больше не верен
+        if response.has_header("ETag"):
+            response.headers["ETag"] = re.sub(
+                r"^(?!W/)", "W/", response.headers["ETag"]
+            )
+        return response
@@ -0,0 +1,99 @@
+# Generated by Django 4.2 on 2026-10-19 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Payment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=10, verbose_name="Сумма"
+                    ),
+                ),
+                (
+                    "currency",
+                    models.CharField(max_length=3, verbose_name="Валюта"),
+                ),
+                (
+                    "description",
+                    models.CharField(max_length=255, verbose_name="Описание"),
+                ),
+                (
+                    "payment_method",
+                    models.CharField(
+                        max_length=50, verbose_name="Способ оплаты"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Ожидает обработки"),
+                            ("processing", "В обработке"),
+                            ("succeeded", "Оплачен"),
+                            ("failed", "Отклонен"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "intent_id",
+                    models.CharField(
+                        blank=True,
+                        max_length=255,
+                        verbose_name="ID платежа в Stripe",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата обновлении"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="payments",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Платеж",
+                "verbose_name_plural": "Платежи",
+                "ordering": ["-created"],
+            },
+        ),
+    ]
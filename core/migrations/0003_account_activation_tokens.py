@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 17:03
+
+from django.db import migrations, models
+
+
+def clear_used_activation_codes(apps, schema_editor):
+    # Раньше после активации код затирался пустой строкой, а не NULL
+    Account = apps.get_model("core", "Account")
+    Account.objects.filter(activation_code="").update(activation_code=None)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_payment"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            clear_used_activation_codes, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name="account",
+            index=models.Index(
+                condition=models.Q(("activation_code__isnull", False)),
+                fields=["created"],
+                name="account_pending_activation_idx",
+            ),
+        ),
+    ]
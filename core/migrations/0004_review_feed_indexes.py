@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-19 17:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_account_activation_tokens"),
+    ]
+
+    operations = [
+        # Сначала составные индексы, затем удаление одиночных
+        migrations.AddIndex(
+            model_name="reviewgroup",
+            index=models.Index(
+                fields=["service_card_group", "id"],
+                name="review_group_card_feed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reviewindividual",
+            index=models.Index(
+                fields=["service_card", "id"], name="review_ind_card_feed_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reviewgroup",
+            name="service_card_group",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="core.servicecardgroup",
+                verbose_name="Карточка товара",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reviewindividual",
+            name="service_card",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="core.servicecardindividual",
+                verbose_name="Карточка товара",
+            ),
+        ),
+    ]
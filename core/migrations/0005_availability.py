@@ -0,0 +1,143 @@
+# Generated by Django 4.2 on 2026-10-19 17:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+GIST_INDEXES = (
+    ("availability_range_gist", "core_availability"),
+    ("booking_range_gist", "core_booking"),
+)
+
+
+def create_range_indexes(apps, schema_editor):
+    # GiST-индекс по интервалу есть только в PostgreSQL, на остальных
+    # базах запросы core.ranges используют индексы (specialist, start)
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, table in GIST_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            'USING gist (tstzrange("start", "end"))'
+        )
+
+
+def drop_range_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in GIST_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_review_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Booking",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.DateTimeField(verbose_name="Начало")),
+                ("end", models.DateTimeField(verbose_name="Конец")),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "specialist",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bookings",
+                        to="core.specialist",
+                        verbose_name="Репетитор",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bookings",
+                        to="core.student",
+                        verbose_name="Ученик",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Бронирование",
+                "verbose_name_plural": "Бронирования",
+                "ordering": ["start"],
+            },
+        ),
+        migrations.CreateModel(
+            name="Availability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.DateTimeField(verbose_name="Начало")),
+                ("end", models.DateTimeField(verbose_name="Конец")),
+                (
+                    "specialist",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability",
+                        to="core.specialist",
+                        verbose_name="Репетитор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Свободное время",
+                "verbose_name_plural": "Свободное время репетиторов",
+                "ordering": ["start"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["specialist", "start"], name="booking_specialist_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="booking",
+            constraint=models.CheckConstraint(
+                check=models.Q(("end__gt", models.F("start"))),
+                name="booking_valid_range",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="availability",
+            index=models.Index(
+                fields=["specialist", "start"],
+                name="availability_specialist_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="availability",
+            constraint=models.CheckConstraint(
+                check=models.Q(("end__gt", models.F("start"))),
+                name="availability_valid_range",
+            ),
+        ),
+        migrations.RunPython(create_range_indexes, drop_range_indexes),
+    ]
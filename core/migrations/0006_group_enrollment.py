@@ -0,0 +1,107 @@
+# Generated by Django 4.2 on 2026-10-19 17:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0005_availability"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Enrollment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("enrolled", "Записан"),
+                            ("waitlisted", "В листе ожидания"),
+                            ("cancelled", "Отменена"),
+                        ],
+                        default="waitlisted",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Запись на занятие",
+                "verbose_name_plural": "Записи на занятия",
+                "ordering": ["created"],
+            },
+        ),
+        migrations.AddField(
+            model_name="servicecardgroup",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                default=10, verbose_name="Количество мест"
+            ),
+        ),
+        migrations.AddField(
+            model_name="servicecardgroup",
+            name="seats_taken",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Занято мест"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="servicecardgroup",
+            constraint=models.CheckConstraint(
+                check=models.Q(("seats_taken__lte", models.F("capacity"))),
+                name="group_seats_within_capacity",
+            ),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="service_card_group",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="enrollments",
+                to="core.servicecardgroup",
+                verbose_name="Групповое занятие",
+            ),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="student",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="enrollments",
+                to="core.student",
+                verbose_name="Ученик",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["service_card_group", "status", "created"],
+                name="enrollment_queue_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="enrollment",
+            constraint=models.UniqueConstraint(
+                fields=("service_card_group", "student"),
+                name="unique_group_enrollment",
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-19 17:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0006_group_enrollment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Recommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="Оценка схожести")),
+                (
+                    "rank",
+                    models.PositiveSmallIntegerField(verbose_name="Позиция"),
+                ),
+                (
+                    "specialist",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.specialist",
+                        verbose_name="Репетитор",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to="core.student",
+                        verbose_name="Ученик",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Рекомендация",
+                "verbose_name_plural": "Рекомендации",
+                "ordering": ["rank"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="recommendation",
+            constraint=models.UniqueConstraint(
+                fields=("student", "rank"), name="unique_recommendation_rank"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0007_recommendations"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="reminded_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Напоминание отправлено"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicecardgroup",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["date"],
+                name="group_upcoming_idx",
+            ),
+        ),
+    ]
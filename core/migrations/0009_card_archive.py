@@ -0,0 +1,193 @@
+# Generated by Django 4.2 on 2026-10-19 17:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Для уже завершенных карточек отсчет срока хранения начинается сейчас
+    now = django.utils.timezone.now()
+    for name in ("ServiceCardIndividual", "ServiceCardGroup"):
+        apps.get_model("core", name).objects.filter(
+            completed=True, completed_at__isnull=True
+        ).update(completed_at=now)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0008_session_reminders"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedReview",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "original_id",
+                    models.BigIntegerField(verbose_name="ID отзыва"),
+                ),
+                ("rating", models.FloatField()),
+            ],
+            options={
+                "verbose_name": "Архивный отзыв",
+                "verbose_name_plural": "Архивные отзывы",
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedServiceCard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("individual", "Индивидуальное занятие"),
+                            ("group", "Групповое занятие"),
+                        ],
+                        max_length=20,
+                        verbose_name="Тип",
+                    ),
+                ),
+                (
+                    "original_id",
+                    models.BigIntegerField(verbose_name="ID карточки"),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=100, verbose_name="Название"),
+                ),
+                (
+                    "image",
+                    models.ImageField(
+                        upload_to="service_card", verbose_name="Картинка"
+                    ),
+                ),
+                ("description", models.TextField(verbose_name="Описание")),
+                (
+                    "date",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Дата"
+                    ),
+                ),
+                (
+                    "price",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=8, verbose_name="Цена"
+                    ),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Дата завершения"
+                    ),
+                ),
+                (
+                    "participants",
+                    models.JSONField(default=list, verbose_name="Участники"),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата архивации"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Архивное занятие",
+                "verbose_name_plural": "Архивные занятия",
+                "ordering": ["-completed_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="servicecardgroup",
+            name="completed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Дата завершения"
+            ),
+        ),
+        migrations.AddField(
+            model_name="servicecardindividual",
+            name="completed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Дата завершения"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicecardgroup",
+            index=models.Index(
+                condition=models.Q(("completed", True)),
+                fields=["completed_at"],
+                name="card_group_completed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicecardindividual",
+            index=models.Index(
+                condition=models.Q(("completed", True)),
+                fields=["completed_at"],
+                name="card_ind_completed_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedservicecard",
+            name="specialist",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="archived_cards",
+                to="core.specialist",
+                verbose_name="Репетитор",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedreview",
+            name="card",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reviews",
+                to="core.archivedservicecard",
+                verbose_name="Архивное занятие",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedreview",
+            name="completed_by",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                to="core.student",
+                verbose_name="Прошедший курс",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedservicecard",
+            index=models.Index(
+                fields=["specialist", "completed_at"],
+                name="archived_card_specialist_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="archivedservicecard",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "original_id"), name="unique_archived_card"
+            ),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-19 17:21
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0009_card_archive"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "task",
+                    models.CharField(max_length=255, verbose_name="Задача"),
+                ),
+                (
+                    "args",
+                    models.JSONField(default=list, verbose_name="Аргументы"),
+                ),
+                (
+                    "kwargs",
+                    models.JSONField(
+                        default=dict, verbose_name="Именованные аргументы"
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("dispatched_at", models.DateTimeField(blank=True, null=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Событие outbox",
+                "verbose_name_plural": "События outbox",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="outboxevent",
+            index=models.Index(
+                condition=models.Q(("dispatched_at__isnull", True)),
+                fields=["available_at", "id"],
+                name="outbox_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0010_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="servicecardgroup",
+            name="view_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Просмотры"
+            ),
+        ),
+        migrations.AddField(
+            model_name="servicecardindividual",
+            name="view_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Просмотры"
+            ),
+        ),
+        migrations.AddField(
+            model_name="specialist",
+            name="view_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Просмотры"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicecardgroup",
+            index=models.Index(
+                fields=["-view_count"], name="card_group_views_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servicecardindividual",
+            index=models.Index(
+                fields=["-view_count"], name="card_ind_views_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="specialist",
+            index=models.Index(
+                fields=["-view_count"], name="specialist_views_idx"
+            ),
+        ),
+    ]
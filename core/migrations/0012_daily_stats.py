@@ -0,0 +1,88 @@
+# Generated by Django 4.2 on 2026-10-19 17:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_view_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reviewgroup",
+            name="created",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата создания",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="reviewindividual",
+            name="created",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата создания",
+            ),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name="SpecialistDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="День")),
+                (
+                    "completed_individual",
+                    models.PositiveIntegerField(default=0),
+                ),
+                ("completed_group", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Выручка",
+                    ),
+                ),
+                ("reviews", models.PositiveIntegerField(default=0)),
+                ("rating_sum", models.FloatField(default=0)),
+                (
+                    "specialist",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="core.specialist",
+                        verbose_name="Репетитор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика за день",
+                "verbose_name_plural": "Статистика по дням",
+                "ordering": ["day"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="specialistdailystats",
+            constraint=models.UniqueConstraint(
+                fields=("specialist", "day"), name="unique_specialist_day"
+            ),
+        ),
+    ]
@@ -0,0 +1,159 @@
+# Generated by Django 4.2 on 2026-10-19 17:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_catalog(apps, schema_editor):
+    CatalogEntry = apps.get_model("core", "CatalogEntry")
+    entries = []
+    for kind, name in (
+        ("individual", "ServiceCardIndividual"),
+        ("group", "ServiceCardGroup"),
+    ):
+        cards = apps.get_model("core", name).objects.values(
+            "pk",
+            "name",
+            "image",
+            "price",
+            "completed",
+            "specialist_id",
+            "specialist__user__last_name",
+            "specialist__rating",
+            *(["date"] if kind == "group" else []),
+        )
+        for card in cards.iterator():
+            entries.append(
+                CatalogEntry(
+                    kind=kind,
+                    card_id=card["pk"],
+                    name=card["name"],
+                    image=card["image"],
+                    price=card["price"],
+                    date=card.get("date"),
+                    completed=card["completed"],
+                    specialist_id=card["specialist_id"],
+                    specialist_name=card["specialist__user__last_name"],
+                    rating=card["specialist__rating"],
+                )
+            )
+    CatalogEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0012_daily_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("individual", "Индивидуальное занятие"),
+                            ("group", "Групповое занятие"),
+                        ],
+                        max_length=20,
+                        verbose_name="Тип",
+                    ),
+                ),
+                ("card_id", models.BigIntegerField(verbose_name="ID карточки")),
+                (
+                    "name",
+                    models.CharField(max_length=100, verbose_name="Название"),
+                ),
+                (
+                    "image",
+                    models.ImageField(
+                        upload_to="service_card", verbose_name="Картинка"
+                    ),
+                ),
+                (
+                    "price",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=8, verbose_name="Цена"
+                    ),
+                ),
+                (
+                    "date",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Дата"
+                    ),
+                ),
+                (
+                    "completed",
+                    models.BooleanField(default=False, verbose_name="Завершен"),
+                ),
+                (
+                    "specialist_name",
+                    models.CharField(
+                        blank=True,
+                        max_length=150,
+                        verbose_name="Имя репетитора",
+                    ),
+                ),
+                (
+                    "rating",
+                    models.FloatField(default=0, verbose_name="Рейтинг"),
+                ),
+                (
+                    "specialist",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.specialist",
+                        verbose_name="Репетитор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Карточка каталога",
+                "verbose_name_plural": "Каталог",
+                "ordering": ["-rating", "id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["completed", "-rating", "id"],
+                include=("price",),
+                name="catalog_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["completed", "price", "id"],
+                include=("rating",),
+                name="catalog_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["kind", "date"],
+                include=("price", "rating"),
+                name="catalog_upcoming_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="catalogentry",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "card_id"), name="unique_catalog_card"
+            ),
+        ),
+        migrations.RunPython(fill_catalog, migrations.RunPython.noop),
+    ]
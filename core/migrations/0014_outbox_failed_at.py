@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-19 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0013_catalog_entries"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="outboxevent",
+            name="outbox_pending_idx",
+        ),
+        migrations.AddField(
+            model_name="outboxevent",
+            name="failed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="outboxevent",
+            index=models.Index(
+                condition=models.Q(
+                    ("dispatched_at__isnull", True), ("failed_at__isnull", True)
+                ),
+                fields=["available_at", "id"],
+                name="outbox_pending_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-19 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0014_outbox_failed_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="catalogentry",
+            name="catalog_rating_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="catalogentry",
+            name="catalog_price_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="catalogentry",
+            name="catalog_upcoming_idx",
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["-rating", "id"], name="catalog_rating_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["completed", "-rating", "id"],
+                name="catalog_completed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["price", "id"], name="catalog_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["kind", "date"],
+                name="catalog_upcoming_idx",
+            ),
+        ),
+    ]
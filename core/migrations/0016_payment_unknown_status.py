@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0015_catalog_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Ожидает обработки"),
+                    ("processing", "В обработке"),
+                    ("succeeded", "Оплачен"),
+                    ("failed", "Отклонен"),
+                    ("unknown", "Требует сверки"),
+                ],
+                default="pending",
+                max_length=20,
+                verbose_name="Статус",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-19 18:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0016_payment_unknown_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="booking",
+            name="service_card",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="bookings",
+                to="core.servicecardindividual",
+                verbose_name="Курс",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0017_booking_service_card"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedreview",
+            name="created",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                null=True,
+                verbose_name="Дата создания",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0018_archived_review_created"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="catalogentry",
+            name="catalog_rating_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="catalogentry",
+            name="catalog_completed_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="catalogentry",
+            name="catalog_price_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="catalogentry",
+            name="catalog_upcoming_idx",
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["-rating", "id"],
+                include=("kind", "card_id", "price", "completed"),
+                name="catalog_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["completed", "-rating", "id"],
+                include=("kind", "card_id", "price"),
+                name="catalog_completed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                fields=["price", "id"],
+                include=("kind", "card_id", "rating", "completed"),
+                name="catalog_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="catalogentry",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["kind", "date"],
+                include=("id", "card_id", "price", "rating"),
+                name="catalog_upcoming_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,191 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from drf_yasg2.utils import swagger_auto_schema
+from rest_framework.decorators import action
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.response import Response
+
+from .completion import complete_cards
+from .models import Specialist
+from .view_counters import record_view
+
+
+def requested_fields(request):
+    """Наборы полей из ?fields=a,b и ?exclude=c"""
+
+    def parse(param):
+        value = request.query_params.get(param, "")
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+    return parse("fields"), parse("exclude")
+
+
+def trim_queryset(queryset, serializer):
+    """
+    Загружает только колонки, нужные полям сериализатора, и присоединяет
+    только используемые связи. Если поле нельзя сопоставить колонке
+    (метод, обратная связь), набор колонок не ограничивается.
+    """
+    model = queryset.model
+    only = {model._meta.pk.name}
+    related = set()
+    can_trim = True
+
+    for field in serializer.fields.values():
+        if field.source == "*":
+            can_trim = False
+            continue
+        current = model
+        parts = field.source.split(".")
+        for depth, part in enumerate(parts, start=1):
+            try:
+                model_field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                can_trim = False
+                break
+            if model_field.many_to_many or model_field.one_to_many:
+                can_trim = False
+                break
+            lookup = "__".join(parts[:depth])
+            only.add(lookup)
+            if not model_field.is_relation:
+                break
+            if depth < len(parts):
+                # Через связь читается поле связанной модели
+                related.add(lookup)
+            current = model_field.related_model
+
+    if related:
+        queryset = queryset.select_related(*related)
+    if can_trim:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+class SparseFieldsetMixin:
+    """
+    Для чтения урезает SELECT под поля, оставшиеся в сериализаторе
+    после ?fields= / ?exclude=.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return trim_queryset(queryset, self.get_serializer())
+
+
+class ViewCountMixin:
+    """Считает просмотры детальной страницы без записи в базу"""
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        record_view(instance)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+
+def parse_ids(value, max_size):
+    """Уникальные id из строки через запятую в исходном порядке"""
+    try:
+        ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise ValidationError({"ids": "Ожидаются целые числа через запятую."})
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({"ids": "Укажите хотя бы один id."})
+    if len(ids) > max_size:
+        raise ValidationError({"ids": f"Не больше {max_size} id за запрос."})
+    return ids
+
+
+class BatchFetchMixin:
+    """
+    GET .../batch/?ids=3,1,2 — объекты одним запросом в порядке ids.
+    Для отсутствующих id в ответе элемент с "found": false.
+    """
+
+    batch_max_size = 100
+
+    @swagger_auto_schema(operation_summary="Несколько объектов по ?ids=")
+    @action(detail=False, methods=["GET"])
+    def batch(self, request):
+        ids = parse_ids(
+            request.query_params.get("ids", ""), self.batch_max_size
+        )
+        # Те же права и фильтры, что у списка; get_queryset подключает
+        # связи, нужные сериализатору
+        queryset = self.filter_queryset(self.get_queryset())
+        objects = list(queryset.filter(pk__in=ids))
+        data = self.get_serializer(objects, many=True).data
+        found = {obj.pk: item for obj, item in zip(objects, data)}
+        return Response(
+            [
+                {"id": pk, "found": pk in found, "data": found.get(pk)}
+                for pk in ids
+            ]
+        )
+
+
+NOT_OWNER_MESSAGE = "Вы не являетесь репетитором для этих курсов"
+
+
+class BulkCompleteMixin:
+    """
+    POST .../complete/ {"ids": [1, 2]} — завершает карточки репетитора
+    одним UPDATE. Если хоть одна карточка чужая или не найдена, не
+    меняется ничего.
+    """
+
+    complete_max_size = 100
+
+    @swagger_auto_schema(operation_summary="Завершить несколько курсов")
+    @action(
+        detail=False, methods=["POST"], permission_classes=[IsAuthenticated]
+    )
+    def complete(self, request):
+        ids = request.data.get("ids", "")
+        if isinstance(ids, list):
+            ids = ",".join(str(pk) for pk in ids)
+        ids = parse_ids(str(ids), self.complete_max_size)
+        model = self.queryset.model
+
+        with transaction.atomic():
+            # Блокировка в порядке pk, чтобы встречные запросы не
+            # взаимоблокировались
+            cards = list(
+                model.objects.select_for_update()
+                .filter(pk__in=ids)
+                .order_by("pk")
+            )
+            found = {card.pk for card in cards}
+            missing = [pk for pk in ids if pk not in found]
+            # Ответ без исключений DRF: они превратили бы ids в строки
+            if missing:
+                return Response(
+                    {"message": "Таких курсов нет", "ids": missing},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            owned = set(
+                Specialist.objects.filter(user=request.user).values_list(
+                    "pk", flat=True
+                )
+            )
+            foreign = [c.pk for c in cards if c.specialist_id not in owned]
+            if foreign:
+                return Response(
+                    {"message": NOT_OWNER_MESSAGE, "ids": foreign},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+            completed = complete_cards(
+                model, [card for card in cards if not card.completed]
+            )
+
+        return Response(
+            {
+                "completed": completed,
+                "already_completed": [pk for pk in ids if pk not in completed],
+            }
+        )
@@ -1,14 +1,21 @@
 from django.db import models
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
+from django.core import signing
 from django.utils.translation import gettext_lazy as _
 from .managers import *
+from .managers import ACTIVATION_TOKEN_SALT, PAYMENT_STATUS_SALT
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.core.validators import RegexValidator
-from django.db.models import Avg
-from django.db.models.signals import post_save
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils.crypto import get_random_string
+from django.utils import timezone
+from django.db import transaction
+from . import autocomplete, catalog, events
+from .authentication import TOKEN_USER_CLAIMS, forget_user, remember_user
+from .caching import bump_catalog_version, invalidate_profiles
 
 
 phone_validator = RegexValidator(
@@ -70,6 +77,15 @@ class Account(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _("user")
         verbose_name_plural = _("users")
+        indexes = [
+            # Для очистки просроченных кодов; активированные аккаунты
+            # в индекс не попадают
+            models.Index(
+                fields=["created"],
+                condition=models.Q(activation_code__isnull=False),
+                name="account_pending_activation_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.get_full_name()
@@ -88,11 +104,51 @@ class Account(AbstractBaseUser, PermissionsMixin):
         )
         self.activation_code = code
 
+    def make_activation_token(self):
+        """
+        Подписанный токен активации: содержит id аккаунта, поэтому при
+        проверке нужен только поиск по первичному ключу.
+        """
+        return signing.dumps(
+            {"id": self.pk, "code": self.activation_code},
+            salt=ACTIVATION_TOKEN_SALT,
+        )
+
     def tokens(self):
         refresh = RefreshToken.for_user(self)
+        # Поля попадают и в access-токен, см. core.authentication
+        for claim in TOKEN_USER_CLAIMS:
+            refresh[claim] = getattr(self, claim)
         return {"refresh": str(refresh), "access": str(refresh.access_token)}
 
 
+class CounterFieldsMixin:
+    """
+    Счетчики из counter_fields меняются только атомарными UPDATE.
+    Полный save() существующей строки их не пишет, иначе вернул бы в базу
+    устаревшее значение из памяти.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            not self._state.adding
+            and not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
 class UserProfileBase(models.Model):
     user = models.OneToOneField(Account, on_delete=models.CASCADE)
     profile_picture = models.ImageField(
@@ -105,7 +161,7 @@ class UserProfileBase(models.Model):
         abstract = True
 
 
-class Specialist(models.Model):
+class Specialist(CounterFieldsMixin, models.Model):
     user = models.OneToOneField(Account, on_delete=models.CASCADE)
     first_name = models.CharField(max_length=100, verbose_name="Имя")
     last_name = models.CharField(max_length=100, verbose_name="Фамилия")
@@ -125,15 +181,41 @@ class Specialist(models.Model):
         verbose_name="Стоимость почасовой консультации",
     )
     instagram = models.TextField(blank=True)
+    # Копится в core.view_counters и записывается периодической задачей
+    view_count = models.PositiveIntegerField(
+        default=0, verbose_name="Просмотры"
+    )
+
+    counter_fields = ("view_count",)
 
     class Meta:
         verbose_name = "Репетитор"
         verbose_name_plural = "Репетиторы"
         ordering = ["first_name"]
+        indexes = [
+            models.Index(fields=["-view_count"], name="specialist_views_idx"),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    def refresh_rating(self):
+        """
+        Средняя оценка по всем отзывам репетитора, включая отзывы
+        к архивным карточкам.
+        """
+        total, count = 0.0, 0
+        for reviews in (
+            ReviewIndividual.objects.filter(service_card__specialist=self),
+            ReviewGroup.objects.filter(service_card_group__specialist=self),
+            ArchivedReview.objects.filter(card__specialist=self),
+        ):
+            row = reviews.aggregate(total=Sum("rating"), count=Count("id"))
+            total += row["total"] or 0
+            count += row["count"]
+        self.rating = min(total / count, 5) if count else 0
+        self.save(update_fields=["rating"])
+
 
 class Student(models.Model):
     user = models.OneToOneField(Account, on_delete=models.CASCADE)
@@ -155,7 +237,7 @@ class Student(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
-class ServiceCardIndividual(models.Model):
+class ServiceCardIndividual(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=100, verbose_name="Название")
     image = models.ImageField(upload_to="service_card", verbose_name="Картинка")
     description = models.TextField(verbose_name="Описание")
@@ -174,11 +256,29 @@ class ServiceCardIndividual(models.Model):
         related_name="completed_card_individual",
         verbose_name="Завершено репетитором",
     )
+    completed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Дата завершения"
+    )
+    view_count = models.PositiveIntegerField(
+        default=0, verbose_name="Просмотры"
+    )
+
+    # Просмотры пишет core.view_counters
+    counter_fields = ("view_count",)
 
     class Meta:
         verbose_name = "Индивидуальное занятие"
         verbose_name_plural = "Индивидуальные занятия"
         ordering = ["name"]
+        indexes = [
+            # Поиск завершенных карточек для архивации
+            models.Index(
+                fields=["completed_at"],
+                condition=models.Q(completed=True),
+                name="card_ind_completed_idx",
+            ),
+            models.Index(fields=["-view_count"], name="card_ind_views_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -188,12 +288,24 @@ class ReviewIndividual(models.Model):
     service_card = models.ForeignKey(
         ServiceCardIndividual,
         on_delete=models.CASCADE,
+        # Покрывается составным индексом (service_card, id)
+        db_index=False,
         verbose_name="Карточка товара",
     )
     rating = models.FloatField()
     completed_by = models.ForeignKey(
         Student, on_delete=models.CASCADE, verbose_name="Прошедший курс"
     )
+    created = models.DateTimeField(
+        "Дата создания", auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["service_card", "id"], name="review_ind_card_feed_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Отзыв для {self.service_card} от {self.completed_by}"
@@ -201,27 +313,10 @@ class ReviewIndividual(models.Model):
 
 @receiver(post_save, sender=ReviewIndividual)
 def update_individual_specialist_rating(sender, instance, created, **kwargs):
-    if created:
-        service_card = instance.service_card
-        specialist = service_card.specialist
-        rating = ReviewIndividual.objects.filter(
-            service_card__specialist=specialist
-        ).aggregate(Avg("rating"))["rating__avg"]
-        specialist.rating = min(rating, 5)
-        specialist.save()
-    else:
-        service_card = instance.service_card
-        specialist = service_card.specialist
-        rating = (
-            ReviewIndividual.objects.filter(service_card__specialist=specialist)
-            .exclude(id=instance.id)
-            .aggregate(Avg("rating"))["rating__avg"]
-        )
-        specialist.rating = min(rating, 5)
-        specialist.save()
+    instance.service_card.specialist.refresh_rating()
 
 
-class ServiceCardGroup(models.Model):
+class ServiceCardGroup(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=100, verbose_name="Название")
     image = models.ImageField(upload_to="service_card", verbose_name="Картинка")
     date = models.DateTimeField(verbose_name="Дата")
@@ -241,11 +336,47 @@ class ServiceCardGroup(models.Model):
         related_name="completed_card_group",
         verbose_name="Завершено репетитором",
     )
+    capacity = models.PositiveIntegerField(
+        default=10, verbose_name="Количество мест"
+    )
+    seats_taken = models.PositiveIntegerField(
+        default=0, verbose_name="Занято мест"
+    )
+    completed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Дата завершения"
+    )
+    view_count = models.PositiveIntegerField(
+        default=0, verbose_name="Просмотры"
+    )
+
+    # Места занимает и освобождает core.enrollment, просмотры пишет
+    # core.view_counters
+    counter_fields = ("seats_taken", "view_count")
 
     class Meta:
         verbose_name = "Групповое занятие"
         verbose_name_plural = "Групповые занятия"
         ordering = ["name"]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(seats_taken__lte=models.F("capacity")),
+                name="group_seats_within_capacity",
+            ),
+        ]
+        indexes = [
+            # Поиск ближайших незавершенных занятий для напоминаний
+            models.Index(
+                fields=["date"],
+                condition=models.Q(completed=False),
+                name="group_upcoming_idx",
+            ),
+            models.Index(
+                fields=["completed_at"],
+                condition=models.Q(completed=True),
+                name="card_group_completed_idx",
+            ),
+            models.Index(fields=["-view_count"], name="card_group_views_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -255,12 +386,25 @@ class ReviewGroup(models.Model):
     service_card_group = models.ForeignKey(
         ServiceCardGroup,
         on_delete=models.CASCADE,
+        # Покрывается составным индексом (service_card_group, id)
+        db_index=False,
         verbose_name="Карточка товара",
     )
     rating = models.FloatField()
     completed_by = models.ForeignKey(
         Student, on_delete=models.CASCADE, verbose_name="Прошедший курс"
     )
+    created = models.DateTimeField(
+        "Дата создания", auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["service_card_group", "id"],
+                name="review_group_card_feed_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Отзыв для {self.service_card} от {self.completed_by}"
@@ -268,23 +412,626 @@ class ReviewGroup(models.Model):
 
 @receiver(post_save, sender=ReviewGroup)
 def update_group_specialist_rating(sender, instance, created, **kwargs):
-    if created:
-        service_card = instance.service_card_group
-        specialist = service_card.specialist
-        rating = ReviewGroup.objects.filter(
-            service_card_group__specialist=specialist
-        ).aggregate(Avg("rating"))["rating__avg"]
-        specialist.rating = min(rating, 5)
-        specialist.save()
-    else:
-        service_card = instance.service_card_group
-        specialist = service_card.specialist
-        rating = (
-            ReviewGroup.objects.filter(
-                service_card_group__specialist=specialist
-            )
-            .exclude(id=instance.id)
-            .aggregate(Avg("rating"))["rating__avg"]
+    instance.service_card_group.specialist.refresh_rating()
+
+
+@receiver(post_save, sender=Specialist)
+@receiver(post_save, sender=ServiceCardIndividual)
+@receiver(post_delete, sender=ServiceCardIndividual)
+@receiver(post_save, sender=ServiceCardGroup)
+@receiver(post_delete, sender=ServiceCardGroup)
+def invalidate_catalog_cache(sender, **kwargs):
+    # После коммита: откат не должен сбрасывать кэш, а сбой кэша — запись
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(pre_save, sender=ServiceCardIndividual)
+@receiver(pre_save, sender=ServiceCardGroup)
+def stamp_completed_at(sender, instance, **kwargs):
+    # Карточку завершают и через API, и через админку: дата нужна
+    # сводкам и архивации при любом способе
+    if not instance.completed:
+        instance.completed_at = None
+    elif instance.completed_at is None:
+        instance.completed_at = timezone.now()
+
+
+@receiver(post_save, sender=ServiceCardIndividual)
+@receiver(post_save, sender=ServiceCardGroup)
+def sync_catalog_entry(sender, instance, **kwargs):
+    catalog.sync_card(instance)
+
+
+@receiver(post_delete, sender=ServiceCardIndividual)
+@receiver(post_delete, sender=ServiceCardGroup)
+def remove_catalog_entry(sender, instance, **kwargs):
+    catalog.remove_card(instance)
+
+
+@receiver(post_save, sender=Specialist)
+def sync_catalog_specialist(sender, instance, **kwargs):
+    catalog.sync_specialist(instance)
+
+
+@receiver(post_save, sender=ServiceCardIndividual)
+def publish_card_individual_event(sender, instance, created, **kwargs):
+    events.card_event("service_card", instance, created)
+
+
+@receiver(post_save, sender=ServiceCardGroup)
+def publish_card_group_event(sender, instance, created, **kwargs):
+    events.card_event("service_card_group", instance, created)
+
+
+@receiver(post_save, sender=Specialist)
+def publish_rating_event(sender, instance, update_fields, **kwargs):
+    if update_fields and "rating" in update_fields:
+        payload = {"id": instance.pk, "rating": instance.rating}
+        events.publish("specialist", "rating", payload)
+
+
+@receiver(post_save, sender=Account)
+def sync_catalog_specialist_name(sender, instance, update_fields, **kwargs):
+    if update_fields is None or "last_name" in update_fields:
+        catalog.sync_account(instance)
+
+
+@receiver(post_save, sender=Account)
+def refresh_cached_user(sender, instance, **kwargs):
+    remember_user(instance)
+
+
+@receiver(post_delete, sender=Account)
+def evict_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+def invalidate_profiles_on_commit(*user_ids):
+    transaction.on_commit(lambda: invalidate_profiles(*user_ids))
+
+
+def owner_user_id(instance, field):
+    """
+    user_id профиля, на который ссылается field. Загруженный профиль
+    не требует запроса, иначе из базы читается только user_id.
+    """
+    descriptor = getattr(type(instance), field)
+    if descriptor.is_cached(instance):
+        return getattr(instance, field).user_id
+    return (
+        descriptor.field.related_model.objects.filter(
+            pk=getattr(instance, descriptor.field.attname)
+        )
+        .values_list("user_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Account)
+def invalidate_account_profile(sender, instance, **kwargs):
+    invalidate_profiles_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Specialist)
+@receiver(post_delete, sender=Specialist)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_owner_profile(sender, instance, **kwargs):
+    invalidate_profiles_on_commit(instance.user_id)
+
+
+@receiver(post_save, sender=ServiceCardIndividual)
+@receiver(post_delete, sender=ServiceCardIndividual)
+@receiver(post_save, sender=ServiceCardGroup)
+@receiver(post_delete, sender=ServiceCardGroup)
+def invalidate_card_profile(sender, instance, **kwargs):
+    invalidate_profiles_on_commit(owner_user_id(instance, "specialist"))
+
+
+@receiver(post_save, sender=ReviewIndividual)
+@receiver(post_delete, sender=ReviewIndividual)
+@receiver(post_save, sender=ReviewGroup)
+@receiver(post_delete, sender=ReviewGroup)
+def invalidate_reviewer_profile(sender, instance, **kwargs):
+    # Профиль репетитора сбросит сохранение рейтинга
+    invalidate_profiles_on_commit(owner_user_id(instance, "completed_by"))
+
+
+@receiver(post_save, sender=Specialist)
+def update_specialist_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.update_specialist(instance))
+
+
+@receiver(post_save, sender=ServiceCardIndividual)
+def update_card_individual_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: autocomplete.update_card(autocomplete.SERVICE_CARD, instance)
+    )
+
+
+@receiver(post_save, sender=ServiceCardGroup)
+def update_card_group_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: autocomplete.update_card(
+            autocomplete.SERVICE_CARD_GROUP, instance
         )
-        specialist.rating = min(rating, 5)
-        specialist.save()
+    )
+
+
+@receiver(post_delete, sender=Specialist)
+@receiver(post_delete, sender=ServiceCardIndividual)
+@receiver(post_delete, sender=ServiceCardGroup)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    kind = {
+        Specialist: autocomplete.SPECIALIST,
+        ServiceCardIndividual: autocomplete.SERVICE_CARD,
+        ServiceCardGroup: autocomplete.SERVICE_CARD_GROUP,
+    }[sender]
+    transaction.on_commit(lambda: autocomplete.remove(kind, instance.pk))
+
+
+class Payment(models.Model):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    # Провайдер не ответил: списание могло пройти, платеж сверяется
+    UNKNOWN = "unknown"
+    STATUS_CHOICES = (
+        (PENDING, "Ожидает обработки"),
+        (PROCESSING, "В обработке"),
+        (SUCCEEDED, "Оплачен"),
+        (FAILED, "Отклонен"),
+        (UNKNOWN, "Требует сверки"),
+    )
+
+    user = models.ForeignKey(
+        Account,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="payments",
+        verbose_name="Пользователь",
+    )
+    amount = models.DecimalField(
+        max_digits=10, decimal_places=2, verbose_name="Сумма"
+    )
+    currency = models.CharField(max_length=3, verbose_name="Валюта")
+    description = models.CharField(max_length=255, verbose_name="Описание")
+    payment_method = models.CharField(
+        max_length=50, verbose_name="Способ оплаты"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name="Статус",
+    )
+    intent_id = models.CharField(
+        max_length=255, blank=True, verbose_name="ID платежа в Stripe"
+    )
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    updated = models.DateTimeField("Дата обновлении", auto_now=True)
+
+    class Meta:
+        verbose_name = "Платеж"
+        verbose_name_plural = "Платежи"
+        ordering = ["-created"]
+
+    def __str__(self):
+        return f"Платеж #{self.pk} ({self.get_status_display()})"
+
+    def make_status_token(self):
+        """
+        Подписанный id платежа для status_url: без него статус анонимного
+        платежа не получить, перебирая идентификаторы
+        """
+        return signing.dumps(self.pk, salt=PAYMENT_STATUS_SALT)
+
+    @staticmethod
+    def id_from_status_token(token):
+        try:
+            return signing.loads(token, salt=PAYMENT_STATUS_SALT)
+        except signing.BadSignature:
+            return None
+
+
+class Availability(models.Model):
+    specialist = models.ForeignKey(
+        Specialist,
+        on_delete=models.CASCADE,
+        related_name="availability",
+        # Покрывается индексом (specialist, start)
+        db_index=False,
+        verbose_name="Репетитор",
+    )
+    start = models.DateTimeField(verbose_name="Начало")
+    end = models.DateTimeField(verbose_name="Конец")
+
+    class Meta:
+        verbose_name = "Свободное время"
+        verbose_name_plural = "Свободное время репетиторов"
+        ordering = ["start"]
+        indexes = [
+            models.Index(
+                fields=["specialist", "start"],
+                name="availability_specialist_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end__gt=models.F("start")),
+                name="availability_valid_range",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.specialist}: {self.start} — {self.end}"
+
+
+class Booking(models.Model):
+    specialist = models.ForeignKey(
+        Specialist,
+        on_delete=models.CASCADE,
+        related_name="bookings",
+        db_index=False,
+        verbose_name="Репетитор",
+    )
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name="bookings",
+        verbose_name="Ученик",
+    )
+    # Курс, по которому занятие: дает право оставить отзыв на карточку
+    service_card = models.ForeignKey(
+        ServiceCardIndividual,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="bookings",
+        verbose_name="Курс",
+    )
+    start = models.DateTimeField(verbose_name="Начало")
+    end = models.DateTimeField(verbose_name="Конец")
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Бронирование"
+        verbose_name_plural = "Бронирования"
+        ordering = ["start"]
+        indexes = [
+            models.Index(
+                fields=["specialist", "start"],
+                name="booking_specialist_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end__gt=models.F("start")),
+                name="booking_valid_range",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student} у {self.specialist}: {self.start}"
+
+
+class Enrollment(models.Model):
+    ENROLLED = "enrolled"
+    WAITLISTED = "waitlisted"
+    CANCELLED = "cancelled"
+    STATUS_CHOICES = (
+        (ENROLLED, "Записан"),
+        (WAITLISTED, "В листе ожидания"),
+        (CANCELLED, "Отменена"),
+    )
+
+    service_card_group = models.ForeignKey(
+        ServiceCardGroup,
+        on_delete=models.CASCADE,
+        related_name="enrollments",
+        db_index=False,
+        verbose_name="Групповое занятие",
+    )
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name="enrollments",
+        verbose_name="Ученик",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=WAITLISTED,
+        verbose_name="Статус",
+    )
+    created = models.DateTimeField("Дата создания", auto_now_add=True)
+    reminded_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Напоминание отправлено"
+    )
+
+    class Meta:
+        verbose_name = "Запись на занятие"
+        verbose_name_plural = "Записи на занятия"
+        ordering = ["created"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["service_card_group", "student"],
+                name="unique_group_enrollment",
+            ),
+        ]
+        indexes = [
+            # Очередь листа ожидания по занятию
+            models.Index(
+                fields=["service_card_group", "status", "created"],
+                name="enrollment_queue_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student} — {self.service_card_group}"
+
+
+@receiver(post_save, sender=Enrollment)
+def invalidate_enrollment_profile(sender, instance, **kwargs):
+    invalidate_profiles_on_commit(owner_user_id(instance, "student"))
+
+
+class Recommendation(models.Model):
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name="recommendations",
+        db_index=False,
+        verbose_name="Ученик",
+    )
+    specialist = models.ForeignKey(
+        Specialist,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Репетитор",
+    )
+    score = models.FloatField(verbose_name="Оценка схожести")
+    rank = models.PositiveSmallIntegerField(verbose_name="Позиция")
+
+    class Meta:
+        verbose_name = "Рекомендация"
+        verbose_name_plural = "Рекомендации"
+        ordering = ["rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "rank"], name="unique_recommendation_rank"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.specialist} для {self.student}"
+
+
+class SpecialistDailyStats(models.Model):
+    """Дневные итоги репетитора для дашборда, считаются core.rollups"""
+
+    specialist = models.ForeignKey(
+        Specialist,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+        db_index=False,
+        verbose_name="Репетитор",
+    )
+    day = models.DateField(verbose_name="День")
+    completed_individual = models.PositiveIntegerField(default=0)
+    completed_group = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Выручка"
+    )
+    reviews = models.PositiveIntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = "Статистика за день"
+        verbose_name_plural = "Статистика по дням"
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["specialist", "day"], name="unique_specialist_day"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.specialist} за {self.day}"
+
+
+class ArchivedServiceCard(models.Model):
+    INDIVIDUAL = "individual"
+    GROUP = "group"
+    KIND_CHOICES = (
+        (INDIVIDUAL, "Индивидуальное занятие"),
+        (GROUP, "Групповое занятие"),
+    )
+
+    kind = models.CharField(
+        max_length=20, choices=KIND_CHOICES, verbose_name="Тип"
+    )
+    original_id = models.BigIntegerField(verbose_name="ID карточки")
+    name = models.CharField(max_length=100, verbose_name="Название")
+    image = models.ImageField(upload_to="service_card", verbose_name="Картинка")
+    description = models.TextField(verbose_name="Описание")
+    date = models.DateTimeField(null=True, blank=True, verbose_name="Дата")
+    specialist = models.ForeignKey(
+        Specialist,
+        on_delete=models.CASCADE,
+        related_name="archived_cards",
+        db_index=False,
+        verbose_name="Репетитор",
+    )
+    price = models.DecimalField(
+        max_digits=8, decimal_places=2, verbose_name="Цена"
+    )
+    completed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Дата завершения"
+    )
+    # id учеников, записанных на групповое занятие
+    participants = models.JSONField(default=list, verbose_name="Участники")
+    archived_at = models.DateTimeField("Дата архивации", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Архивное занятие"
+        verbose_name_plural = "Архивные занятия"
+        ordering = ["-completed_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "original_id"], name="unique_archived_card"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["specialist", "completed_at"],
+                name="archived_card_specialist_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedReview(models.Model):
+    card = models.ForeignKey(
+        ArchivedServiceCard,
+        on_delete=models.CASCADE,
+        related_name="reviews",
+        verbose_name="Архивное занятие",
+    )
+    original_id = models.BigIntegerField(verbose_name="ID отзыва")
+    rating = models.FloatField()
+    completed_by = models.ForeignKey(
+        Student, on_delete=models.CASCADE, verbose_name="Прошедший курс"
+    )
+    # Дата исходного отзыва, пустая у записей, перенесенных до ее появления
+    created = models.DateTimeField(
+        "Дата создания", null=True, blank=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = "Архивный отзыв"
+        verbose_name_plural = "Архивные отзывы"
+
+    def __str__(self):
+        return f"Отзыв для {self.card} от {self.completed_by}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Задача Celery, записанная в той же транзакции, что и изменение данных.
+    В брокер ее отправляет core.outbox.relay_outbox.
+    """
+
+    task = models.CharField(max_length=255, verbose_name="Задача")
+    args = models.JSONField(default=list, verbose_name="Аргументы")
+    kwargs = models.JSONField(
+        default=dict, verbose_name="Именованные аргументы"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    # Событие, которое нельзя отправить (например, не сериализуется),
+    # не повторяется: его разбирают вручную по last_error
+    failed_at = models.DateTimeField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Событие outbox"
+        verbose_name_plural = "События outbox"
+        indexes = [
+            # Очередь неотправленных событий остается маленькой
+            models.Index(
+                fields=["available_at", "id"],
+                name="outbox_pending_idx",
+                condition=models.Q(
+                    dispatched_at__isnull=True, failed_at__isnull=True
+                ),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk}"
+
+
+class CatalogEntry(models.Model):
+    """
+    Плоская копия карточки для списков каталога: имя и рейтинг репетитора
+    хранятся здесь, чтобы фильтры и сортировка обходились без JOIN.
+    Синхронизируется сигналами, пересобирается командой rebuild_catalog.
+    """
+
+    INDIVIDUAL = "individual"
+    GROUP = "group"
+    KIND_CHOICES = (
+        (INDIVIDUAL, "Индивидуальное занятие"),
+        (GROUP, "Групповое занятие"),
+    )
+
+    kind = models.CharField(
+        max_length=20, choices=KIND_CHOICES, verbose_name="Тип"
+    )
+    card_id = models.BigIntegerField(verbose_name="ID карточки")
+    name = models.CharField(max_length=100, verbose_name="Название")
+    image = models.ImageField(upload_to="service_card", verbose_name="Картинка")
+    price = models.DecimalField(
+        max_digits=8, decimal_places=2, verbose_name="Цена"
+    )
+    date = models.DateTimeField(null=True, blank=True, verbose_name="Дата")
+    completed = models.BooleanField(default=False, verbose_name="Завершен")
+    specialist = models.ForeignKey(
+        Specialist,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Репетитор",
+    )
+    specialist_name = models.CharField(
+        max_length=150, blank=True, verbose_name="Имя репетитора"
+    )
+    rating = models.FloatField(default=0, verbose_name="Рейтинг")
+
+    class Meta:
+        verbose_name = "Карточка каталога"
+        verbose_name_plural = "Каталог"
+        ordering = ["-rating", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "card_id"], name="unique_catalog_card"
+            ),
+        ]
+        # Ключи индексов повторяют сортировки и фильтры каталога. В INCLUDE
+        # лежат остальные колонки краткого списка (?fields=kind,card_id,
+        # price,rating), и на PostgreSQL он читается только из индекса
+        indexes = [
+            # Сортировка по умолчанию и фильтр min_rating
+            models.Index(
+                fields=["-rating", "id"],
+                include=["kind", "card_id", "price", "completed"],
+                name="catalog_rating_idx",
+            ),
+            models.Index(
+                fields=["completed", "-rating", "id"],
+                include=["kind", "card_id", "price"],
+                name="catalog_completed_idx",
+            ),
+            # ?ordering=price и фильтр max_price
+            models.Index(
+                fields=["price", "id"],
+                include=["kind", "card_id", "rating", "completed"],
+                name="catalog_price_idx",
+            ),
+            models.Index(
+                fields=["kind", "date"],
+                include=["id", "card_id", "price", "rating"],
+                condition=models.Q(completed=False),
+                name="catalog_upcoming_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,100 @@
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from .models import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+# Сбои брокера: событие отправится при следующей попытке
+PUBLISH_ERRORS = (OperationalError, OSError)
+
+
+def enqueue(task, *args, **kwargs):
+    """
+    Запись задачи в outbox вместо отправки в брокер.
+    Вызывается внутри транзакции, которая меняет данные: событие
+    сохранится или откатится вместе с ними.
+    """
+    return OutboxEvent.objects.create(task=task.name, args=args, kwargs=kwargs)
+
+
+def relay_outbox(batch_size=None):
+    """
+    Отправка пачки событий в Celery через одно соединение с брокером.
+    Возвращает количество отправленных событий.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        # Несколько ретрансляторов разбирают разные пачки
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(
+                dispatched_at__isnull=True,
+                failed_at__isnull=True,
+                available_at__lte=now,
+            )
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        sent, failed = [], {}
+        error = None
+        try:
+            with current_app.producer_or_acquire() as producer:
+                for event in events:
+                    try:
+                        current_app.send_task(
+                            event.task,
+                            args=event.args,
+                            kwargs=event.kwargs,
+                            # Повторная отправка после сбоя получит тот же id
+                            task_id=f"outbox-{event.pk}",
+                            producer=producer,
+                            retry=False,
+                        )
+                    except PUBLISH_ERRORS:
+                        raise
+                    except Exception as e:
+                        # Ошибка в самом событии: повтор не поможет
+                        logger.exception("Outbox event %s failed", event.pk)
+                        failed[event.pk] = repr(e)
+                    else:
+                        sent.append(event.pk)
+        except PUBLISH_ERRORS as e:
+            # Брокер недоступен: оставшиеся события ждут следующей попытки
+            error = e
+            logger.warning(
+                "Outbox relay stopped after %d events: %s", len(sent), e
+            )
+
+        OutboxEvent.objects.filter(pk__in=sent).update(dispatched_at=now)
+        for pk, message in failed.items():
+            OutboxEvent.objects.filter(pk=pk).update(
+                attempts=F("attempts") + 1, last_error=message, failed_at=now
+            )
+        if error is not None:
+            handled = set(sent) | set(failed)
+            OutboxEvent.objects.filter(
+                pk__in=[event.pk for event in events if event.pk not in handled]
+            ).update(
+                attempts=F("attempts") + 1,
+                last_error=str(error),
+                available_at=now
+                + timedelta(seconds=settings.OUTBOX_RETRY_DELAY),
+            )
+    return len(sent)
+
+
+def purge_outbox(before):
+    """Удаление давно отправленных событий"""
+    return OutboxEvent.objects.filter(dispatched_at__lt=before).delete()[0]
@@ -0,0 +1,237 @@
+import logging
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+# Ошибки, после которых запрос имеет смысл повторить
+RETRYABLE_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.RateLimitError,
+    stripe.error.APIError,
+)
+
+
+class PaymentGatewayError(Exception):
+    pass
+
+
+class PaymentDeclined(PaymentGatewayError):
+    pass
+
+
+class ProviderUnavailable(PaymentGatewayError):
+    pass
+
+
+class StripeProvider:
+    """Stripe с общим пулом соединений и жесткими таймаутами"""
+
+    def __init__(self, timeout, pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+        )
+        session.mount("https://", adapter)
+        stripe.default_http_client = stripe.http_client.RequestsClient(
+            timeout=timeout, session=session
+        )
+        # Повторы делает PaymentGateway, библиотека не должна их множить
+        stripe.max_network_retries = 0
+
+    def create_intent(self, **params):
+        return stripe.PaymentIntent.create(**params)
+
+
+class StubProvider:
+    """Локальная заглушка Stripe для разработки без сети"""
+
+    def create_intent(self, amount, currency, **params):
+        return SimpleNamespace(
+            id=f"pi_stub_{uuid.uuid4().hex[:24]}",
+            status="succeeded",
+            amount=amount,
+            currency=currency,
+        )
+
+
+class FakeProvider(StubProvider):
+    """Имитация медленного и нестабильного провайдера для тестов"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, timeout=None, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.timeout = timeout
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def create_intent(self, **params):
+        self.calls += 1
+        if self.timeout is not None and self.latency > self.timeout:
+            time.sleep(self.timeout)
+            raise stripe.error.APIConnectionError("Request timed out")
+        time.sleep(self.latency)
+        if self._random.random() < self.failure_rate:
+            raise stripe.error.APIError("Provider is unavailable")
+        return super().create_intent(**params)
+
+
+class CircuitBreaker:
+    """
+    После failure_threshold ошибок подряд перестает пускать запросы
+    к провайдеру на reset_timeout секунд, затем пропускает один пробный.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                return True
+            # Пробный запрос уже выполняется
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if (
+                self.state == self.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class PaymentGateway:
+    def __init__(self, provider, breaker, max_retries=2, backoff=0.5):
+        self.provider = provider
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def create_intent(self, **params):
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                metrics.incr("payments.short_circuited")
+                raise ProviderUnavailable("Платежный сервис недоступен")
+
+            started = time.monotonic()
+            metrics.incr("payments.requests")
+            try:
+                intent = self.provider.create_intent(**params)
+            except RETRYABLE_ERRORS as e:
+                metrics.observe("payments.latency", time.monotonic() - started)
+                metrics.incr("payments.errors")
+                self.breaker.record_failure()
+                logger.warning(
+                    "Payment provider error (attempt %s): %s", attempt + 1, e
+                )
+                if attempt < self.max_retries:
+                    metrics.incr("payments.retries")
+                    time.sleep(self._delay(attempt))
+                continue
+            except stripe.error.StripeError as e:
+                # Провайдер ответил, значит он работает: это отказ по платежу
+                metrics.observe("payments.latency", time.monotonic() - started)
+                metrics.incr("payments.declined")
+                self.breaker.record_success()
+                raise PaymentDeclined(str(e)) from e
+            except Exception:
+                self.breaker.record_failure()
+                raise
+
+            metrics.observe("payments.latency", time.monotonic() - started)
+            self.breaker.record_success()
+            return intent
+
+        raise ProviderUnavailable("Платежный сервис не отвечает")
+
+    def _delay(self, attempt):
+        # Экспоненциальная задержка с полным джиттером
+        return random.uniform(0, self.backoff * 2**attempt)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = build_gateway()
+    return _gateway
+
+
+def build_gateway(provider=None):
+    if provider is None:
+        if settings.STRIPE_STUB:
+            provider = StubProvider()
+        else:
+            provider = StripeProvider(
+                timeout=(
+                    settings.PAYMENT_CONNECT_TIMEOUT,
+                    settings.PAYMENT_READ_TIMEOUT,
+                ),
+                pool_size=settings.PAYMENT_POOL_SIZE,
+            )
+    return PaymentGateway(
+        provider,
+        CircuitBreaker(
+            failure_threshold=settings.PAYMENT_BREAKER_THRESHOLD,
+            reset_timeout=settings.PAYMENT_BREAKER_RESET_TIMEOUT,
+        ),
+        max_retries=settings.PAYMENT_MAX_RETRIES,
+        backoff=settings.PAYMENT_RETRY_BACKOFF,
+    )
+
+
+def to_minor_units(amount):
+    # Stripe принимает сумму в минимальных единицах валюты (центы, тыйыны)
+    return int((amount * 100).to_integral_value())
+
+
+def create_payment_intent(payment):
+    return get_gateway().create_intent(
+        amount=to_minor_units(payment.amount),
+        currency=payment.currency,
+        description=payment.description,
+        payment_method=payment.payment_method,
+        confirm=True,
+        # Повторы и повторная доставка задачи не создадут второй платеж
+        idempotency_key=f"payment-{payment.pk}",
+    )
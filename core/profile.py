@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .caching import CACHE_ERRORS, profile_key
+from .managers import STUDENT, TUTOR
+from .models import (
+    Account,
+    ArchivedReview,
+    ArchivedServiceCard,
+    Enrollment,
+    ReviewGroup,
+    ReviewIndividual,
+    ServiceCardGroup,
+    ServiceCardIndividual,
+)
+
+
+def _count(queryset, field, outer):
+    """Скалярный подзапрос: число строк queryset, где field = outer"""
+    rows = (
+        queryset.filter(**{field: OuterRef(outer)})
+        .order_by()
+        .values(field)
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def _specialist_counts():
+    outer = "specialist__pk"
+    return {
+        "cards_individual": _count(
+            ServiceCardIndividual.objects.all(), "specialist", outer
+        ),
+        "cards_group": _count(
+            ServiceCardGroup.objects.all(), "specialist", outer
+        ),
+        "completed_individual": _count(
+            ServiceCardIndividual.objects.filter(completed=True),
+            "specialist",
+            outer,
+        ),
+        "completed_group": _count(
+            ServiceCardGroup.objects.filter(completed=True), "specialist", outer
+        ),
+        "completed_archived": _count(
+            ArchivedServiceCard.objects.all(), "specialist", outer
+        ),
+        "reviews_individual": _count(
+            ReviewIndividual.objects.all(), "service_card__specialist", outer
+        ),
+        "reviews_group": _count(
+            ReviewGroup.objects.all(), "service_card_group__specialist", outer
+        ),
+        "reviews_archived": _count(
+            ArchivedReview.objects.all(), "card__specialist", outer
+        ),
+    }
+
+
+def _student_counts():
+    outer = "student__pk"
+    enrolled = Enrollment.objects.filter(status=Enrollment.ENROLLED)
+    return {
+        "cards_group": _count(enrolled, "student", outer),
+        "completed_group": _count(
+            enrolled.filter(service_card_group__completed=True),
+            "student",
+            outer,
+        ),
+        "reviews_individual": _count(
+            ReviewIndividual.objects.all(), "completed_by", outer
+        ),
+        "reviews_group": _count(
+            ReviewGroup.objects.all(), "completed_by", outer
+        ),
+        "reviews_archived": _count(
+            ArchivedReview.objects.all(), "completed_by", outer
+        ),
+    }
+
+
+def _stats(account, profile, counts):
+    def total(prefix):
+        return sum(
+            getattr(account, name) for name in counts if name.startswith(prefix)
+        )
+
+    return {
+        "cards": total("cards_"),
+        "completed_courses": total("completed_"),
+        "reviews": total("reviews_"),
+        # У ученика нет собственного рейтинга
+        "rating": getattr(profile, "rating", None),
+    }
+
+
+def load_profile(user):
+    """
+    Аккаунт, профиль и счетчики одним запросом: профиль присоединяется
+    через select_related, счетчики считаются подзапросами. Роль берется
+    из user_type, который при JWT-аутентификации уже есть в токене.
+    """
+    queryset = Account.objects.filter(pk=user.pk)
+    if user.user_type == TUTOR:
+        profile_field, counts = "specialist", _specialist_counts()
+    elif user.user_type == STUDENT:
+        profile_field, counts = "student", _student_counts()
+    else:
+        return {"account": queryset.get(), "profile": None, "stats": None}
+
+    account = queryset.select_related(profile_field).annotate(**counts).get()
+    profile = getattr(account, profile_field, None)
+    if profile is None:
+        # Профиль еще не заполнен
+        return {"account": account, "profile": None, "stats": None}
+    return {
+        "account": account,
+        "profile": profile,
+        "stats": _stats(account, profile, counts),
+    }
+
+
+def cached_profile(user, render):
+    """
+    Готовый ответ /me/ из кэша. render превращает результат load_profile в
+    данные ответа; кэш сбрасывается сигналами из core.models.
+    Если кэш недоступен, профиль собирается из базы.
+    """
+    key = profile_key(user.pk)
+    try:
+        data = cache.get(key)
+    except CACHE_ERRORS:
+        data = None
+    if data is None:
+        data = render(load_profile(user))
+        try:
+            cache.set(key, data, settings.ME_CACHE_TIMEOUT)
+        except CACHE_ERRORS:
+            pass
+    return data
@@ -0,0 +1,67 @@
+from django.db.models import BooleanField, DateTimeField, F, Func, Value
+
+
+class _RangeLookup(Func):
+    """
+    Сравнение интервала [start, end) модели с интервалом [lower, upper).
+    На PostgreSQL компилируется в операцию над tstzrange и использует
+    GiST-индекс по tstzrange("start", "end"), на остальных базах
+    (например, в тестах на SQLite) — в пару обычных сравнений.
+    """
+
+    conditional = True
+    output_field = BooleanField()
+    range_operator = None
+
+    def __init__(self, start, end, lower, upper):
+        super().__init__(
+            F(start),
+            F(end),
+            Value(lower, output_field=DateTimeField()),
+            Value(upper, output_field=DateTimeField()),
+        )
+
+    def _compile(self, compiler):
+        return [
+            compiler.compile(expr) for expr in self.get_source_expressions()
+        ]
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (start, p1), (end, p2), (lower, p3), (upper, p4) = self._compile(
+            compiler
+        )
+        sql = (
+            f"tstzrange({start}, {end}) {self.range_operator} "
+            f"tstzrange({lower}, {upper})"
+        )
+        return sql, (*p1, *p2, *p3, *p4)
+
+
+class Overlaps(_RangeLookup):
+    range_operator = "&&"
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (start, p1), (end, p2), (lower, p3), (upper, p4) = self._compile(
+            compiler
+        )
+        return f"({start} < {upper} AND {end} > {lower})", (
+            *p1,
+            *p4,
+            *p2,
+            *p3,
+        )
+
+
+class Contains(_RangeLookup):
+    range_operator = "@>"
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (start, p1), (end, p2), (lower, p3), (upper, p4) = self._compile(
+            compiler
+        )
+        return f"({start} <= {lower} AND {end} >= {upper})", (
+            *p1,
+            *p3,
+            *p2,
+            *p4,
+        )
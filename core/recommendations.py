@@ -0,0 +1,127 @@
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from .models import (
+    ArchivedReview,
+    ArchivedServiceCard,
+    Enrollment,
+    Recommendation,
+    ReviewGroup,
+    ReviewIndividual,
+)
+
+
+# Вес завершенного группового занятия без отзыва
+COMPLETION_WEIGHT = 1.0
+
+
+def load_interactions():
+    """
+    Пары (ученик, репетитор, вес): оценки из отзывов и пройденные
+    групповые занятия, включая архивные.
+    """
+    individual = ReviewIndividual.objects.values_list(
+        "completed_by_id", "service_card__specialist_id", "rating"
+    )
+    group = ReviewGroup.objects.values_list(
+        "completed_by_id", "service_card_group__specialist_id", "rating"
+    )
+    archived = ArchivedReview.objects.values_list(
+        "completed_by_id", "card__specialist_id", "rating"
+    )
+    completed = Enrollment.objects.filter(
+        status=Enrollment.ENROLLED, service_card_group__completed=True
+    ).values_list("student_id", "service_card_group__specialist_id")
+    archived_groups = ArchivedServiceCard.objects.filter(
+        kind=ArchivedServiceCard.GROUP
+    ).values_list("specialist_id", "participants")
+
+    students, specialists, weights = [], [], []
+    for student_id, specialist_id, rating in (*individual, *group, *archived):
+        students.append(student_id)
+        specialists.append(specialist_id)
+        weights.append(rating)
+    for student_id, specialist_id in completed:
+        students.append(student_id)
+        specialists.append(specialist_id)
+        weights.append(COMPLETION_WEIGHT)
+    for specialist_id, participants in archived_groups:
+        for student_id in participants:
+            students.append(student_id)
+            specialists.append(specialist_id)
+            weights.append(COMPLETION_WEIGHT)
+    return (
+        np.asarray(students, dtype=np.int64),
+        np.asarray(specialists, dtype=np.int64),
+        np.asarray(weights, dtype=np.float64),
+    )
+
+
+def compute_top_k(students, specialists, weights, top_k=10, chunk_size=2000):
+    """
+    Item-based коллаборативная фильтрация: косинусная близость репетиторов
+    по общим ученикам, затем оценка = X @ S. Возвращает словарь
+    {student_id: [(specialist_id, score), ...]} без уже знакомых репетиторов.
+    """
+    if not len(students):
+        return {}
+
+    student_ids, rows = np.unique(students, return_inverse=True)
+    specialist_ids, cols = np.unique(specialists, return_inverse=True)
+    # Повторяющиеся пары суммируются
+    X = sparse.csr_matrix(
+        (weights, (rows, cols)),
+        shape=(len(student_ids), len(specialist_ids)),
+    )
+
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = X @ sparse.diags(1.0 / norms)
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+
+    k = min(top_k, len(specialist_ids))
+    result = {}
+    # Плотная матрица оценок строится порциями, чтобы не держать в памяти
+    # всех учеников сразу
+    for start in range(0, X.shape[0], chunk_size):
+        chunk = X[start : start + chunk_size]
+        scores = (chunk @ similarity).toarray()
+        seen_rows, seen_cols = chunk.nonzero()
+        scores[seen_rows, seen_cols] = 0.0
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for offset in range(chunk.shape[0]):
+            picks = [
+                (int(specialist_ids[col]), float(score))
+                for col, score in zip(top[offset], top_scores[offset])
+                if score > 0
+            ]
+            if picks:
+                result[int(student_ids[start + offset])] = picks
+    return result
+
+
+def rebuild_recommendations(top_k=10):
+    top = compute_top_k(*load_interactions(), top_k=top_k)
+    rows = [
+        Recommendation(
+            student_id=student_id,
+            specialist_id=specialist_id,
+            score=score,
+            rank=rank,
+        )
+        for student_id, picks in top.items()
+        for rank, (specialist_id, score) in enumerate(picks, start=1)
+    ]
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        Recommendation.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
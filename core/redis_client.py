@@ -0,0 +1,19 @@
+import redis
+from django.conf import settings
+
+
+_client = None
+
+
+def get_redis():
+    """Общий клиент Redis процесса или None, если Redis не настроен"""
+    global _client
+    if not settings.REDIS_URL:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
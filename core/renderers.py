@@ -0,0 +1,52 @@
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Datetime и прочие нестандартные типы кодируются так же, как у DRF
+_encoder = JSONEncoder()
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON через orjson, совместимый по формату с JSONRenderer"""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def get_indent(self, accepted_media_type):
+        if accepted_media_type:
+            params = dict(
+                part.strip().split("=", 1)
+                for part in accepted_media_type.split(";")[1:]
+                if "=" in part
+            )
+            return params.get("indent")
+        return None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        options = OPTIONS
+        if self.get_indent(accepted_media_type):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=options)
+
+
+class ORJSONParser(BaseParser):
+    """Разбор JSON-тела запроса через orjson"""
+
+    media_type = "application/json"
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % exc)
@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+
+from redis.exceptions import RedisError
+from rest_framework_simplejwt.settings import api_settings
+
+from .redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = "revoked:{}"
+
+
+class LocalRevocations:
+    """Запасной вариант в памяти процесса, если Redis недоступен"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # jti -> момент, когда токен истекает сам
+        self._expires = {}
+
+    def revoke(self, jti, ttl):
+        now = time.time()
+        with self._lock:
+            if self._expires.get(jti, 0) > now:
+                return False
+            self._expires[jti] = now + ttl
+            if len(self._expires) > 10000:
+                self._expires = {
+                    key: expires
+                    for key, expires in self._expires.items()
+                    if expires > now
+                }
+            return True
+
+    def is_revoked(self, jti):
+        with self._lock:
+            return self._expires.get(jti, 0) > time.time()
+
+
+local_revocations = LocalRevocations()
+
+
+def _ttl(token):
+    return int(token["exp"] - time.time()) + 1
+
+
+def revoke(token):
+    """
+    Отзыв токена до конца его срока одной командой SET NX EX.
+    Возвращает False, если токен уже был отозван: так повторное
+    использование при ротации ловится без отдельной проверки.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    ttl = _ttl(token)
+    if ttl <= 0:
+        return True
+    client = get_redis()
+    if client is not None:
+        try:
+            return bool(client.set(REVOKED_KEY.format(jti), 1, nx=True, ex=ttl))
+        except RedisError:
+            logger.warning("Token %s revoked locally", jti)
+    return local_revocations.revoke(jti, ttl)
+
+
+def is_revoked(token):
+    jti = token[api_settings.JTI_CLAIM]
+    client = get_redis()
+    if client is not None:
+        try:
+            return bool(client.exists(REVOKED_KEY.format(jti)))
+        except RedisError:
+            logger.warning("Revocation of %s checked locally", jti)
+    return local_revocations.is_revoked(jti)
@@ -0,0 +1,169 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    ArchivedReview,
+    ArchivedServiceCard,
+    ReviewGroup,
+    ReviewIndividual,
+    ServiceCardGroup,
+    ServiceCardIndividual,
+    SpecialistDailyStats,
+)
+
+
+def _empty():
+    return {
+        "completed_individual": 0,
+        "completed_group": 0,
+        "revenue": Decimal(0),
+        "reviews": 0,
+        "rating_sum": 0.0,
+    }
+
+
+def _by_day(queryset, date_field, specialist_field, since, **aggregates):
+    if since is not None:
+        queryset = queryset.filter(**{f"{date_field}__gte": since})
+    return (
+        queryset.annotate(day=TruncDate(date_field))
+        .values(specialist_field, "day")
+        .annotate(**aggregates)
+        .values_list(specialist_field, "day", *aggregates)
+        .order_by()
+    )
+
+
+def collect(since=None):
+    """Итоги по (репетитор, день) для событий не раньше since"""
+    stats = defaultdict(_empty)
+
+    completed = ServiceCardIndividual.objects.filter(
+        completed=True, completed_at__isnull=False
+    )
+    for specialist, day, count, revenue in _by_day(
+        completed,
+        "completed_at",
+        "specialist",
+        since,
+        count=Count("id"),
+        revenue=Sum("price"),
+    ):
+        stats[specialist, day]["completed_individual"] += count
+        stats[specialist, day]["revenue"] += revenue
+
+    completed = ServiceCardGroup.objects.filter(
+        completed=True, completed_at__isnull=False
+    )
+    for specialist, day, count, revenue in _by_day(
+        completed,
+        "completed_at",
+        "specialist",
+        since,
+        count=Count("id"),
+        revenue=Sum(F("price") * F("seats_taken")),
+    ):
+        stats[specialist, day]["completed_group"] += count
+        stats[specialist, day]["revenue"] += revenue
+
+    # Поздний отзыв мог уйти в архив вместе с карточкой внутри окна
+    # пересчета, поэтому архивные отзывы учитываются всегда
+    for queryset, specialist_field in (
+        (ReviewIndividual.objects.all(), "service_card__specialist"),
+        (ReviewGroup.objects.all(), "service_card_group__specialist"),
+        (
+            ArchivedReview.objects.filter(created__isnull=False),
+            "card__specialist",
+        ),
+    ):
+        for specialist, day, count, total in _by_day(
+            queryset,
+            "created",
+            specialist_field,
+            since,
+            count=Count("id"),
+            total=Sum("rating"),
+        ):
+            stats[specialist, day]["reviews"] += count
+            stats[specialist, day]["rating_sum"] += total
+
+    # Архив хранит только давние занятия, он нужен лишь при полном пересчете
+    archive_cutoff = timezone.now() - timedelta(
+        days=settings.ARCHIVE_RETENTION_DAYS
+    )
+    if since is None or since < archive_cutoff:
+        archived = ArchivedServiceCard.objects.filter(
+            completed_at__isnull=False
+        )
+        if since is not None:
+            archived = archived.filter(completed_at__gte=since)
+        for (
+            specialist,
+            kind,
+            price,
+            completed_at,
+            participants,
+        ) in archived.values_list(
+            "specialist", "kind", "price", "completed_at", "participants"
+        ).iterator():
+            row = stats[specialist, timezone.localdate(completed_at)]
+            if kind == ArchivedServiceCard.GROUP:
+                row["completed_group"] += 1
+                row["revenue"] += price * len(participants)
+            else:
+                row["completed_individual"] += 1
+                row["revenue"] += price
+    return stats
+
+
+def rollup_specialist_stats():
+    """
+    Пересчитывает только дни, в которых могли появиться новые данные:
+    с последнего посчитанного дня с запасом на поздние коммиты.
+    При первом запуске считается вся история.
+    """
+    last_day = SpecialistDailyStats.objects.aggregate(last=Max("day"))["last"]
+    since_day = since = None
+    if last_day is not None:
+        since_day = last_day - timedelta(days=settings.ROLLUP_LOOKBACK_DAYS)
+        since = timezone.make_aware(datetime.combine(since_day, time.min))
+
+    rows = [
+        SpecialistDailyStats(specialist_id=specialist, day=day, **values)
+        for (specialist, day), values in collect(since).items()
+    ]
+    with transaction.atomic():
+        stale = SpecialistDailyStats.objects.all()
+        if since_day is not None:
+            stale = stale.filter(day__gte=since_day)
+        stale.delete()
+        SpecialistDailyStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def dashboard(specialist, days):
+    """Дневные строки за период и рейтинг на конец каждого дня"""
+    start = timezone.localdate() - timedelta(days=days - 1)
+    stats = specialist.daily_stats.all()
+    before = stats.filter(day__lt=start).aggregate(
+        reviews=Sum("reviews"), rating_sum=Sum("rating_sum")
+    )
+    reviews = before["reviews"] or 0
+    rating_sum = before["rating_sum"] or 0.0
+
+    rows = list(stats.filter(day__gte=start))
+    totals = _empty()
+    for row in rows:
+        reviews += row.reviews
+        rating_sum += row.rating_sum
+        row.rating = min(rating_sum / reviews, 5) if reviews else None
+        for name in totals:
+            totals[name] += getattr(row, name)
+    return rows, totals
@@ -7,12 +7,50 @@ from .models import (
     ReviewIndividual,
     ReviewGroup,
     Account,
+    Payment,
+    Availability,
+    Booking,
+    Enrollment,
+    Recommendation,
+    ArchivedServiceCard,
+    ArchivedReview,
+    SpecialistDailyStats,
+    CatalogEntry,
 )
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework.permissions import SAFE_METHODS
+from .mixins import requested_fields
+from .revocation import is_revoked, revoke
+from .authentication import TOKEN_USER_CLAIMS
+
+
+class SparseFieldsetSerializerMixin:
+    """При чтении оставляет только поля из ?fields= и убирает ?exclude="""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        fields, exclude = requested_fields(request)
+        unknown = (fields | exclude) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {
+                    "fields": f"Неизвестные поля: {', '.join(sorted(unknown))}."
+                    f" Доступны: {', '.join(self.fields)}."
+                }
+            )
+        for name in list(self.fields):
+            if (fields and name not in fields) or name in exclude:
+                self.fields.pop(name)
 
 
 class AccountSerializer(serializers.ModelSerializer):
@@ -89,12 +127,8 @@ class LoginUserSerializer(serializers.ModelSerializer):
         fields = ("email", "password", "tokens")
 
     def get_tokens(self, instance):
-        user = Account.objects.get(email=instance["email"])
-        return {
-            "refresh": user.tokens()["refresh"],
-            "access": user.tokens()["access"],
-        }
-    
+        # Одна пара токенов: refresh и access из одного вызова
+        return instance["tokens"]()
 
     def validate(self, data):
         email = data["email"]
@@ -110,27 +144,77 @@ class LoginUserSerializer(serializers.ModelSerializer):
 
         return {"email": user.email, "tokens": user.tokens}
 
-class LogoutUserSerializer(serializers.ModelSerializer):
-    detail = serializers.CharField(default="Пользователь успешно вышел из системы.")
+class LogoutUserSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
 
-    class Meta:
-        model = Account
-        fields = ['detail']
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError:
+            raise serializers.ValidationError("Токен недействителен или истек.")
+        user = self.context["request"].user
+        if token[jwt_settings.USER_ID_CLAIM] != user.pk:
+            raise serializers.ValidationError(
+                "Токен выдан другому пользователю."
+            )
+        return token
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление токенов с проверкой отзыва по jti в core.revocation"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if (
+            jwt_settings.ROTATE_REFRESH_TOKENS
+            and jwt_settings.BLACKLIST_AFTER_ROTATION
+        ):
+            # Проверка и отзыв старого токена одной командой
+            if not revoke(refresh):
+                raise TokenError("Token is blacklisted")
+        elif is_revoked(refresh):
+            raise TokenError("Token is blacklisted")
+
+        # Поля аккаунта в токене обновляются при каждой ротации
+        user = (
+            Account.objects.filter(pk=refresh[jwt_settings.USER_ID_CLAIM])
+            .values(*TOKEN_USER_CLAIMS)
+            .first()
+        )
+        if user is None or not user["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        for claim, value in user.items():
+            refresh[claim] = value
+
+        data = {"access": str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
 
 
-class SpecialistSerializer(serializers.ModelSerializer):
+class SpecialistSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Specialist
         fields = "__all__"
+        read_only_fields = ("view_count",)
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Student
         fields = "__all__"
 
 
-class ServiceCardIndividualSerializer(serializers.ModelSerializer):
+class ServiceCardIndividualSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     specialist_name = serializers.CharField(
         source="specialist.user.last_name", read_only=True
     )
@@ -148,10 +232,14 @@ class ServiceCardIndividualSerializer(serializers.ModelSerializer):
             "completed",
             "completed_by",
             "rating",
+            "view_count",
         )
+        read_only_fields = ("view_count",)
 
 
-class ServiceCardGroupSerializer(serializers.ModelSerializer):
+class ServiceCardGroupSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     specialist_name = serializers.CharField(
         source="specialist.user.last_name", read_only=True
     )
@@ -169,13 +257,27 @@ class ServiceCardGroupSerializer(serializers.ModelSerializer):
             "price",
             "completed",
             "completed_by",
+            "capacity",
+            "seats_taken",
+            "view_count",
         )
+        read_only_fields = ("seats_taken", "view_count")
+
+    def validate_capacity(self, value):
+        if self.instance and value < self.instance.seats_taken:
+            raise serializers.ValidationError(
+                "Мест не может быть меньше, чем уже записано учеников."
+            )
+        return value
 
 
 class ReviewIndividualSerializer(serializers.ModelSerializer):
     completed_by = serializers.PrimaryKeyRelatedField(
         queryset=Student.objects.all(), required=True
     )
+    student_name = serializers.StringRelatedField(
+        source="completed_by", read_only=True
+    )
 
     class Meta:
         model = ReviewIndividual
@@ -184,6 +286,7 @@ class ReviewIndividualSerializer(serializers.ModelSerializer):
             "service_card",
             "rating",
             "completed_by",
+            "student_name",
         )
 
 
@@ -191,6 +294,9 @@ class ReviewGroupSerializer(serializers.ModelSerializer):
     completed_by = serializers.PrimaryKeyRelatedField(
         queryset=Student.objects.all(), required=True
     )
+    student_name = serializers.StringRelatedField(
+        source="completed_by", read_only=True
+    )
 
     class Meta:
         model = ReviewGroup
@@ -199,6 +305,7 @@ class ReviewGroupSerializer(serializers.ModelSerializer):
             "service_card_group",
             "rating",
             "completed_by",
+            "student_name",
         )
 
 
@@ -217,3 +324,191 @@ class PaymentSerializer(serializers.Serializer):
         if value.lower() not in supported_currencies:
             raise serializers.ValidationError("Неподдерживаемая валюта. Допустимы: USD, EUR, KGS")
         return value.lower()
+
+
+class PaymentStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = (
+            "id",
+            "amount",
+            "currency",
+            "description",
+            "status",
+            "error",
+            "created",
+            "updated",
+        )
+
+
+class TimeRangeSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, data):
+        # При частичном обновлении недостающая граница берется из объекта
+        instance = getattr(self, "instance", None)
+        start = data.get("start", getattr(instance, "start", None))
+        end = data.get("end", getattr(instance, "end", None))
+        if end <= start:
+            raise serializers.ValidationError(
+                {"end": "Конец интервала должен быть позже начала."}
+            )
+        return data
+
+
+class AvailabilitySerializer(TimeRangeSerializer, serializers.ModelSerializer):
+    class Meta:
+        model = Availability
+        fields = ("id", "specialist", "start", "end")
+
+
+class BookingSerializer(TimeRangeSerializer, serializers.ModelSerializer):
+    class Meta:
+        model = Booking
+        fields = (
+            "id",
+            "specialist",
+            "student",
+            "service_card",
+            "start",
+            "end",
+            "created",
+        )
+
+    def validate(self, data):
+        data = super().validate(data)
+        instance = getattr(self, "instance", None)
+        card = data.get("service_card", getattr(instance, "service_card", None))
+        specialist = data.get(
+            "specialist", getattr(instance, "specialist", None)
+        )
+        if card is not None and card.specialist_id != specialist.pk:
+            raise serializers.ValidationError(
+                {"service_card": "Курс ведет другой репетитор."}
+            )
+        return data
+
+
+class EnrollmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Enrollment
+        fields = ("id", "service_card_group", "student", "status", "created")
+        read_only_fields = ("status", "created")
+
+
+class RecommendationSerializer(serializers.ModelSerializer):
+    specialist_name = serializers.StringRelatedField(
+        source="specialist", read_only=True
+    )
+    rating = serializers.FloatField(source="specialist.rating", read_only=True)
+
+    class Meta:
+        model = Recommendation
+        fields = ("specialist", "specialist_name", "rating", "score", "rank")
+
+
+class ArchivedReviewSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedReview
+        fields = ("id", "original_id", "rating", "completed_by")
+
+
+class ArchivedServiceCardSerializer(serializers.ModelSerializer):
+    reviews = ArchivedReviewSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedServiceCard
+        fields = (
+            "id",
+            "kind",
+            "original_id",
+            "name",
+            "image",
+            "description",
+            "date",
+            "specialist",
+            "price",
+            "completed_at",
+            "participants",
+            "archived_at",
+            "reviews",
+        )
+
+
+class SpecialistDailyStatsSerializer(serializers.ModelSerializer):
+    # Средняя оценка по всем отзывам на конец дня
+    rating = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = SpecialistDailyStats
+        fields = (
+            "day",
+            "completed_individual",
+            "completed_group",
+            "revenue",
+            "reviews",
+            "rating",
+        )
+
+
+class SpecialistStatsTotalsSerializer(serializers.Serializer):
+    completed_individual = serializers.IntegerField()
+    completed_group = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    reviews = serializers.IntegerField()
+
+
+class CatalogEntrySerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    class Meta:
+        model = CatalogEntry
+        fields = (
+            "kind",
+            "card_id",
+            "name",
+            "image",
+            "price",
+            "date",
+            "completed",
+            "specialist",
+            "specialist_name",
+            "rating",
+        )
+
+
+class ProfileAccountSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Account
+        fields = (
+            "id",
+            "email",
+            "first_name",
+            "last_name",
+            "user_type",
+            "is_staff",
+        )
+
+
+class ProfileStatsSerializer(serializers.Serializer):
+    cards = serializers.IntegerField()
+    completed_courses = serializers.IntegerField()
+    reviews = serializers.IntegerField()
+    rating = serializers.FloatField(allow_null=True)
+
+
+class ProfileSerializer(serializers.Serializer):
+    """Текущий пользователь: аккаунт, профиль репетитора или ученика и итоги"""
+
+    account = ProfileAccountSerializer()
+    profile = serializers.SerializerMethodField()
+    stats = ProfileStatsSerializer(allow_null=True)
+
+    def get_profile(self, instance):
+        profile = instance["profile"]
+        if profile is None:
+            return None
+        if isinstance(profile, Specialist):
+            return SpecialistSerializer(profile).data
+        return StudentSerializer(profile).data
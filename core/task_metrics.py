@@ -0,0 +1,108 @@
+import logging
+import time
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from .metrics import metrics
+from .redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# Время постановки в очередь передается в заголовке сообщения
+SENT_AT_HEADER = "sent_at"
+TASK_NAMES_KEY = "task_metrics:names"
+TASK_METRICS_KEY = "task_metrics:{}"
+COUNTERS = ("started", "succeeded", "failed", "retried")
+TIMINGS = ("wait", "runtime")
+
+
+def record(task_name, counter=None, **timings):
+    """
+    Учет одного события задачи.
+    Счетчики копятся в Redis, чтобы видеть сумму по всем воркерам,
+    и в памяти процесса на случай, если Redis недоступен.
+    """
+    if counter:
+        metrics.incr(f"tasks.{task_name}.{counter}")
+    for name, seconds in timings.items():
+        metrics.observe(f"tasks.{task_name}.{name}", seconds)
+
+    client = get_redis()
+    if client is None:
+        return
+    key = TASK_METRICS_KEY.format(task_name)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.sadd(TASK_NAMES_KEY, task_name)
+        if counter:
+            pipe.hincrby(key, counter, 1)
+        for name, seconds in timings.items():
+            pipe.hincrby(key, f"{name}_count", 1)
+            pipe.hincrbyfloat(key, f"{name}_total", seconds)
+        pipe.execute()
+    except RedisError:
+        logger.warning("Task metrics for %s were not exported", task_name)
+
+
+def _summary(values):
+    summary = {name: int(values.get(name, 0)) for name in COUNTERS}
+    finished = summary["succeeded"] + summary["failed"]
+    summary["failure_rate"] = summary["failed"] / finished if finished else 0.0
+    for name in TIMINGS:
+        count = int(values.get(f"{name}_count", 0))
+        total = float(values.get(f"{name}_total", 0.0))
+        summary[f"avg_{name}"] = total / count if count else 0.0
+    return summary
+
+
+def _local_values():
+    snapshot = metrics.snapshot()
+    values = {}
+    for name, value in snapshot["counters"].items():
+        if name.startswith("tasks."):
+            task_name, counter = name[6:].rsplit(".", 1)
+            values.setdefault(task_name, {})[counter] = value
+    for name, timing in snapshot["timings"].items():
+        if name.startswith("tasks."):
+            task_name, timing_name = name[6:].rsplit(".", 1)
+            task_values = values.setdefault(task_name, {})
+            task_values[f"{timing_name}_count"] = timing["count"]
+            task_values[f"{timing_name}_total"] = (
+                timing["avg"] * timing["count"]
+            )
+    return values
+
+
+def task_metrics():
+    """Очередь, время выполнения и доля ошибок по каждой задаче"""
+    client = get_redis()
+    if client is None:
+        values = _local_values()
+    else:
+        try:
+            names = sorted(n.decode() for n in client.smembers(TASK_NAMES_KEY))
+            pipe = client.pipeline(transaction=False)
+            for name in names:
+                pipe.hgetall(TASK_METRICS_KEY.format(name))
+            values = {
+                name: {k.decode(): v.decode() for k, v in raw.items()}
+                for name, raw in zip(names, pipe.execute())
+            }
+        except RedisError:
+            values = _local_values()
+    return {name: _summary(values[name]) for name in sorted(values)}
+
+
+def queue_wait(request):
+    """Сколько задача ждала в очереди, без учета countdown/eta"""
+    sent_at = getattr(request, SENT_AT_HEADER, None)
+    if sent_at is None:
+        return None
+    ready_at = float(sent_at)
+    if request.eta:
+        ready_at = max(
+            ready_at, datetime.fromisoformat(request.eta).timestamp()
+        )
+    return max(0.0, time.time() - ready_at)
@@ -1,6 +1,56 @@
+import time
+from datetime import timedelta
+from smtplib import SMTPException
 from celery import shared_task
-from django.core.mail import send_mail
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.core.mail import EmailMessage, get_connection, send_mail
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Account, Enrollment, Payment
+from .archive import archive_completed_cards
+from .recommendations import rebuild_recommendations
+from .task_metrics import SENT_AT_HEADER, queue_wait, record
+from .outbox import enqueue, purge_outbox
+from .view_counters import flush_views
+from .rollups import rollup_specialist_stats
+from .payments import (
+    PaymentDeclined,
+    ProviderUnavailable,
+    create_payment_intent,
+)
+
+
+FINISHED_STATES = {
+    "SUCCESS": "succeeded",
+    "FAILURE": "failed",
+    "RETRY": "retried",
+}
+
+
+@before_task_publish.connect
+def stamp_sent_at(headers=None, **kwargs):
+    headers[SENT_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    # Время начала живет в контексте задачи и уходит вместе с ним,
+    # даже если postrun не придет (revoke, убитый процесс)
+    task.request.started_monotonic = time.monotonic()
+    wait = queue_wait(task.request)
+    timings = {} if wait is None else {"wait": wait}
+    record(task.name, "started", **timings)
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = getattr(task.request, "started_monotonic", None)
+    timings = {}
+    if started is not None:
+        timings["runtime"] = time.monotonic() - started
+    record(task.name, FINISHED_STATES.get(state), **timings)
 
 
 @shared_task
@@ -13,3 +63,193 @@ def send_activation_code(absolute_link, email):
         recipient_list=[email],
     )
     return "Done"
+
+
+def _claim_payment(payment_id):
+    """
+    Забирает платеж в обработку атомарно, чтобы повторно доставленная
+    задача не списала деньги дважды. Платеж, зависший в PROCESSING после
+    падения воркера, забирается снова: повтор безопасен благодаря ключу
+    идемпотентности у провайдера.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.PAYMENT_PROCESSING_TIMEOUT)
+    # update() не трогает auto_now, время захвата ставим сами
+    return Payment.objects.filter(
+        Q(status__in=[Payment.PENDING, Payment.UNKNOWN])
+        | Q(status=Payment.PROCESSING, updated__lt=stale),
+        pk=payment_id,
+    ).update(status=Payment.PROCESSING, updated=now)
+
+
+@shared_task(bind=True, max_retries=5, acks_late=True)
+def process_payment(self, payment_id):
+    if not _claim_payment(payment_id):
+        return "Skipped"
+
+    payment = Payment.objects.get(pk=payment_id)
+    try:
+        intent = create_payment_intent(payment)
+    except ProviderUnavailable as e:
+        if self.request.retries < self.max_retries:
+            # Провайдер недоступен: возвращаем платеж в очередь и пробуем
+            # позже, не занимая воркер ожиданием
+            Payment.objects.filter(pk=payment_id).update(status=Payment.PENDING)
+            raise self.retry(countdown=30 * 2**self.request.retries)
+        # После таймаута списание могло пройти: это не отказ, платеж
+        # сверит requeue_stuck_payments по тому же ключу идемпотентности
+        payment.status = Payment.UNKNOWN
+        payment.error = str(e)
+    except PaymentDeclined as e:
+        payment.status = Payment.FAILED
+        payment.error = str(e)
+    else:
+        payment.intent_id = intent.id
+        if intent.status == "succeeded":
+            payment.status = Payment.SUCCEEDED
+        else:
+            payment.status = Payment.FAILED
+            payment.error = "Платеж откланен"
+    payment.save(update_fields=["status", "intent_id", "error", "updated"])
+    return payment.status
+
+
+@shared_task(acks_late=True)
+def requeue_stuck_payments():
+    """
+    Возвращает в очередь платежи, которые застряли в PROCESSING: задача
+    упала с необработанной ошибкой или ее сообщение потеряно. Платежи с
+    неизвестным исходом повторяются, пока провайдер помнит ключ
+    идемпотентности: повтор вернет уже созданный платеж, а не спишет снова.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.PAYMENT_PROCESSING_TIMEOUT)
+    reconcilable = now - timedelta(seconds=settings.PAYMENT_RECONCILE_WINDOW)
+    ids = list(
+        Payment.objects.filter(
+            Q(status=Payment.PROCESSING)
+            | Q(status=Payment.UNKNOWN, created__gte=reconcilable),
+            updated__lt=stale,
+        ).values_list("pk", flat=True)
+    )
+    with transaction.atomic():
+        for payment_id in ids:
+            enqueue(process_payment, payment_id)
+    return len(ids)
+
+
+@shared_task(acks_late=True)
+def purge_stale_activation_codes(batch_size=1000):
+    # Стираем коды пачками, чтобы не держать долгих блокировок
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.ACTIVATION_TOKEN_MAX_AGE
+    )
+    stale = Account.objects.filter(
+        activation_code__isnull=False, created__lt=cutoff
+    )
+    purged = 0
+    while True:
+        ids = list(stale.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        purged += Account.objects.filter(pk__in=ids).update(
+            activation_code=None
+        )
+    return purged
+
+
+@shared_task(acks_late=True)
+def build_recommendations():
+    return rebuild_recommendations(top_k=settings.RECOMMENDATIONS_TOP_K)
+
+
+def _session_reminder(enrollment):
+    session = enrollment.service_card_group
+    starts_at = timezone.localtime(session.date)
+    return EmailMessage(
+        subject="Напоминание о занятии",
+        body=f"Занятие «{session.name}» начнется {starts_at:%d.%m.%Y %H:%M}.",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[enrollment.student.email],
+    )
+
+
+@shared_task(acks_late=True)
+def schedule_session_reminders():
+    now = timezone.now()
+    pending = Enrollment.objects.filter(
+        status=Enrollment.ENROLLED,
+        reminded_at__isnull=True,
+        service_card_group__completed=False,
+        service_card_group__date__gt=now,
+        service_card_group__date__lte=now
+        + timedelta(seconds=settings.SESSION_REMINDER_LEAD),
+    )
+    chunks = 0
+    while True:
+        # Пачка помечается в одной транзакции с записью в outbox:
+        # параллельный запуск пропустит заблокированные строки, а повторный —
+        # уже помеченные, и ни одна пачка не потеряется при сбое брокера
+        with transaction.atomic():
+            ids = list(
+                pending.select_for_update(skip_locked=True, of=("self",))
+                .order_by("pk")
+                .values_list("pk", flat=True)[
+                    : settings.SESSION_REMINDER_CHUNK_SIZE
+                ]
+            )
+            if not ids:
+                break
+            Enrollment.objects.filter(pk__in=ids).update(reminded_at=now)
+            enqueue(send_session_reminders, ids)
+        chunks += 1
+    return chunks
+
+
+@shared_task(bind=True, max_retries=3)
+def send_session_reminders(self, enrollment_ids):
+    enrollments = list(
+        Enrollment.objects.filter(pk__in=enrollment_ids).select_related(
+            "student", "service_card_group"
+        )
+    )
+    sent = set()
+    try:
+        # Одно SMTP-соединение на всю пачку, письма уходят по одному, чтобы
+        # знать, кому напоминание уже отправлено
+        with get_connection() as connection:
+            for enrollment in enrollments:
+                connection.send_messages([_session_reminder(enrollment)])
+                sent.add(enrollment.pk)
+    except (SMTPException, OSError) as exc:
+        # Повторяем только неотправленные, иначе часть учеников получит
+        # напоминание дважды
+        unsent = [e.pk for e in enrollments if e.pk not in sent]
+        raise self.retry(
+            args=[unsent], exc=exc, countdown=2**self.request.retries
+        )
+    return len(sent)
+
+
+@shared_task(acks_late=True)
+def archive_completed_service_cards():
+    cutoff = timezone.now() - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+    return archive_completed_cards(
+        cutoff, batch_size=settings.ARCHIVE_BATCH_SIZE
+    )
+
+
+@shared_task(acks_late=True)
+def purge_dispatched_outbox_events():
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    return purge_outbox(cutoff)
+
+
+@shared_task
+def flush_view_counts():
+    return flush_views()
+
+
+@shared_task(acks_late=True)
+def rollup_daily_stats():
+    return rollup_specialist_stats()
@@ -1,3 +1,1732 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from smtplib import SMTPServerDisconnected
+from unittest import mock, skipIf
 
-# Create your tests here.
+import brotli
+import fakeredis
+import numpy as np
+import stripe
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from redis.exceptions import ConnectionError as RedisConnectionError
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import (
+    archive,
+    autocomplete,
+    revocation,
+    throttling,
+    view_counters,
+)
+from .archive import archive_completed_cards
+from .authentication import DELETED, UserCache, user_cache
+from .catalog import rebuild_catalog
+from .caching import CATALOG_VERSION_KEY, catalog_version, profile_key
+from .events import events_app, hub
+from .enrollment import cancel, enroll, fill_from_waitlist
+from .models import (
+    Account,
+    ArchivedReview,
+    ArchivedServiceCard,
+    Availability,
+    Booking,
+    CatalogEntry,
+    Enrollment,
+    OutboxEvent,
+    Payment,
+    Recommendation,
+    ReviewGroup,
+    ReviewIndividual,
+    ServiceCardGroup,
+    ServiceCardIndividual,
+    Specialist,
+    SpecialistDailyStats,
+    Student,
+    invalidate_card_profile,
+)
+from .middleware import CompressionMiddleware
+from .outbox import relay_outbox
+from .recommendations import compute_top_k, rebuild_recommendations
+from .renderers import ORJSONParser, ORJSONRenderer
+from .rollups import rollup_specialist_stats
+from .payments import (
+    CircuitBreaker,
+    FakeProvider,
+    PaymentDeclined,
+    PaymentGateway,
+    ProviderUnavailable,
+    StubProvider,
+    build_gateway,
+)
+from .tasks import (
+    process_payment,
+    requeue_stuck_payments,
+    send_activation_code,
+    send_session_reminders,
+    task_finished,
+)
+
+
+def create_payment(**kwargs):
+    kwargs.setdefault("amount", Decimal("10.00"))
+    kwargs.setdefault("currency", "usd")
+    kwargs.setdefault("description", "Курс")
+    kwargs.setdefault("payment_method", "credit_card")
+    return Payment.objects.create(**kwargs)
+
+
+INTENT_PARAMS = {"amount": 1000, "currency": "usd"}
+
+
+def make_gateway(provider, threshold=5, reset_timeout=30, max_retries=2):
+    # Нулевой backoff: повторы без пауз
+    return PaymentGateway(
+        provider,
+        CircuitBreaker(threshold, reset_timeout),
+        max_retries=max_retries,
+        backoff=0,
+    )
+
+
+class PaymentGatewayTests(SimpleTestCase):
+    """Повторы и предохранитель на медленном и нестабильном провайдере"""
+
+    def test_slow_provider_within_timeout_succeeds(self):
+        provider = FakeProvider(latency=0.01, timeout=1)
+
+        intent = make_gateway(provider).create_intent(**INTENT_PARAMS)
+
+        self.assertEqual(intent.status, "succeeded")
+        self.assertEqual(provider.calls, 1)
+
+    def test_timeouts_are_retried_then_reported(self):
+        provider = FakeProvider(latency=1, timeout=0.01)
+
+        with self.assertRaises(ProviderUnavailable):
+            make_gateway(provider).create_intent(**INTENT_PARAMS)
+        self.assertEqual(provider.calls, 3)
+
+    def test_transient_error_is_retried(self):
+        provider = mock.Mock()
+        provider.create_intent.side_effect = [
+            stripe.error.APIError("Provider is unavailable"),
+            StubProvider().create_intent(**INTENT_PARAMS),
+        ]
+
+        intent = make_gateway(provider).create_intent(**INTENT_PARAMS)
+
+        self.assertEqual(intent.status, "succeeded")
+        self.assertEqual(provider.create_intent.call_count, 2)
+
+    def test_decline_is_not_retried(self):
+        provider = mock.Mock()
+        provider.create_intent.side_effect = stripe.error.CardError(
+            "Card declined", None, "card_declined"
+        )
+        gateway = make_gateway(provider)
+
+        with self.assertRaises(PaymentDeclined):
+            gateway.create_intent(**INTENT_PARAMS)
+        self.assertEqual(provider.create_intent.call_count, 1)
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_breaker_opens_and_short_circuits(self):
+        provider = FakeProvider(failure_rate=1)
+        gateway = make_gateway(provider, threshold=2, max_retries=0)
+
+        for _ in range(2):
+            with self.assertRaises(ProviderUnavailable):
+                gateway.create_intent(**INTENT_PARAMS)
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.OPEN)
+
+        with self.assertRaises(ProviderUnavailable):
+            gateway.create_intent(**INTENT_PARAMS)
+        # Открытый предохранитель не пускает запрос к провайдеру
+        self.assertEqual(provider.calls, 2)
+
+    def test_breaker_closes_after_successful_probe(self):
+        provider = FakeProvider(failure_rate=1)
+        gateway = make_gateway(
+            provider, threshold=1, reset_timeout=0.01, max_retries=0
+        )
+        with self.assertRaises(ProviderUnavailable):
+            gateway.create_intent(**INTENT_PARAMS)
+
+        provider.failure_rate = 0
+        time.sleep(0.02)
+        gateway.create_intent(**INTENT_PARAMS)
+
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_opens_breaker_again(self):
+        provider = FakeProvider(failure_rate=1)
+        gateway = make_gateway(
+            provider, threshold=1, reset_timeout=0.01, max_retries=0
+        )
+        with self.assertRaises(ProviderUnavailable):
+            gateway.create_intent(**INTENT_PARAMS)
+
+        time.sleep(0.02)
+        with self.assertRaises(ProviderUnavailable):
+            gateway.create_intent(**INTENT_PARAMS)
+
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(provider.calls, 2)
+
+
+class ProcessPaymentTests(TestCase):
+    """Проведение платежа задачей Celery на заглушке провайдера"""
+
+    def setUp(self):
+        patcher = mock.patch(
+            "core.payments._gateway", build_gateway(StubProvider())
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_stale(self, payment):
+        Payment.objects.filter(pk=payment.pk).update(
+            status=Payment.PROCESSING,
+            updated=timezone.now() - timedelta(hours=1),
+        )
+
+    def test_pending_payment_succeeds(self):
+        payment = create_payment()
+
+        result = process_payment.apply(args=[payment.pk]).get()
+
+        payment.refresh_from_db()
+        self.assertEqual(result, Payment.SUCCEEDED)
+        self.assertEqual(payment.status, Payment.SUCCEEDED)
+        self.assertTrue(payment.intent_id.startswith("pi_stub_"))
+
+    def test_unavailable_provider_leaves_outcome_unknown(self):
+        payment = create_payment()
+        gateway = make_gateway(FakeProvider(failure_rate=1), max_retries=0)
+
+        with mock.patch("core.payments._gateway", gateway):
+            process_payment.apply(args=[payment.pk])
+
+        # Таймаут не значит отказ: списание могло пройти
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, Payment.UNKNOWN)
+        self.assertTrue(payment.error)
+
+    def test_unknown_payments_are_reconciled(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        unknown = create_payment(status=Payment.UNKNOWN)
+        expired = create_payment(status=Payment.UNKNOWN)
+        Payment.objects.filter(pk=unknown.pk).update(updated=hour_ago)
+        Payment.objects.filter(pk=expired.pk).update(
+            updated=hour_ago, created=timezone.now() - timedelta(days=2)
+        )
+
+        self.assertEqual(requeue_stuck_payments(), 1)
+        self.assertEqual(OutboxEvent.objects.get().args, [unknown.pk])
+
+        process_payment.apply(args=[unknown.pk])
+        unknown.refresh_from_db()
+        self.assertEqual(unknown.status, Payment.SUCCEEDED)
+
+    def test_payment_in_progress_is_skipped(self):
+        payment = create_payment(status=Payment.PROCESSING)
+
+        result = process_payment.apply(args=[payment.pk]).get()
+
+        payment.refresh_from_db()
+        self.assertEqual(result, "Skipped")
+        self.assertEqual(payment.status, Payment.PROCESSING)
+
+    def test_stuck_payment_is_claimed_again(self):
+        payment = create_payment()
+        self.make_stale(payment)
+
+        process_payment.apply(args=[payment.pk])
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, Payment.SUCCEEDED)
+
+    def test_stuck_payments_are_requeued(self):
+        stuck = create_payment()
+        self.make_stale(stuck)
+        create_payment(status=Payment.PROCESSING)
+
+        self.assertEqual(requeue_stuck_payments(), 1)
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.task, process_payment.name)
+        self.assertEqual(event.args, [stuck.pk])
+
+
+class PaymentStatusTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_anonymous_payment_needs_token(self):
+        response = self.client.post(
+            "/api/authpayment/",
+            {
+                "amount": "10.00",
+                "currency": "usd",
+                "description": "Курс",
+                "payment_method": "credit_card",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+        payment_id = response.json()["id"]
+        status_url = response.json()["status_url"]
+
+        response = self.client.get(f"/api/authpayment/{payment_id}/")
+        self.assertEqual(response.status_code, 404)
+
+        # Токен другого платежа не подходит
+        token = create_payment().make_status_token()
+        response = self.client.get(
+            f"/api/authpayment/{payment_id}/", {"token": token}
+        )
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(status_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], payment_id)
+
+
+def create_specialist(email="tutor@example.com"):
+    user = Account.objects.create_tutor(email, "password")
+    return Specialist.objects.create(
+        user=user,
+        first_name="Репетитор",
+        last_name="Тестовый",
+        age=30,
+        phone="+996 555 555 555",
+        email=email,
+        services="Математика",
+        education="КНУ",
+        consultation_price=Decimal("10.00"),
+    )
+
+
+def create_student(index):
+    email = f"student{index}@example.com"
+    user = Account.objects.create_user(email, "password")
+    return Student.objects.create(
+        user=user,
+        first_name="Ученик",
+        last_name=str(index),
+        phone="+996 555 555 555",
+        email=email,
+    )
+
+
+def create_session(specialist, capacity):
+    return ServiceCardGroup.objects.create(
+        name="Группа",
+        image="service_card/group.png",
+        date=timezone.now() + timedelta(days=1),
+        description="Занятие",
+        specialist=specialist,
+        price=Decimal("5.00"),
+        capacity=capacity,
+    )
+
+
+class EnrollmentTests(TestCase):
+    def setUp(self):
+        self.session = create_session(create_specialist(), capacity=1)
+        self.first, self.second = create_student(1), create_student(2)
+
+    def test_overflow_goes_to_waitlist(self):
+        self.assertEqual(
+            enroll(self.session, self.first).status, Enrollment.ENROLLED
+        )
+        self.assertEqual(
+            enroll(self.session, self.second).status, Enrollment.WAITLISTED
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.seats_taken, 1)
+
+    def test_cancel_promotes_next_in_line(self):
+        enrollment = enroll(self.session, self.first)
+        enroll(self.session, self.second)
+
+        cancel(enrollment)
+
+        self.assertEqual(
+            Enrollment.objects.get(student=self.second).status,
+            Enrollment.ENROLLED,
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.seats_taken, 1)
+
+    def test_repeat_enroll_retries_waitlisted(self):
+        enroll(self.session, self.first)
+        enroll(self.session, self.second)
+        ServiceCardGroup.objects.filter(pk=self.session.pk).update(capacity=2)
+
+        enrollment = enroll(self.session, self.second)
+
+        self.assertEqual(enrollment.status, Enrollment.ENROLLED)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.seats_taken, 2)
+
+    def test_raised_capacity_is_filled_from_waitlist(self):
+        enroll(self.session, self.first)
+        third = create_student(3)
+        enroll(self.session, self.second)
+        enroll(self.session, third)
+        self.session.capacity = 2
+        self.session.save()
+
+        self.assertEqual(fill_from_waitlist(self.session.pk), 1)
+
+        statuses = dict(Enrollment.objects.values_list("student_id", "status"))
+        self.assertEqual(statuses[self.second.pk], Enrollment.ENROLLED)
+        self.assertEqual(statuses[third.pk], Enrollment.WAITLISTED)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.seats_taken, 2)
+
+    def test_cancel_waits_for_locked_waitlist_rows(self):
+        enrollment = enroll(self.session, self.first)
+        enroll(self.session, self.second)
+        real_first = QuerySet.first
+        skipped = []
+
+        def first(queryset):
+            # Выборка со SKIP LOCKED не видит ожидающего, будто его строку
+            # держит параллельная отмена
+            if queryset.query.select_for_update_skip_locked and not skipped:
+                skipped.append(queryset)
+                return None
+            return real_first(queryset)
+
+        with mock.patch.object(QuerySet, "first", first):
+            cancel(enrollment)
+
+        self.assertTrue(skipped)
+        self.assertEqual(
+            Enrollment.objects.get(student=self.second).status,
+            Enrollment.ENROLLED,
+        )
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.seats_taken, 1)
+
+    def test_random_enroll_and_cancel_keep_seats_consistent(self):
+        session = create_session(create_specialist("t2@example.com"), 3)
+        students = [create_student(i) for i in range(3, 15)]
+        shuffle = random.Random(7)
+        for _ in range(150):
+            student = shuffle.choice(students)
+            current = Enrollment.objects.filter(
+                service_card_group=session, student=student
+            ).exclude(status=Enrollment.CANCELLED)
+            if current.exists() and shuffle.random() < 0.5:
+                cancel(current.get())
+            else:
+                enroll(session, student)
+
+            session.refresh_from_db()
+            statuses = list(
+                Enrollment.objects.filter(
+                    service_card_group=session
+                ).values_list("status", flat=True)
+            )
+            enrolled = statuses.count(Enrollment.ENROLLED)
+            self.assertEqual(session.seats_taken, enrolled)
+            self.assertLessEqual(enrolled, session.capacity)
+            # Свободное место при непустой очереди — пропуск очереди
+            if enrolled < session.capacity:
+                self.assertNotIn(Enrollment.WAITLISTED, statuses)
+
+    def test_save_does_not_overwrite_seats_taken(self):
+        stale = ServiceCardGroup.objects.get(pk=self.session.pk)
+        enroll(self.session, self.first)
+
+        stale.name = "Новое название"
+        stale.save()
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.seats_taken, 1)
+
+
+@skipIf(
+    connection.vendor == "sqlite",
+    "SQLite не выдерживает параллельную запись из потоков",
+)
+class EnrollmentConcurrencyTests(TransactionTestCase):
+    """Одно занятие под нагрузкой из многих потоков"""
+
+    threads = 20
+    capacity = 5
+
+    def test_parallel_enrollments_never_overbook(self):
+        sessions = [
+            create_session(create_specialist(f"tutor{i}@example.com"), k)
+            for i, k in enumerate((self.capacity, 1))
+        ]
+        students = [create_student(i) for i in range(self.threads)]
+        # Каждый ученик записывается дважды на оба занятия
+        jobs = [
+            (session, student)
+            for session in sessions
+            for student in students
+            for _ in range(2)
+        ]
+        barrier = threading.Barrier(len(jobs))
+        errors = []
+
+        def run(session, student):
+            try:
+                barrier.wait()
+                enroll(session, student)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=run, args=job) for job in jobs]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        for session in sessions:
+            session.refresh_from_db()
+            enrolled = Enrollment.objects.filter(
+                service_card_group=session, status=Enrollment.ENROLLED
+            ).count()
+            self.assertEqual(session.seats_taken, session.capacity)
+            self.assertEqual(enrolled, session.capacity)
+            self.assertEqual(
+                Enrollment.objects.filter(service_card_group=session).count(),
+                self.threads,
+            )
+
+
+class FlakyEmailBackend(EmailBackend):
+    """Обрывает соединение на заданном по счету письме, один раз"""
+
+    def __init__(self, fail_on, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_on = fail_on
+
+    def send_messages(self, messages):
+        # Как SMTP-бэкенд: письма до обрыва уже доставлены
+        for message in messages:
+            if len(mail.outbox) + 1 == self.fail_on:
+                self.fail_on = None
+                raise SMTPServerDisconnected("connection lost")
+            super().send_messages([message])
+        return len(messages)
+
+
+class SessionReminderTests(TestCase):
+    def test_retry_sends_only_unsent_reminders(self):
+        session = create_session(create_specialist(), capacity=3)
+        ids = [enroll(session, create_student(i)).pk for i in range(3)]
+        backend = FlakyEmailBackend(fail_on=2)
+        with mock.patch("core.tasks.get_connection", return_value=backend):
+            send_session_reminders.apply(args=[ids])
+        recipients = sorted(m.to[0] for m in mail.outbox)
+        self.assertEqual(
+            recipients, [f"student{i}@example.com" for i in range(3)]
+        )
+
+
+class OutboxRelayTests(TestCase):
+    def setUp(self):
+        self.events = [
+            OutboxEvent.objects.create(task="core.tasks.build_recommendations")
+            for _ in range(3)
+        ]
+
+    def relay(self, side_effect):
+        with mock.patch("core.outbox.current_app") as app:
+            app.send_task.side_effect = side_effect
+            sent = relay_outbox()
+        for event in self.events:
+            event.refresh_from_db()
+        return sent, app.send_task
+
+    def test_broker_outage_reschedules_remaining_events(self):
+        sent, send_task = self.relay([None, OperationalError("broker down")])
+        self.assertEqual(sent, 1)
+        self.assertIsNotNone(self.events[0].dispatched_at)
+        for event in self.events[1:]:
+            self.assertIsNone(event.dispatched_at)
+            self.assertIsNone(event.failed_at)
+            self.assertEqual(event.attempts, 1)
+            self.assertGreater(event.available_at, timezone.now())
+        send_task.assert_called_with(
+            "core.tasks.build_recommendations",
+            args=[],
+            kwargs={},
+            task_id=f"outbox-{self.events[1].pk}",
+            producer=mock.ANY,
+            retry=False,
+        )
+
+    def test_broken_event_is_parked_and_batch_continues(self):
+        sent, _ = self.relay([None, TypeError("not serializable"), None])
+        self.assertEqual(sent, 2)
+        broken = self.events[1]
+        self.assertIsNotNone(broken.failed_at)
+        self.assertIn("not serializable", broken.last_error)
+        self.assertIsNotNone(self.events[2].dispatched_at)
+        # Отложенное событие больше не попадает в выборку
+        self.assertEqual(self.relay([])[0], 0)
+
+
+class ViewCountTests(TestCase):
+    def setUp(self):
+        self.specialist = create_specialist()
+
+    def test_full_save_keeps_flushed_views(self):
+        view_counters.apply_counts(Specialist, {self.specialist.pk: 5})
+        self.specialist.first_name = "Новое имя"
+        self.specialist.save()
+        self.specialist.refresh_from_db()
+        self.assertEqual(self.specialist.first_name, "Новое имя")
+        self.assertEqual(self.specialist.view_count, 5)
+
+    @override_settings(VIEW_COUNTS_FLUSH_INTERVAL=0)
+    def test_local_fallback_flushes_outside_request(self):
+        label = Specialist._meta.label_lower
+        self.addCleanup(view_counters.local_counters.take, label)
+        flush = mock.patch.object(view_counters, "flush_views")
+        thread = mock.patch("threading.Thread")
+        with flush as flush_views, thread as thread_class:
+            view_counters.record_view(self.specialist)
+        # Поток подменен, блокировку сброса освобождаем сами
+        view_counters._flush_lock.release()
+        flush_views.assert_not_called()
+        thread_class.return_value.start.assert_called_once_with()
+        self.assertEqual(
+            view_counters.local_counters.take(label)[self.specialist.pk], 1
+        )
+
+
+class DailyStatsTests(TestCase):
+    def setUp(self):
+        self.specialist = create_specialist()
+        self.card = ServiceCardIndividual.objects.create(
+            name="Курс",
+            image="service_card/course.png",
+            description="Курс",
+            specialist=self.specialist,
+            price=Decimal("7.00"),
+        )
+
+    def test_completing_card_stamps_completed_at(self):
+        self.card.completed = True
+        self.card.save()
+        self.card.refresh_from_db()
+        self.assertIsNotNone(self.card.completed_at)
+
+        self.card.completed = False
+        self.card.save()
+        self.card.refresh_from_db()
+        self.assertIsNone(self.card.completed_at)
+
+    def test_rollup_skips_cards_without_completed_at(self):
+        # Карточки, завершенные до появления completed_at
+        ServiceCardIndividual.objects.filter(pk=self.card.pk).update(
+            completed=True, completed_at=None
+        )
+        self.assertEqual(rollup_specialist_stats(), 0)
+        self.assertFalse(SpecialistDailyStats.objects.exists())
+
+
+class CatalogEventsTests(SimpleTestCase):
+    def request(self, receive, send):
+        scope = {"type": "http", "method": "GET", "query_string": b""}
+        asyncio.run(asyncio.wait_for(events_app(scope, receive, send), 5))
+
+    def test_disconnect_unsubscribes_client(self):
+        sent = []
+
+        async def receive():
+            # Клиент уходит сразу после заголовков ответа
+            while not sent:
+                await asyncio.sleep(0)
+            self.assertEqual(len(hub._clients), 1)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        self.request(receive, send)
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(hub._clients, set())
+
+    def test_wsgi_urlconf_does_not_serve_events(self):
+        from online_tutor.asgi import EVENTS_PATH
+
+        with self.assertRaises(Resolver404):
+            resolve(EVENTS_PATH)
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+
+    def test_saved_account_is_cached_only_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = Account.objects.create_user("cached@example.com", "pass")
+            user.first_name = "Имя"
+            user.save()
+            self.assertIsNone(user_cache.get(user.pk))
+        self.assertEqual(user_cache.get(user.pk).first_name, "Имя")
+
+        pk = user.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertIs(user_cache.get(pk), DELETED)
+
+    def test_stale_entry_expires_after_ttl(self):
+        # Аккаунт заблокирован в другом процессе, этот кэш не сброшен
+        local = UserCache(max_size=10, ttl=300)
+        user = Account(pk=1, is_active=True)
+        with mock.patch("core.authentication.time.monotonic", return_value=0):
+            local.set(user.pk, user)
+        with mock.patch("core.authentication.time.monotonic", return_value=300):
+            self.assertIs(local.get(user.pk), user)
+        with mock.patch("core.authentication.time.monotonic", return_value=301):
+            self.assertIsNone(local.get(user.pk))
+
+    def test_rolled_back_save_leaves_cache_alone(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            user = Account.objects.create_user("cached@example.com", "pass")
+        # Обработчики on_commit не выполнены: транзакция откатилась
+        self.assertTrue(callbacks)
+        self.assertIsNone(user_cache.get(user.pk))
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.specialist = create_specialist()
+        self.key = profile_key(self.specialist.user_id)
+
+    def save_session(self, session, queries):
+        cache.set(self.key, "cached")
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(queries):
+                invalidate_card_profile(ServiceCardGroup, session)
+            # До коммита параллельный запрос закэшировал бы старый профиль
+            self.assertEqual(cache.get(self.key), "cached")
+        self.assertIsNone(cache.get(self.key))
+
+    def test_loaded_specialist_costs_no_queries(self):
+        self.save_session(create_session(self.specialist, capacity=1), 0)
+
+    def test_unloaded_specialist_reads_only_user_id(self):
+        session = create_session(self.specialist, capacity=1)
+        self.save_session(ServiceCardGroup.objects.get(pk=session.pk), 1)
+
+    def test_me_works_without_cache(self):
+        client = APIClient()
+        client.force_authenticate(self.specialist.user)
+        with mock.patch.object(
+            cache, "get", side_effect=RedisConnectionError
+        ), mock.patch.object(cache, "set", side_effect=RedisConnectionError):
+            response = client.get("/api/authme/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["account"]["email"], self.specialist.email
+        )
+
+
+class BulkCompleteTests(TestCase):
+    url = "/api/authservice_card_group/complete/"
+
+    def setUp(self):
+        self.specialist = create_specialist()
+        self.session = create_session(self.specialist, capacity=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.specialist.user)
+
+    def test_missing_ids_are_integers(self):
+        response = self.client.post(
+            self.url, {"ids": [self.session.pk, 999]}, format="json"
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["ids"], [999])
+
+    def test_foreign_ids_are_integers(self):
+        other = create_session(create_specialist("other@example.com"), 1)
+        response = self.client.post(
+            self.url, {"ids": [self.session.pk, other.pk]}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["ids"], [other.pk])
+        self.session.refresh_from_db()
+        self.assertFalse(self.session.completed)
+
+
+class ThrottlingTests(TestCase):
+    login_url = "/api/authlogin/"
+
+    def setUp(self):
+        throttling.local_buckets._buckets.clear()
+        self.addCleanup(throttling.local_buckets._buckets.clear)
+
+    def login(self, email, ip="10.0.0.1"):
+        return APIClient().post(
+            self.login_url,
+            {"email": email, "password": "wrong"},
+            format="json",
+            REMOTE_ADDR=ip,
+        )
+
+    def allow(self, throttle, email, ip="10.0.0.1"):
+        request = APIRequestFactory().post(
+            self.login_url, {"email": email}, format="json", REMOTE_ADDR=ip
+        )
+        view = mock.Mock(throttle_scope="login")
+        return throttle.allow_request(
+            Request(request, parsers=[JSONParser()]), view
+        )
+
+    def test_sixth_login_attempt_is_throttled(self):
+        for _ in range(5):
+            self.assertEqual(self.login("a@example.com").status_code, 400)
+        response = self.login("a@example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    def test_account_limit_follows_email_not_ip(self):
+        for _ in range(6):
+            self.login("a@example.com")
+        self.assertNotEqual(self.login("b@example.com").status_code, 429)
+        # Смена IP и регистра email не обходит лимит аккаунта
+        response = self.login(" A@Example.com", ip="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+
+    def test_ip_limit_covers_all_accounts(self):
+        throttle = throttling.IPTokenBucketThrottle()
+        for i in range(30):
+            self.assertTrue(self.allow(throttle, f"user{i}@example.com"))
+        self.assertFalse(self.allow(throttle, "new@example.com"))
+        self.assertTrue(self.allow(throttle, "new@example.com", ip="10.0.0.2"))
+
+    def test_redis_bucket_refills_at_rate(self):
+        client = fakeredis.FakeRedis()
+        with mock.patch.object(
+            throttling, "get_redis", return_value=client
+        ), mock.patch.object(throttling, "_script", None):
+            results = [throttling.take_token("k", 2, 2 / 60) for _ in "abc"]
+        self.assertEqual([allowed for allowed, _ in results], [1, 1, 0])
+        self.assertAlmostEqual(results[2][1], 30, delta=1)
+        self.assertFalse(throttling.local_buckets._buckets)
+
+    def test_redis_outage_falls_back_to_local_buckets(self):
+        client = mock.Mock()
+        client.register_script.side_effect = RedisConnectionError
+        with mock.patch.object(
+            throttling, "get_redis", return_value=client
+        ), mock.patch.object(throttling, "_script", None):
+            results = [throttling.take_token("k", 1, 1 / 60) for _ in "ab"]
+        self.assertEqual([allowed for allowed, _ in results], [True, False])
+        self.assertIn("k", throttling.local_buckets._buckets)
+
+
+class RevocationTests(TestCase):
+    refresh_url = "/api/authtoken/refresh/"
+
+    def setUp(self):
+        self.user = Account.objects.create_user(
+            "user@example.com", "pass", is_active=True
+        )
+        self.tokens = self.user.tokens()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}"
+        )
+        self.redis = fakeredis.FakeRedis()
+        patches = (
+            mock.patch.object(
+                revocation, "get_redis", side_effect=lambda: self.redis
+            ),
+            mock.patch.object(
+                revocation, "local_revocations", revocation.LocalRevocations()
+            ),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def logout(self, refresh=None):
+        return self.client.post(
+            "/api/authlogout/",
+            {"refresh": refresh or self.tokens["refresh"]},
+            format="json",
+        )
+
+    def refresh(self, token):
+        return self.client.post(
+            self.refresh_url, {"refresh": token}, format="json"
+        )
+
+    def test_refresh_is_rejected_after_logout(self):
+        self.assertEqual(self.logout().status_code, 200)
+        self.assertEqual(self.refresh(self.tokens["refresh"]).status_code, 401)
+
+    def test_rotated_token_cannot_be_reused(self):
+        response = self.refresh(self.tokens["refresh"])
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()["refresh"]
+
+        self.assertEqual(self.refresh(self.tokens["refresh"]).status_code, 401)
+        self.assertEqual(self.refresh(rotated).status_code, 200)
+
+    def test_logout_rejects_foreign_token(self):
+        other = Account.objects.create_user(
+            "other@example.com", "pass", is_active=True
+        )
+        other_refresh = other.tokens()["refresh"]
+        response = self.logout(other_refresh)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.refresh(other_refresh).status_code, 200)
+
+    def test_redis_outage_falls_back_to_local_revocations(self):
+        self.redis = mock.Mock()
+        self.redis.set.side_effect = RedisConnectionError
+        self.redis.exists.side_effect = RedisConnectionError
+
+        self.assertEqual(self.logout().status_code, 200)
+        self.assertEqual(len(revocation.local_revocations._expires), 1)
+        self.assertEqual(self.refresh(self.tokens["refresh"]).status_code, 401)
+
+    def test_local_revocation_expires_with_token(self):
+        local = revocation.LocalRevocations()
+        with mock.patch("core.revocation.time.time", return_value=1000):
+            self.assertTrue(local.revoke("jti", 60))
+            self.assertFalse(local.revoke("jti", 60))
+            self.assertTrue(local.is_revoked("jti"))
+        with mock.patch("core.revocation.time.time", return_value=1061):
+            self.assertFalse(local.is_revoked("jti"))
+            self.assertTrue(local.revoke("jti", 60))
+
+
+class ActivationTests(TestCase):
+    def setUp(self):
+        self.user = Account.objects.create_user("new@example.com", "pass")
+        self.user.is_active = False
+        self.user.create_activation_code()
+        self.user.save()
+        self.client = APIClient()
+
+    def activate(self, token):
+        return self.client.post(f"/api/authactivate/{token}/")
+
+    def test_link_activates_once(self):
+        token = self.user.make_activation_token()
+        self.assertEqual(self.activate(token).status_code, 302)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertIsNone(self.user.activation_code)
+        # Код сброшен, повторная ссылка недействительна
+        self.assertEqual(self.activate(token).status_code, 404)
+
+    def test_tampered_link_is_rejected(self):
+        token = self.user.make_activation_token()
+        forged = token[:-1] + ("A" if token[-1] != "A" else "B")
+        self.assertEqual(self.activate(forged).status_code, 404)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    @override_settings(ACTIVATION_TOKEN_MAX_AGE=-1)
+    def test_expired_link_is_rejected(self):
+        token = self.user.make_activation_token()
+        self.assertEqual(self.activate(token).status_code, 404)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+
+class BookingTests(TestCase):
+    def setUp(self):
+        self.specialist = create_specialist()
+        self.student = create_student(1)
+        self.day = (timezone.now() + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        # Работает с 9 до 13
+        Availability.objects.create(
+            specialist=self.specialist,
+            start=self.at(9),
+            end=self.at(13),
+        )
+        self.booking = Booking.objects.create(
+            specialist=self.specialist,
+            student=self.student,
+            start=self.at(10),
+            end=self.at(11),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def at(self, hour):
+        return self.day + timedelta(hours=hour)
+
+    def book(self, start, end, student=None):
+        return self.client.post(
+            "/api/authbooking/",
+            {
+                "specialist": self.specialist.pk,
+                "student": (student or self.student).pk,
+                "start": self.at(start),
+                "end": self.at(end),
+            },
+            format="json",
+        )
+
+    def move(self, start, end):
+        return self.client.patch(
+            f"/api/authbooking/{self.booking.pk}/",
+            {"start": self.at(start), "end": self.at(end)},
+            format="json",
+        )
+
+    def test_overlapping_or_unavailable_booking_is_rejected(self):
+        self.assertEqual(self.book(10, 12).status_code, 400)
+        self.assertEqual(self.book(12, 14).status_code, 400)
+        self.assertEqual(self.book(11, 12).status_code, 201)
+
+    def test_update_runs_the_same_checks(self):
+        Booking.objects.create(
+            specialist=self.specialist,
+            student=create_student(2),
+            start=self.at(12),
+            end=self.at(13),
+        )
+        self.assertEqual(self.move(11, 13).status_code, 400)
+        self.assertEqual(self.move(8, 9).status_code, 400)
+        # Перенос внутри своего же интервала не конфликтует с самим собой
+        self.assertEqual(self.move(10, 12).status_code, 200)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.end, self.at(12))
+
+    def test_only_owners_change_schedule_and_bookings(self):
+        other = create_student(2)
+        self.assertEqual(self.book(11, 12, student=other).status_code, 403)
+        availability = {
+            "specialist": self.specialist.pk,
+            "start": self.at(14),
+            "end": self.at(15),
+        }
+        response = self.client.post(
+            "/api/authavailability/", availability, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.client.force_authenticate(self.specialist.user)
+        response = self.client.post(
+            "/api/authavailability/", availability, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.move(11, 12).status_code, 403)
+
+        self.client.force_authenticate(None)
+        response = self.client.delete(f"/api/authbooking/{self.booking.pk}/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_free_search(self):
+        other = create_specialist("other@example.com")
+        Availability.objects.create(
+            specialist=other, start=self.at(8), end=self.at(18)
+        )
+
+        def free(start, end):
+            response = self.client.get(
+                "/api/authspecialist/free/",
+                {"start": self.at(start), "end": self.at(end)},
+            )
+            return sorted(item["email"] for item in response.json())
+
+        both = ["other@example.com", "tutor@example.com"]
+        self.assertEqual(free(11, 12), both)
+        # 10-11 занято, 13-14 вне расписания первого репетитора
+        self.assertEqual(free(10, 11), ["other@example.com"])
+        self.assertEqual(free(12, 14), ["other@example.com"])
+
+
+class ReviewEligibilityTests(TestCase):
+    def setUp(self):
+        self.specialist = create_specialist()
+        self.student = create_student(1)
+        self.booked, self.other = (
+            ServiceCardIndividual.objects.create(
+                name=name,
+                image="service_card/course.png",
+                description="Курс",
+                specialist=self.specialist,
+                price=Decimal("7.00"),
+            )
+            for name in ("Алгебра", "Геометрия")
+        )
+        start = timezone.now() - timedelta(days=1)
+        Booking.objects.create(
+            specialist=self.specialist,
+            student=self.student,
+            service_card=self.booked,
+            start=start,
+            end=start + timedelta(hours=1),
+        )
+
+    def review(self, card):
+        return APIClient().post(
+            "/api/authreview_individual/",
+            {
+                "service_card": card.pk,
+                "rating": 5,
+                "completed_by": self.student.pk,
+            },
+            format="json",
+        )
+
+    def test_review_requires_booking_of_that_card(self):
+        self.assertEqual(self.review(self.other).status_code, 400)
+        self.assertEqual(self.review(self.booked).status_code, 201)
+
+
+class BatchFetchTests(TestCase):
+    def setUp(self):
+        specialist = create_specialist()
+        self.cards = [
+            ServiceCardIndividual.objects.create(
+                name=f"Курс {index}",
+                image="service_card/course.png",
+                description="Курс",
+                specialist=specialist,
+                price=Decimal(price),
+            )
+            for index, price in enumerate(("5.00", "7.00", "9.00"))
+        ]
+
+    def batch(self, ids, query=""):
+        return self.client.get(f"/api/authservice_card/batch/?ids={ids}{query}")
+
+    def test_keeps_order_marks_missing_and_dedupes(self):
+        first, second, third = (card.pk for card in self.cards)
+        response = self.batch(f"{third},{first},999,{third}")
+
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual(
+            [(row["id"], row["found"]) for row in rows],
+            [(third, True), (first, True), (999, False)],
+        )
+        self.assertEqual(rows[0]["data"]["name"], "Курс 2")
+        self.assertEqual(rows[1]["data"]["name"], "Курс 0")
+        self.assertIsNone(rows[2]["data"])
+
+    def test_list_filters_apply(self):
+        ids = ",".join(str(card.pk) for card in self.cards)
+        response = self.batch(ids, "&max_price=7")
+        self.assertEqual(
+            [row["found"] for row in response.json()], [True, True, False]
+        )
+
+    def test_size_limit(self):
+        ids = ",".join(str(pk) for pk in range(1, 102))
+        response = self.batch(ids)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ids", response.json())
+
+        # Повторы не считаются в лимит
+        response = self.batch(ids.replace("101", "1"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 100)
+
+
+class CatalogReadModelTests(TestCase):
+    columns = (
+        "kind",
+        "card_id",
+        "name",
+        "image",
+        "price",
+        "date",
+        "completed",
+        "specialist_id",
+        "specialist_name",
+        "rating",
+    )
+
+    def setUp(self):
+        self.specialist = create_specialist()
+        self.card = ServiceCardIndividual.objects.create(
+            name="Курс",
+            image="service_card/course.png",
+            description="Курс",
+            specialist=self.specialist,
+            price=Decimal("7.00"),
+        )
+        self.session = create_session(self.specialist, capacity=3)
+
+    def rows(self):
+        return sorted(CatalogEntry.objects.values_list(*self.columns))
+
+    def test_card_changes_are_synced(self):
+        self.card.price = Decimal("9.00")
+        self.card.save()
+        ReviewIndividual.objects.create(
+            service_card=self.card, completed_by=create_student(1), rating=4
+        )
+        self.specialist.user.last_name = "Новая"
+        self.specialist.user.save(update_fields=["last_name"])
+
+        entry = CatalogEntry.objects.get(
+            kind=CatalogEntry.INDIVIDUAL, card_id=self.card.pk
+        )
+        self.assertEqual(entry.price, Decimal("9.00"))
+        self.assertEqual(entry.rating, 4)
+        self.assertEqual(entry.specialist_name, "Новая")
+        group = CatalogEntry.objects.get(kind=CatalogEntry.GROUP)
+        self.assertEqual(group.card_id, self.session.pk)
+        self.assertEqual(group.date, self.session.date)
+        self.assertEqual(group.rating, 4)
+
+    def test_deleted_card_is_removed(self):
+        self.card.delete()
+        self.assertEqual(
+            list(CatalogEntry.objects.values_list("kind", flat=True)),
+            [CatalogEntry.GROUP],
+        )
+
+    def test_rebuild_restores_drifted_rows(self):
+        synced = self.rows()
+        CatalogEntry.objects.filter(kind=CatalogEntry.GROUP).delete()
+        CatalogEntry.objects.update(price=0, specialist_name="")
+        CatalogEntry.objects.create(
+            kind=CatalogEntry.INDIVIDUAL,
+            card_id=self.card.pk + 100,
+            name="Удаленный",
+            price=1,
+            specialist=self.specialist,
+        )
+
+        self.assertEqual(rebuild_catalog(batch_size=1), 2)
+        self.assertEqual(self.rows(), synced)
+
+    def test_short_listing_reads_only_indexed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/authcatalog/?fields=kind,card_id,price,rating"
+                "&completed=false&max_price=8&ordering=price"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "kind": CatalogEntry.GROUP,
+                    "card_id": self.session.pk,
+                    "price": "5.00",
+                    "rating": 0.0,
+                },
+                {
+                    "kind": CatalogEntry.INDIVIDUAL,
+                    "card_id": self.card.pk,
+                    "price": "7.00",
+                    "rating": 0.0,
+                },
+            ],
+        )
+        (select,) = [
+            query["sql"]
+            for query in queries
+            if "core_catalogentry" in query["sql"]
+        ]
+        columns = select.split(" FROM ")[0]
+        for column in ("name", "image", "specialist_name", "date"):
+            self.assertNotIn(f'"{column}"', columns)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.specialist = create_specialist()
+        self.student = create_student(1)
+        self.cutoff = timezone.now() - timedelta(days=180)
+        self.long_ago = self.cutoff - timedelta(days=10)
+
+    def completed_card(self, completed_at):
+        card = ServiceCardIndividual.objects.create(
+            name="Курс",
+            image="service_card/course.png",
+            description="Курс",
+            specialist=self.specialist,
+            price=Decimal("7.00"),
+        )
+        ServiceCardIndividual.objects.filter(pk=card.pk).update(
+            completed=True, completed_at=completed_at
+        )
+        return card
+
+    def test_only_cards_past_retention_are_archived(self):
+        old = self.completed_card(self.long_ago)
+        recent = self.completed_card(self.cutoff + timedelta(days=1))
+
+        self.assertEqual(archive_completed_cards(self.cutoff), 1)
+
+        self.assertFalse(ServiceCardIndividual.objects.filter(pk=old.pk))
+        self.assertTrue(ServiceCardIndividual.objects.filter(pk=recent.pk))
+        archived = ArchivedServiceCard.objects.get()
+        self.assertEqual(archived.original_id, old.pk)
+        self.assertEqual(archived.completed_at, self.long_ago)
+
+    def test_cards_are_moved_in_batches(self):
+        for _ in range(5):
+            self.completed_card(self.long_ago)
+
+        with mock.patch(
+            "core.archive.archive_individual_batch",
+            wraps=archive.archive_individual_batch,
+        ) as batch:
+            self.assertEqual(
+                archive_completed_cards(self.cutoff, batch_size=2), 5
+            )
+
+        self.assertEqual(
+            [call.args[1] for call in batch.call_args_list], [2, 2, 2]
+        )
+        self.assertFalse(ServiceCardIndividual.objects.exists())
+        self.assertEqual(ArchivedServiceCard.objects.count(), 5)
+
+    def test_reviews_move_with_their_card(self):
+        card = self.completed_card(self.long_ago)
+        review = ReviewIndividual.objects.create(
+            service_card=card, completed_by=self.student, rating=4
+        )
+        session = create_session(self.specialist, capacity=2)
+        enroll(session, self.student)
+        group_review = ReviewGroup.objects.create(
+            service_card_group=session, completed_by=self.student, rating=5
+        )
+        ServiceCardGroup.objects.filter(pk=session.pk).update(
+            completed=True, completed_at=self.long_ago
+        )
+
+        self.assertEqual(archive_completed_cards(self.cutoff), 2)
+
+        self.assertFalse(ReviewIndividual.objects.exists())
+        self.assertFalse(ReviewGroup.objects.exists())
+        moved = ArchivedReview.objects.get(
+            card__kind=ArchivedServiceCard.INDIVIDUAL
+        )
+        self.assertEqual(moved.card.original_id, card.pk)
+        self.assertEqual(moved.original_id, review.pk)
+        self.assertEqual(moved.rating, 4)
+        self.assertEqual(moved.completed_by, self.student)
+        self.assertEqual(moved.created, review.created)
+        moved = ArchivedReview.objects.get(card__kind=ArchivedServiceCard.GROUP)
+        self.assertEqual(moved.card.original_id, session.pk)
+        self.assertEqual(moved.card.participants, [self.student.pk])
+        self.assertEqual(moved.created, group_review.created)
+
+    def test_rollup_counts_archived_reviews(self):
+        card = self.completed_card(self.long_ago)
+        ReviewIndividual.objects.create(
+            service_card=card, completed_by=self.student, rating=4
+        )
+        archive_completed_cards(self.cutoff)
+
+        rollup_specialist_stats()
+
+        today = SpecialistDailyStats.objects.get(day=timezone.localdate())
+        self.assertEqual(today.reviews, 1)
+        self.assertEqual(today.rating_sum, 4)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        specialist = create_specialist()
+        for index in range(3):
+            ServiceCardIndividual.objects.create(
+                name=f"Курс {index}",
+                image="service_card/course.png",
+                description="Длинное описание курса",
+                specialist=specialist,
+                price=Decimal("7.00"),
+            )
+
+    def test_select_is_trimmed_to_requested_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/authservice_card/?fields=name,price"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [{"name": f"Курс {index}", "price": "7.00"} for index in range(3)],
+        )
+        (select,) = [
+            query["sql"]
+            for query in queries
+            if "core_servicecardindividual" in query["sql"]
+        ]
+        self.assertIn('"name"', select)
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('"image"', select)
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ("fields=name,bogus", "exclude=bogus"):
+            response = self.client.get(f"/api/authservice_card/?{query}")
+            self.assertEqual(response.status_code, 400)
+            message = response.json()["fields"]
+            self.assertIn("bogus", message)
+            self.assertIn("description", message)
+
+
+class ORJSONTests(SimpleTestCase):
+    data = {
+        "created": timezone.now(),
+        "price": Decimal("7.50"),
+        "delay": timedelta(minutes=5),
+        "nested": [{"rating": 4.5, "name": "Курс"}, None, True],
+        1: "числовой ключ",
+    }
+
+    def test_renders_like_drf_json_renderer(self):
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(self.data)),
+            json.loads(JSONRenderer().render(self.data)),
+        )
+
+    def test_parser_reads_rendered_output(self):
+        rendered = ORJSONRenderer().render(self.data)
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(rendered)),
+            json.loads(JSONRenderer().render(self.data)),
+        )
+
+    def test_indent_from_accept_header(self):
+        rendered = ORJSONRenderer().render(
+            {"a": 1}, accepted_media_type="application/json; indent=4"
+        )
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_invalid_body_is_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b"{broken"))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"name": "course"}' * 50
+
+    def respond(self, body=None, accept_encoding=None):
+        headers = {}
+        if accept_encoding is not None:
+            headers["HTTP_ACCEPT_ENCODING"] = accept_encoding
+        request = RequestFactory().get("/", **headers)
+        middleware = CompressionMiddleware(
+            lambda request: HttpResponse(self.body if body is None else body)
+        )
+        return middleware(request)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.respond(body=b"{}", accept_encoding="gzip, br")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, b"{}")
+
+    def test_gzip(self):
+        response = self.respond(accept_encoding="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_brotli_is_preferred(self):
+        response = self.respond(accept_encoding="gzip, deflate, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), self.body)
+
+    def test_refused_or_missing_encoding_still_varies(self):
+        for header in (None, "identity", "gzip;q=0, br;q=0"):
+            response = self.respond(accept_encoding=header)
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, self.body)
+            self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_strong_etag_becomes_weak(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+
+        def view(request):
+            response = HttpResponse(self.body)
+            response["ETag"] = '"abc"'
+            return response
+
+        response = CompressionMiddleware(view)(request)
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+
+class TaskMetricsTests(SimpleTestCase):
+    def test_runtime_is_recorded_from_request_context(self):
+        with mock.patch("core.tasks.record") as record:
+            send_activation_code.apply(
+                args=("http://testserver/activate/", "student@example.com")
+            )
+
+        name = send_activation_code.name
+        self.assertEqual(record.call_args_list[0], mock.call(name, "started"))
+        (finished,) = record.call_args_list[1:]
+        self.assertEqual(finished.args, (name, "succeeded"))
+        self.assertGreaterEqual(finished.kwargs["runtime"], 0)
+
+    def test_postrun_without_prerun_skips_runtime(self):
+        task = mock.Mock(request=mock.Mock(spec=[]))
+        task.name = "core.tasks.example"
+        with mock.patch("core.tasks.record") as record:
+            task_finished(task_id="lost", task=task, state="SUCCESS")
+        record.assert_called_once_with("core.tasks.example", "succeeded")
+
+
+class RecommendationTests(SimpleTestCase):
+    def interactions(self, seed=3, students=40, specialists=12, pairs=150):
+        rng = np.random.default_rng(seed)
+        return (
+            rng.integers(1, students + 1, pairs),
+            rng.integers(100, 100 + specialists, pairs),
+            rng.integers(1, 6, pairs).astype(float),
+        )
+
+    def dense_top_k(self, students, specialists, weights, top_k):
+        """Тот же расчет на плотных матрицах, для сверки"""
+        student_ids, rows = np.unique(students, return_inverse=True)
+        specialist_ids, cols = np.unique(specialists, return_inverse=True)
+        X = np.zeros((len(student_ids), len(specialist_ids)))
+        np.add.at(X, (rows, cols), weights)
+        normalized = X / np.linalg.norm(X, axis=0)
+        similarity = normalized.T @ normalized
+        np.fill_diagonal(similarity, 0)
+        scores = X @ similarity
+        scores[X > 0] = 0
+        result = {}
+        for row, student_id in enumerate(student_ids):
+            order = np.argsort(-scores[row], kind="stable")[:top_k]
+            picks = {
+                int(specialist_ids[col]): scores[row, col]
+                for col in order
+                if scores[row, col] > 0
+            }
+            if picks:
+                result[int(student_id)] = picks
+        return result
+
+    def test_matches_dense_computation_in_any_chunking(self):
+        data = self.interactions()
+        expected = self.dense_top_k(*data, top_k=3)
+        for chunk_size in (1, 7, 1000):
+            result = compute_top_k(*data, top_k=3, chunk_size=chunk_size)
+            self.assertEqual(set(result), set(expected))
+            for student_id, picks in result.items():
+                self.assertEqual(len(picks), len(expected[student_id]))
+                scores = [score for _, score in picks]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+                for specialist_id, score in picks:
+                    self.assertAlmostEqual(
+                        score, expected[student_id][specialist_id]
+                    )
+
+    def test_known_specialists_are_not_recommended(self):
+        students, specialists, weights = self.interactions()
+        result = compute_top_k(students, specialists, weights, top_k=12)
+        for student_id, picks in result.items():
+            seen = set(specialists[students == student_id])
+            self.assertFalse(seen & {pk for pk, _ in picks})
+
+    def test_no_interactions(self):
+        empty = np.array([], dtype=np.int64)
+        self.assertEqual(compute_top_k(empty, empty, empty.astype(float)), {})
+
+
+class RebuildRecommendationsTests(TestCase):
+    def test_students_get_ranked_rows(self):
+        tutors = [create_specialist(f"t{i}@example.com") for i in range(3)]
+        students = [create_student(i) for i in range(3)]
+        cards = [
+            ServiceCardIndividual.objects.create(
+                name="Курс",
+                image="service_card/course.png",
+                description="Курс",
+                specialist=tutor,
+                price=Decimal("7.00"),
+            )
+            for tutor in tutors
+        ]
+        # Первые двое учились у репетиторов 0 и 1, третий только у 0
+        for student, card in (
+            (students[0], cards[0]),
+            (students[0], cards[1]),
+            (students[1], cards[0]),
+            (students[1], cards[1]),
+            (students[2], cards[0]),
+        ):
+            ReviewIndividual.objects.create(
+                service_card=card, completed_by=student, rating=5
+            )
+
+        self.assertEqual(rebuild_recommendations(top_k=5), 1)
+        recommendation = Recommendation.objects.get()
+        self.assertEqual(recommendation.student, students[2])
+        self.assertEqual(recommendation.specialist, tutors[1])
+        self.assertEqual(recommendation.rank, 1)
+
+    def test_endpoint_lists_in_rank_order(self):
+        student = create_student(0)
+        tutors = [create_specialist(f"t{i}@example.com") for i in range(3)]
+        for rank, tutor in zip((3, 1, 2), tutors):
+            Recommendation.objects.create(
+                student=student, specialist=tutor, score=1 / rank, rank=rank
+            )
+
+        response = self.client.get(
+            f"/api/authstudent/{student.pk}/recommendations/"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual([row["rank"] for row in rows], [1, 2, 3])
+        self.assertEqual(
+            [row["specialist"] for row in rows],
+            [tutors[1].pk, tutors[2].pk, tutors[0].pk],
+        )
+
+
+class CatalogCacheTests(TestCase):
+    """Кэш фасетов и версия каталога при недоступном Redis"""
+
+    def setUp(self):
+        cache.clear()
+        self.specialist = create_specialist()
+
+    def test_version_is_bumped_after_commit(self):
+        version = catalog_version()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            create_session(self.specialist, capacity=1)
+        self.assertEqual(catalog_version(), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(catalog_version(), version + 1)
+
+    def test_cache_outage_does_not_break_writes_or_facets(self):
+        broken = mock.patch.multiple(
+            cache,
+            get=mock.Mock(side_effect=RedisConnectionError),
+            set=mock.Mock(side_effect=RedisConnectionError),
+            incr=mock.Mock(side_effect=RedisConnectionError),
+            get_or_set=mock.Mock(side_effect=RedisConnectionError),
+            delete_many=mock.Mock(side_effect=RedisConnectionError),
+        )
+        with broken, self.captureOnCommitCallbacks(execute=True):
+            create_session(self.specialist, capacity=1)
+        with broken:
+            response = APIClient().get("/api/authservice_card_group/facets/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total"], 1)
+        self.assertIsNone(cache.get(CATALOG_VERSION_KEY))
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = autocomplete.PrefixIndex()
+        self.index.load(
+            (autocomplete.SERVICE_CARD, pk, f"Алгебра {pk}", pk, pk)
+            for pk in range(1, 201)
+        )
+
+    def ids(self, prefix, limit=3):
+        return [item["id"] for item in self.index.search(prefix, limit)]
+
+    def test_short_prefix_returns_best_weights(self):
+        self.assertEqual(self.ids("а"), [200, 199, 198])
+        self.assertEqual(self.ids("1"), [199, 198, 197])
+
+    def test_long_prefix_scans_range(self):
+        self.assertEqual(self.ids("алгебра 2"), [200, 29, 28])
+
+    def test_short_prefix_follows_updates(self):
+        self.index.add(autocomplete.SERVICE_CARD, 500, "Алгоритмы", 1000)
+        self.assertEqual(self.ids("ал", 2), [500, 200])
+
+        self.index.remove(autocomplete.SERVICE_CARD, 500)
+        self.index.reweight_cards(5, 2000)
+        self.assertEqual(self.ids("ал", 2), [5, 200])
+
+    def test_cached_long_prefix_follows_updates(self):
+        self.assertEqual(self.ids("алгебра", 2), [200, 199])
+
+        self.index.add(autocomplete.SERVICE_CARD, 500, "Алгебра 500", 1000)
+        self.index.reweight_cards(5, 2000)
+        self.assertEqual(self.ids("алгебра", 3), [5, 500, 200])
+
+        self.index.remove(autocomplete.SERVICE_CARD, 5)
+        self.assertEqual(self.ids("алгебра", 2), [500, 200])
+
+
+class AutocompleteRebuildTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            autocomplete, "index", autocomplete.PrefixIndex()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stale_index_is_rebuilt_in_background(self):
+        entries = [(autocomplete.SPECIALIST, 1, "Иван Петров", 5, None)]
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_entries():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return entries
+
+        autocomplete.index.load([])
+        autocomplete.index.built_at -= 10**6
+        with mock.patch.object(autocomplete, "load_entries", slow_entries):
+            # Ответ не ждет перестройки, второй запрос не запускает новую
+            self.assertEqual(autocomplete.get_index().search("ив"), [])
+            self.assertTrue(started.wait(5))
+            autocomplete.get_index()
+            release.set()
+            with autocomplete._rebuild_lock:
+                pass
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(autocomplete.index.search("ив")), 1)
@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# Пополнение ведра и списание токена за один запрос к Redis.
+# Время берется из Redis, чтобы у всех веб-серверов были одни часы.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / refill_rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class LocalTokenBuckets:
+    """Запасной вариант в памяти процесса, если Redis недоступен"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                allowed, wait = True, 0.0
+            else:
+                allowed, wait = False, (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+def parse_rate(rate):
+    """ "5/min" -> (5, 60), как в DRF"""
+    num, period = rate.split("/")
+    duration = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+    return int(num), duration
+
+
+local_buckets = LocalTokenBuckets()
+_script = None
+
+
+def take_token(key, capacity, refill_rate):
+    """Возвращает (разрешено ли, сколько секунд ждать следующего токена)"""
+    global _script
+    client = get_redis()
+    if client is not None:
+        try:
+            if _script is None:
+                _script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, wait = _script(keys=[key], args=[capacity, refill_rate])
+            return bool(allowed), float(wait)
+        except RedisError as e:
+            logger.warning("Redis throttling unavailable: %s", e)
+    return local_buckets.take(key, capacity, refill_rate)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Троттлинг по алгоритму token bucket. Лимит берется из
+    DEFAULT_THROTTLE_RATES по ключу "<throttle_scope>_<kind>" представления,
+    например "login_ip": "30/min".
+    """
+
+    kind = None
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError(".get_ident_key() must be overridden")
+
+    def get_rate(self, view):
+        scope = getattr(view, "throttle_scope", None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}_{self.kind}")
+        if rate is None:
+            return None
+        return parse_rate(rate)
+
+    def allow_request(self, request, view):
+        rate = self.get_rate(view)
+        if rate is None:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+
+        capacity, period = rate
+        key = f"throttle:{view.throttle_scope}:{self.kind}:{ident}"
+        allowed, self.wait_time = take_token(key, capacity, capacity / period)
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = "ip"
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AccountTokenBucketThrottle(TokenBucketThrottle):
+    """Лимит на аккаунт: авторизованный пользователь или email из запроса"""
+
+    kind = "account"
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        email = (
+            request.data.get("email") if hasattr(request.data, "get") else None
+        )
+        if not email:
+            return None
+        digest = hashlib.sha1(str(email).strip().lower().encode()).hexdigest()
+        return f"email:{digest}"
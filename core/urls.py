@@ -12,6 +12,16 @@ from .views import (
     ReviewGroupViewSet,
     activate_view,
     PaymentAPIView,
+    PaymentStatusAPIView,
+    AvailabilityViewSet,
+    BookingViewSet,
+    EnrollmentViewSet,
+    RecommendationListAPIView,
+    AutocompleteAPIView,
+    ArchivedServiceCardViewSet,
+    TaskMetricsAPIView,
+    CatalogViewSet,
+    ProfileAPIView,
 )
 
 
@@ -22,13 +32,30 @@ urlpatterns = [
     ),
     path("login/", LoginAPIView.as_view(), name="login"),
     path("logout/", LogoutAPIView.as_view(), name="logout"),
+    path("me/", ProfileAPIView.as_view(), name="me"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
     path("payment/", PaymentAPIView.as_view(), name="payment"),
+    path("autocomplete/", AutocompleteAPIView.as_view(), name="autocomplete"),
+    path(
+        "payment/<int:pk>/",
+        PaymentStatusAPIView.as_view(),
+        name="payment-status",
+    ),
     path(
         "specialist/",
         SpecialistViewSet.as_view({"get": "list", "post": "create"}),
         name="specialist_list_create",
     ),
+    path(
+        "specialist/free/",
+        SpecialistViewSet.as_view({"get": "free"}),
+        name="specialist_free",
+    ),
+    path(
+        "specialist/batch/",
+        SpecialistViewSet.as_view({"get": "batch"}),
+        name="specialist_batch",
+    ),
     path(
         "specialist/<int:pk>/",
         SpecialistViewSet.as_view(
@@ -36,6 +63,11 @@ urlpatterns = [
         ),
         name="specialist_detail",
     ),
+    path(
+        "specialist/<int:pk>/dashboard/",
+        SpecialistViewSet.as_view({"get": "dashboard"}),
+        name="specialist_dashboard",
+    ),
     path(
         "student/",
         StudentViewSet.as_view({"get": "list", "post": "create"}),
@@ -48,11 +80,31 @@ urlpatterns = [
         ),
         name="student_detail",
     ),
+    path(
+        "student/<int:pk>/recommendations/",
+        RecommendationListAPIView.as_view(),
+        name="student_recommendations",
+    ),
     path(
         "service_card/",
         ServiceCardIndividualViewSet.as_view({"get": "list", "post": "create"}),
         name="service_card",
     ),
+    path(
+        "service_card/facets/",
+        ServiceCardIndividualViewSet.as_view({"get": "facets"}),
+        name="service_card_facets",
+    ),
+    path(
+        "service_card/batch/",
+        ServiceCardIndividualViewSet.as_view({"get": "batch"}),
+        name="service_card_batch",
+    ),
+    path(
+        "service_card/complete/",
+        ServiceCardIndividualViewSet.as_view({"post": "complete"}),
+        name="service_card_complete",
+    ),
     path(
         "service_card/<int:pk>/",
         ServiceCardIndividualViewSet.as_view(
@@ -70,6 +122,21 @@ urlpatterns = [
         ServiceCardGroupViewSet.as_view({"get": "list", "post": "create"}),
         name="service_card_group",
     ),
+    path(
+        "service_card_group/facets/",
+        ServiceCardGroupViewSet.as_view({"get": "facets"}),
+        name="service_card_group_facets",
+    ),
+    path(
+        "service_card_group/batch/",
+        ServiceCardGroupViewSet.as_view({"get": "batch"}),
+        name="service_card_group_batch",
+    ),
+    path(
+        "service_card_group/complete/",
+        ServiceCardGroupViewSet.as_view({"post": "complete"}),
+        name="service_card_group_complete",
+    ),
     path(
         "service_card_group/<int:pk>/",
         ServiceCardGroupViewSet.as_view(
@@ -106,4 +173,63 @@ urlpatterns = [
         ),
         name="review_group_detail",
     ),
+    path(
+        "availability/",
+        AvailabilityViewSet.as_view({"get": "list", "post": "create"}),
+        name="availability_list_create",
+    ),
+    path(
+        "availability/<int:pk>/",
+        AvailabilityViewSet.as_view(
+            {"get": "retrieve", "put": "update", "delete": "destroy"}
+        ),
+        name="availability_detail",
+    ),
+    path(
+        "booking/",
+        BookingViewSet.as_view({"get": "list", "post": "create"}),
+        name="booking_list_create",
+    ),
+    path(
+        "booking/<int:pk>/",
+        BookingViewSet.as_view(
+            {
+                "get": "retrieve",
+                "put": "update",
+                "patch": "partial_update",
+                "delete": "destroy",
+            }
+        ),
+        name="booking_detail",
+    ),
+    path(
+        "enrollment/",
+        EnrollmentViewSet.as_view({"get": "list", "post": "create"}),
+        name="enrollment_list_create",
+    ),
+    path(
+        "enrollment/<int:pk>/",
+        EnrollmentViewSet.as_view({"get": "retrieve", "delete": "destroy"}),
+        name="enrollment_detail",
+    ),
+    path(
+        "archive/",
+        ArchivedServiceCardViewSet.as_view({"get": "list"}),
+        name="archive_list",
+    ),
+    path(
+        "archive/<int:pk>/",
+        ArchivedServiceCardViewSet.as_view({"get": "retrieve"}),
+        name="archive_detail",
+    ),
+    path(
+        "catalog/",
+        CatalogViewSet.as_view({"get": "list"}),
+        name="catalog_list",
+    ),
+    path(
+        "metrics/tasks/",
+        TaskMetricsAPIView.as_view(),
+        name="task_metrics",
+    ),
 ]
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Value, When
+from redis.exceptions import RedisError
+
+from .redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+VIEWS_KEY = "views:{}"
+# Модели, у которых считаются просмотры
+COUNTED_MODELS = (
+    "core.specialist",
+    "core.servicecardindividual",
+    "core.servicecardgroup",
+)
+
+
+class LocalViewCounters:
+    """Буфер в памяти процесса, если Redis недоступен"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {label: Counter() for label in COUNTED_MODELS}
+        self._flushed_at = time.monotonic()
+
+    def add(self, label, pk):
+        with self._lock:
+            self._counts[label][pk] += 1
+
+    def take(self, label):
+        with self._lock:
+            counts, self._counts[label] = self._counts[label], Counter()
+            self._flushed_at = time.monotonic()
+        return counts
+
+    def restore(self, label, counts):
+        with self._lock:
+            self._counts[label].update(counts)
+
+    def due(self):
+        elapsed = time.monotonic() - self._flushed_at
+        return elapsed >= settings.VIEW_COUNTS_FLUSH_INTERVAL
+
+
+local_counters = LocalViewCounters()
+
+
+def record_view(instance):
+    """Просмотр без записи в базу: только счетчик в буфере"""
+    label = instance._meta.label_lower
+    client = get_redis()
+    if client is not None:
+        try:
+            client.hincrby(VIEWS_KEY.format(label), instance.pk, 1)
+            return
+        except RedisError:
+            logger.warning("View of %s %s counted locally", label, instance.pk)
+    local_counters.add(label, instance.pk)
+    # Без Redis периодическая задача не увидит буфер этого процесса,
+    # его сбрасывает фоновый поток, а не запрос
+    if local_counters.due() and _flush_lock.acquire(blocking=False):
+        threading.Thread(
+            target=_flush_in_background, name="view-counts-flush", daemon=True
+        ).start()
+
+
+_flush_lock = threading.Lock()
+
+
+def _flush_in_background():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("Local view counts flush failed")
+    finally:
+        connections.close_all()
+        _flush_lock.release()
+
+
+def _take_redis(client, label):
+    key = VIEWS_KEY.format(label)
+    # Чтение и удаление атомарны: новые просмотры попадут в следующий сброс
+    pipe = client.pipeline(transaction=True)
+    pipe.hgetall(key)
+    pipe.delete(key)
+    raw, _ = pipe.execute()
+    return Counter({int(pk): int(count) for pk, count in raw.items()})
+
+
+def _return_redis(client, label, counts):
+    key = VIEWS_KEY.format(label)
+    pipe = client.pipeline(transaction=False)
+    for pk, count in counts.items():
+        pipe.hincrby(key, pk, count)
+    pipe.execute()
+
+
+def apply_counts(model, counts):
+    """Все накопленные просмотры модели одним UPDATE"""
+    if not counts:
+        return 0
+    increment = Case(
+        *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return model.objects.filter(pk__in=list(counts)).update(
+        view_count=F("view_count") + increment
+    )
+
+
+def flush_views():
+    """Перенос буферов в базу, возвращает количество обновленных строк"""
+    client = get_redis()
+    updated = 0
+    for label in COUNTED_MODELS:
+        model = apps.get_model(label)
+        counts = local_counters.take(label)
+        redis_counts = Counter()
+        if client is not None:
+            try:
+                redis_counts = _take_redis(client, label)
+            except RedisError:
+                logger.warning("View counts of %s stay in Redis", label)
+        try:
+            updated += apply_counts(model, counts + redis_counts)
+        except Exception:
+            # Просмотры не теряются, если база недоступна
+            local_counters.restore(label, counts)
+            if redis_counts:
+                _return_redis(client, label, redis_counts)
+            raise
+    return updated
@@ -1,5 +1,4 @@
 import django_filters
-import stripe
 from rest_framework import viewsets, filters, status, generics
 from .models import (
     Specialist,
@@ -9,6 +8,13 @@ from .models import (
     ReviewIndividual,
     ReviewGroup,
     Account,
+    Payment,
+    Availability,
+    Booking,
+    Enrollment,
+    Recommendation,
+    ArchivedServiceCard,
+    CatalogEntry,
 )
 from .serializers import (
     SpecialistSerializer,
@@ -20,26 +26,59 @@ from .serializers import (
     AccountSerializer,
     LoginUserSerializer,
     LogoutUserSerializer,
-    PaymentSerializer
+    PaymentSerializer,
+    PaymentStatusSerializer,
+    TimeRangeSerializer,
+    AvailabilitySerializer,
+    BookingSerializer,
+    EnrollmentSerializer,
+    RecommendationSerializer,
+    ArchivedServiceCardSerializer,
+    SpecialistDailyStatsSerializer,
+    SpecialistStatsTotalsSerializer,
+    CatalogEntrySerializer,
+    ProfileSerializer,
 )
 from django.contrib.sites.shortcuts import get_current_site
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
 from drf_yasg2.utils import swagger_auto_schema
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view
 from rest_framework.decorators import api_view
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
-from .tasks import send_activation_code
-from django.conf import settings
-
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from .tasks import send_activation_code, process_payment
+from .throttling import IPTokenBucketThrottle, AccountTokenBucketThrottle
+from .filters import ReviewIndividualFilter, ReviewGroupFilter
+from .pagination import ReviewCursorPagination
+from .ranges import Contains, Overlaps
+from .enrollment import enroll, cancel, fill_from_waitlist
+from .facets import cached_facets
+from .autocomplete import get_index
+from .mixins import (
+    BatchFetchMixin,
+    BulkCompleteMixin,
+    SparseFieldsetMixin,
+    ViewCountMixin,
+)
+from .outbox import enqueue
+from .rollups import dashboard
+from .revocation import revoke
+from .task_metrics import task_metrics
+from .profile import cached_profile
 
 
 class RegistrationView(APIView):
     serializer_class = AccountSerializer
+    throttle_classes = (IPTokenBucketThrottle, AccountTokenBucketThrottle)
+    throttle_scope = "register"
 
     @swagger_auto_schema(
         request_body=AccountSerializer,
@@ -48,18 +87,17 @@ class RegistrationView(APIView):
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        email = serializer.data.get("email")
-
-        if Account.objects.filter(email=email).exists():
-            user = Account.objects.get(email=email)
-            current_site = get_current_site(request=request).domain
+        current_site = get_current_site(request=request).domain
+        # Письмо уходит через outbox: запрос не ждет брокер, а событие
+        # не теряется, если брокер недоступен
+        with transaction.atomic():
+            user = serializer.save()
             relative_link = reverse(
                 "activate-email",
-                kwargs={"activation_code": user.activation_code},
+                kwargs={"activation_code": user.make_activation_token()},
             )
             absolute_link = "http://" + current_site + relative_link
-            send_activation_code.delay(absolute_link, user.email)
+            enqueue(send_activation_code, absolute_link, user.email)
         return Response(
             {
                 "success": "Вы успешно зарегистрировались",
@@ -76,9 +114,12 @@ class RegistrationView(APIView):
 @api_view(["POST"])
 def activate_view(request, activation_code):
     if request.method == "POST":
-        user = get_object_or_404(Account, activation_code=activation_code)
+        try:
+            user = Account.objects.get_by_activation_token(activation_code)
+        except Account.DoesNotExist:
+            raise Http404("Ссылка активации недействительна или устарела")
         user.is_active = True
-        user.activation_code = ""
+        user.activation_code = None
         user.save()
         return redirect("login")
     else:
@@ -88,6 +129,8 @@ def activate_view(request, activation_code):
 
 class LoginAPIView(APIView):
     serializer_class = LoginUserSerializer
+    throttle_classes = (IPTokenBucketThrottle, AccountTokenBucketThrottle)
+    throttle_scope = "login"
 
     @swagger_auto_schema(
         request_body=LoginUserSerializer,
@@ -104,22 +147,27 @@ class LogoutAPIView(generics.GenericAPIView):
     serializer_class = LogoutUserSerializer
 
     @swagger_auto_schema(
+        request_body=LogoutUserSerializer,
         operation_summary="Выход пользователя из системы.",
     )
-    def get(self, request):
-        try:
-            request.user.auth_token.delete()
-            return Response(
-                {"detail": "User successfully logged out."},
-                status=status.HTTP_200_OK,
-            )
-        except Exception as e:
-            return Response(
-                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
-            )
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Refresh-токен отзывается до конца своего срока, access живет
+        # не дольше ACCESS_TOKEN_LIFETIME
+        revoke(serializer.validated_data["refresh"])
+        return Response(
+            {"detail": "Пользователь успешно вышел из системы."},
+            status=status.HTTP_200_OK,
+        )
 
 
-class SpecialistViewSet(viewsets.ModelViewSet):
+class SpecialistViewSet(
+    ViewCountMixin,
+    BatchFetchMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Specialist.objects.all()
     serializer_class = SpecialistSerializer
     filter_backends = (
@@ -128,8 +176,57 @@ class SpecialistViewSet(viewsets.ModelViewSet):
         django_filters.rest_framework.DjangoFilterBackend,
     )
 
+    @swagger_auto_schema(
+        query_serializer=TimeRangeSerializer,
+        operation_summary="Репетиторы, свободные в заданный интервал",
+    )
+    @action(detail=False, methods=["GET"])
+    def free(self, request):
+        time_range = TimeRangeSerializer(data=request.query_params)
+        time_range.is_valid(raise_exception=True)
+        start = time_range.validated_data["start"]
+        end = time_range.validated_data["end"]
+
+        # Интервал целиком попадает в окно доступности и не пересекается
+        # ни с одним бронированием
+        available = Availability.objects.filter(
+            Contains("start", "end", start, end), specialist=OuterRef("pk")
+        )
+        booked = Booking.objects.filter(
+            Overlaps("start", "end", start, end), specialist=OuterRef("pk")
+        )
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            Exists(available), ~Exists(booked)
+        )
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @swagger_auto_schema(
+        operation_summary="Дашборд репетитора: итоги по дням за ?days=",
+    )
+    @action(detail=True, methods=["GET"], permission_classes=[IsAuthenticated])
+    def dashboard(self, request, pk=None):
+        specialist = get_object_or_404(
+            Specialist.objects.only("pk", "user"), pk=pk
+        )
+        if not request.user.is_staff and specialist.user_id != request.user.pk:
+            raise PermissionDenied("Дашборд доступен только самому репетитору")
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 365)
+        except ValueError:
+            days = 30
+        # Только готовые строки из SpecialistDailyStats, без агрегатов по
+        # карточкам и отзывам
+        rows, totals = dashboard(specialist, days)
+        return Response(
+            {
+                "totals": SpecialistStatsTotalsSerializer(totals).data,
+                "days": SpecialistDailyStatsSerializer(rows, many=True).data,
+            }
+        )
+
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     filter_backends = (
@@ -139,7 +236,13 @@ class StudentViewSet(viewsets.ModelViewSet):
     )
 
 
-class ServiceCardIndividualViewSet(viewsets.ModelViewSet):
+class ServiceCardIndividualViewSet(
+    ViewCountMixin,
+    BatchFetchMixin,
+    BulkCompleteMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = ServiceCardIndividual.objects.all()
     serializer_class = ServiceCardIndividualSerializer
     filter_backends = (
@@ -150,7 +253,21 @@ class ServiceCardIndividualViewSet(viewsets.ModelViewSet):
     ordering_fields = (
         "rating",
         "price",
+        "view_count",
     )
+    search_fields = ("name",)
+
+    @swagger_auto_schema(
+        operation_summary="Количество карточек по ценам, рейтингу и статусу",
+    )
+    @action(detail=False, methods=["GET"])
+    def facets(self, request):
+        params = {
+            key: request.query_params.get(key)
+            for key in ("min_rating", "max_price", "search")
+        }
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(cached_facets(queryset, params))
 
     @action(detail=True, methods=["POST"])
     def mark_completed(self, request, pk=None):
@@ -162,7 +279,8 @@ class ServiceCardIndividualViewSet(viewsets.ModelViewSet):
         # Проверяем является ли юзер репетитором
         if card.specialist.user == request.user:
             card.completed = True
-            card.completed_by_id = card.specialist
+            card.completed_by = card.specialist
+            card.completed_at = timezone.now()
             card.save()
             return Response({"message": "Курс отмечен как завершенный."})
         else:
@@ -202,7 +320,13 @@ class ServiceCardIndividualViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ServiceCardGroupViewSet(viewsets.ModelViewSet):
+class ServiceCardGroupViewSet(
+    ViewCountMixin,
+    BatchFetchMixin,
+    BulkCompleteMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = ServiceCardGroup.objects.all()
     serializer_class = ServiceCardGroupSerializer
     filter_backends = (
@@ -213,7 +337,26 @@ class ServiceCardGroupViewSet(viewsets.ModelViewSet):
     ordering_fields = (
         "rating",
         "price",
+        "view_count",
+    )
+    search_fields = ("name",)
+
+    @swagger_auto_schema(
+        operation_summary="Количество карточек по ценам, рейтингу и статусу",
     )
+    @action(detail=False, methods=["GET"])
+    def facets(self, request):
+        params = {
+            key: request.query_params.get(key)
+            for key in ("min_rating", "max_price", "search")
+        }
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(cached_facets(queryset, params))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # Если capacity увеличили, новые места сразу получает лист ожидания
+        fill_from_waitlist(serializer.instance.pk)
 
     @action(detail=True, methods=["POST"])
     def mark_completed(self, request, pk=None):
@@ -225,7 +368,8 @@ class ServiceCardGroupViewSet(viewsets.ModelViewSet):
         # Проверяем является ли юзер репетитором
         if card.specialist.user == request.user:
             card.completed = True
-            card.completed_by_id = card.specialist
+            card.completed_by = card.specialist
+            card.completed_at = timezone.now()
             card.save()
             return Response({"message": "Курс отмечен как завершенный."})
         else:
@@ -266,49 +410,52 @@ class ServiceCardGroupViewSet(viewsets.ModelViewSet):
 
 
 class ReviewIndividualViewSet(viewsets.ModelViewSet):
-    queryset = ReviewIndividual.objects.all()
+    queryset = ReviewIndividual.objects.select_related("completed_by")
     serializer_class = ReviewIndividualSerializer
+    filterset_class = ReviewIndividualFilter
+    pagination_class = ReviewCursorPagination
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid()
+        serializer.is_valid(raise_exception=True)
 
         # Проверяем является ли ученик оставляющий отзыв, учеником который прошел курс
-        try:
-            student = serializer.validated_data["completed_by"]
-            service_card = serializer.validated_data["service_card"]
-            if not service_card.specialist.student_set.filter(
-                id=student.id
-            ).exist():
-                return Response(
-                    {
-                        "detail": "Вы не можете оставлять отзыв для этого курса, так как не проходили соотвутствующий курс"
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            self.perform_create(serializer)
-            headers = self.get_success_headers(serializer.data)
+        student = serializer.validated_data["completed_by"]
+        service_card = serializer.validated_data["service_card"]
+        if not Booking.objects.filter(
+            service_card=service_card, student=student
+        ).exists():
             return Response(
-                serializer.data, status=status.HTTP_201_CREATED, headers=headers
+                {
+                    "detail": "Вы не можете оставлять отзыв для этого курса, так как не проходили соотвутствующий курс"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        except KeyError:
-            return Response({"error": "Вы не прошли курс"})
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        )
 
 
 class ReviewGroupViewSet(viewsets.ModelViewSet):
-    queryset = ReviewGroup.objects.all()
+    queryset = ReviewGroup.objects.select_related("completed_by")
     serializer_class = ReviewGroupSerializer
+    filterset_class = ReviewGroupFilter
+    pagination_class = ReviewCursorPagination
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        serializer.is_valid()
+        serializer.is_valid(raise_exception=True)
 
         # Проверяем является ли ученик оставляющий отзыв, учеником который прошел курс
         student = serializer.validated_data["completed_by"]
         service_card = serializer.validated_data["service_card_group"]
-        if not service_card.specialist.student_set.filter(
-            id=student.id
-        ).exist():
+        if not Enrollment.objects.filter(
+            service_card_group=service_card,
+            student=student,
+            status=Enrollment.ENROLLED,
+        ).exists():
             return Response(
                 {
                     "detail": "Вы не можете оставлять отзыв для этого курса, так как не проходили соотвутствующий курс"
@@ -324,39 +471,269 @@ class ReviewGroupViewSet(viewsets.ModelViewSet):
 
 class PaymentAPIView(APIView):
     serializer_class = PaymentSerializer
+    throttle_classes = (IPTokenBucketThrottle, AccountTokenBucketThrottle)
+    throttle_scope = "payment"
+
     @swagger_auto_schema(
-            request_body=PaymentSerializer
+        request_body=PaymentSerializer,
+        operation_summary="Создание платежа",
     )
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         card_data = serializer.validated_data
 
-        payment_method = card_data['payment_method']
-
-        if payment_method == "credit_card":
-            amount=card_data['amount']
-            currency=card_data['currency']
-            description = card_data['description']
-            payment_method = card_data['payment_method']
-
-            try:
-                # Создаем платеж с помощью Stripe
-                intent = stripe.PaymentIntent.create(
-                    amount=amount,
-                    currency=currency,
-                    description=description,
-                    payment_method=payment_method,
-                    confirm=True,
+        if card_data["payment_method"] != "credit_card":
+            return Response(
+                {"error": "Некорректный метод оплаты"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Платеж проводится в Celery, чтобы запрос не ждал ответа Stripe
+        with transaction.atomic():
+            payment = Payment.objects.create(
+                user=request.user if request.user.is_authenticated else None,
+                amount=card_data["amount"],
+                currency=card_data["currency"],
+                description=card_data["description"],
+                payment_method=card_data["payment_method"],
+            )
+            enqueue(process_payment, payment.pk)
+        return Response(
+            {
+                "id": payment.pk,
+                "status": payment.status,
+                "status_url": "{}?{}".format(
+                    reverse("payment-status", kwargs={"pk": payment.pk}),
+                    urlencode({"token": payment.make_status_token()}),
+                ),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class PaymentStatusAPIView(generics.RetrieveAPIView):
+    serializer_class = PaymentStatusSerializer
+
+    def get_queryset(self):
+        # Свои платежи видны по id, анонимные — только с подписанным token
+        # из status_url
+        visible = Q(pk__in=[])
+        if self.request.user.is_authenticated:
+            visible |= Q(user=self.request.user)
+        token = self.request.query_params.get("token")
+        payment_id = Payment.id_from_status_token(token) if token else None
+        if payment_id is not None:
+            visible |= Q(pk=payment_id, user__isnull=True)
+        return Payment.objects.filter(visible)
+
+
+def check_owner(user, profile, message):
+    """Профиль репетитора или ученика принадлежит пользователю"""
+    if not user.is_staff and profile.user_id != user.pk:
+        raise PermissionDenied(message)
+
+
+class AvailabilityViewSet(viewsets.ModelViewSet):
+    queryset = Availability.objects.all()
+    serializer_class = AvailabilitySerializer
+    filterset_fields = ("specialist",)
+    permission_classes = [IsAuthenticated]
+    owner_message = "Расписание может менять только сам репетитор"
+
+    def perform_create(self, serializer):
+        specialist = serializer.validated_data["specialist"]
+        check_owner(self.request.user, specialist, self.owner_message)
+        serializer.save()
+
+    def perform_update(self, serializer):
+        check_owner(
+            self.request.user,
+            serializer.instance.specialist,
+            self.owner_message,
+        )
+        specialist = serializer.validated_data.get("specialist")
+        if specialist is not None:
+            check_owner(self.request.user, specialist, self.owner_message)
+        serializer.save()
+
+    def perform_destroy(self, instance):
+        check_owner(self.request.user, instance.specialist, self.owner_message)
+        instance.delete()
+
+
+class BookingViewSet(viewsets.ModelViewSet):
+    queryset = Booking.objects.all()
+    serializer_class = BookingSerializer
+    filterset_fields = ("specialist", "student")
+    permission_classes = [IsAuthenticated]
+    owner_message = "Бронированием управляет только сам ученик"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_staff:
+            return queryset
+        # Ученик видит свои бронирования, репетитор — бронирования к нему
+        return queryset.filter(
+            Q(student__user=user) | Q(specialist__user=user)
+        )
+
+    def perform_create(self, serializer):
+        self.save_booking(serializer)
+
+    def perform_update(self, serializer):
+        check_owner(
+            self.request.user, serializer.instance.student, self.owner_message
+        )
+        self.save_booking(serializer)
+
+    def perform_destroy(self, instance):
+        check_owner(self.request.user, instance.student, self.owner_message)
+        instance.delete()
+
+    def save_booking(self, serializer):
+        """
+        Создание и перенос проходят одни и те же проверки: время внутри
+        окна доступности и не пересекается с другими бронированиями.
+        """
+        data, booking = serializer.validated_data, serializer.instance
+
+        def value(name):
+            return data[name] if name in data else getattr(booking, name)
+
+        check_owner(self.request.user, value("student"), self.owner_message)
+        start, end = value("start"), value("end")
+        with transaction.atomic():
+            # Блокировка строки репетитора сериализует бронирования к нему,
+            # чтобы два запроса не заняли одно и то же время
+            specialist = Specialist.objects.select_for_update().get(
+                pk=value("specialist").pk
+            )
+            if not specialist.availability.filter(
+                Contains("start", "end", start, end)
+            ).exists():
+                raise ValidationError(
+                    {"detail": "Репетитор не работает в это время."}
                 )
+            booked = specialist.bookings.filter(
+                Overlaps("start", "end", start, end)
+            )
+            if booking is not None:
+                booked = booked.exclude(pk=booking.pk)
+            if booked.exists():
+                raise ValidationError({"detail": "Это время уже занято."})
+            serializer.save()
 
-                # Проверяем прошел ли платеж
-                if intent.status == 'succeeded':
-                    return Response({"message": "Платеж успешно совершен."}, status=status.HTTP_200_OK)
-                else:
-                    return Response({"error": "Платеж откланен"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            except stripe.error.StripeError as e:
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({"error": "Некорректный метод оплаты"}, status=status.HTTP_400_BAD_REQUEST)
+
+class EnrollmentViewSet(viewsets.ModelViewSet):
+    queryset = Enrollment.objects.all()
+    serializer_class = EnrollmentSerializer
+    filterset_fields = ("service_card_group", "student", "status")
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        enrollment = enroll(
+            serializer.validated_data["service_card_group"],
+            serializer.validated_data["student"],
+        )
+        return Response(
+            self.get_serializer(enrollment).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        cancel(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RecommendationListAPIView(generics.ListAPIView):
+    """Рекомендации считаются ночной задачей, здесь только чтение"""
+
+    serializer_class = RecommendationSerializer
+
+    def get_queryset(self):
+        return Recommendation.objects.filter(
+            student_id=self.kwargs["pk"]
+        ).select_related("specialist")
+
+
+class AutocompleteAPIView(APIView):
+    """Подсказки поиска из индекса в памяти, без запросов к базе"""
+
+    @swagger_auto_schema(
+        operation_summary="Подсказки по именам репетиторов и курсов",
+    )
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 20)
+        except ValueError:
+            limit = 10
+        return Response({"results": get_index().search(query, limit)})
+
+
+class ArchivedServiceCardViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedServiceCard.objects.prefetch_related("reviews")
+    serializer_class = ArchivedServiceCardSerializer
+    filterset_fields = ("specialist", "kind")
+
+
+class CatalogViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """Список карточек обоих типов из плоской таблицы, без JOIN"""
+
+    queryset = CatalogEntry.objects.all()
+    serializer_class = CatalogEntrySerializer
+    filter_backends = (
+        filters.OrderingFilter,
+        filters.SearchFilter,
+        django_filters.rest_framework.DjangoFilterBackend,
+    )
+    filterset_fields = ("kind", "completed", "specialist")
+    ordering_fields = ("rating", "price", "date")
+    search_fields = ("name",)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        min_rating = self.request.query_params.get("min_rating")
+        max_price = self.request.query_params.get("max_price")
+
+        if min_rating:
+            queryset = queryset.filter(rating__gte=min_rating)
+
+        if max_price:
+            queryset = queryset.filter(price__lte=max_price)
+
+        return queryset
+
+
+class TaskMetricsAPIView(APIView):
+    """Сводка по задачам Celery со всех воркеров"""
+
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="Ожидание в очереди, время и ошибки задач Celery",
+    )
+    def get(self, request):
+        return Response(task_metrics())
+
+
+class ProfileAPIView(APIView):
+    """
+    Аккаунт, его профиль и итоги одним ответом вместо поиска профиля по
+    спискам /specialist/ и /student/
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={200: ProfileSerializer},
+        operation_summary="Текущий пользователь, профиль и счетчики",
+    )
+    def get(self, request):
+        data = cached_profile(
+            request.user, lambda result: ProfileSerializer(result).data
+        )
+        return Response(data)
@@ -13,4 +13,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "online_tutor.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Импорт после настройки Django
+from core.events import events_app  # noqa: E402
+
+# SSE-поток есть только у ASGI-сервиса, WSGI его не обслуживает
+EVENTS_PATH = "/api/authevents/"
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == EVENTS_PATH:
+        await events_app(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -1,6 +1,7 @@
 import environ
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 
 
 env = environ.Env()
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -128,7 +130,7 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-AUTH_USER_MODEL = "core.CustomUser"
+AUTH_USER_MODEL = "core.Account"
 
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ORIGIN_WHITELIST = env.list("CORS_ORIGIN_WHITELIST")
@@ -144,11 +146,34 @@ REST_FRAMEWORK = {
         "django_filters.rest_framework.DjangoFilterBackend"
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Лимиты core.throttling: "<throttle_scope>_<ip|account>"
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": env("THROTTLE_LOGIN_IP", default="30/min"),
+        "login_account": env("THROTTLE_LOGIN_ACCOUNT", default="5/min"),
+        "register_ip": env("THROTTLE_REGISTER_IP", default="10/hour"),
+        "register_account": env("THROTTLE_REGISTER_ACCOUNT", default="3/hour"),
+        "payment_ip": env("THROTTLE_PAYMENT_IP", default="20/min"),
+        "payment_account": env("THROTTLE_PAYMENT_ACCOUNT", default="10/min"),
+    },
 }
 
+"""COMPRESSION"""
+# Ответы меньше порога отдаются без сжатия
+COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", default=1024)
+COMPRESSION_GZIP_LEVEL = env.int("COMPRESSION_GZIP_LEVEL", default=6)
+COMPRESSION_BROTLI_QUALITY = env.int("COMPRESSION_BROTLI_QUALITY", default=5)
 
 """SMTP"""
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -158,8 +183,44 @@ EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
 EMAIL_HOST_USER = env("EMAIL_HOST_USER")
 EMAIL_USE_TLS = env("EMAIL_USE_TLS", cast=bool)
 ACTIVATE_USERS_EMAIL = True
+# Срок действия ссылки активации, секунды
+ACTIVATION_TOKEN_MAX_AGE = env.int(
+    "ACTIVATION_TOKEN_MAX_AGE", default=3 * 24 * 60 * 60
+)
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+"""REDIS"""
+REDIS_URL = env("REDIS_URL", default="redis://redis:6379")
+REDIS_SOCKET_TIMEOUT = env.float("REDIS_SOCKET_TIMEOUT", default=0.5)
+
+"""CACHE"""
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+FACETS_CACHE_TIMEOUT = env.int("FACETS_CACHE_TIMEOUT", default=60)
+# Ответ /me/ сбрасывается сигналами, срок ограничивает пропущенные изменения
+ME_CACHE_TIMEOUT = env.int("ME_CACHE_TIMEOUT", default=60)
+# Как часто процесс заново строит индекс подсказок из базы, секунды
+AUTOCOMPLETE_REBUILD_INTERVAL = env.int(
+    "AUTOCOMPLETE_REBUILD_INTERVAL", default=600
+)
+
+"""SSE"""
+# Пинг держит соединение открытым и выявляет отключившихся клиентов
+SSE_HEARTBEAT_INTERVAL = env.int("SSE_HEARTBEAT_INTERVAL", default=15)
+# Клиент, отставший на столько событий, отключается
+SSE_CLIENT_QUEUE_SIZE = env.int("SSE_CLIENT_QUEUE_SIZE", default=100)
+
 """CELERY"""
 CELERY_BROKER_URL = "redis://redis:6379"
 CELERY_RESULT_BACKEND = "redis://redis:6379"
@@ -168,6 +229,102 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_TIMEZONE = "Asia/Bishkek"
 CELERY_ACCEPT_CONTENT_TYPE = ["application/json"]
 CELERY_ALWAYS_EAGER = True
+CELERY_TASK_DEFAULT_QUEUE = "default"
+# Почта, платежи и тяжелые фоновые расчеты не мешают друг другу
+CELERY_TASK_ROUTES = {
+    "core.tasks.send_activation_code": {"queue": "mail"},
+    "core.tasks.send_session_reminders": {"queue": "mail"},
+    "core.tasks.process_payment": {"queue": "payments"},
+    "core.tasks.requeue_stuck_payments": {"queue": "payments"},
+    "core.tasks.purge_stale_activation_codes": {"queue": "aggregation"},
+    "core.tasks.build_recommendations": {"queue": "aggregation"},
+    "core.tasks.schedule_session_reminders": {"queue": "aggregation"},
+    "core.tasks.archive_completed_service_cards": {"queue": "aggregation"},
+    "core.tasks.purge_dispatched_outbox_events": {"queue": "aggregation"},
+    "core.tasks.rollup_daily_stats": {"queue": "aggregation"},
+    "core.tasks.flush_view_counts": {"queue": "aggregation"},
+}
+# Результаты задач никто не читает, статус платежа хранится в Payment
+CELERY_TASK_IGNORE_RESULT = True
+# Воркер не набирает задачи впрок, пока выполняет долгую
+CELERY_WORKER_PREFETCH_MULTIPLIER = env.int(
+    "CELERY_WORKER_PREFETCH_MULTIPLIER", default=1
+)
+# Задачи с acks_late вернутся в очередь, если воркер упал
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+# Как часто счетчики просмотров переносятся из Redis в базу
+VIEW_COUNTS_FLUSH_INTERVAL = env.int("VIEW_COUNTS_FLUSH_INTERVAL", default=60)
+CELERY_BEAT_SCHEDULE = {
+    "purge-stale-activation-codes": {
+        "task": "core.tasks.purge_stale_activation_codes",
+        "schedule": crontab(minute=0, hour=3),
+    },
+    "build-recommendations": {
+        "task": "core.tasks.build_recommendations",
+        "schedule": crontab(minute=0, hour=4),
+    },
+    "schedule-session-reminders": {
+        "task": "core.tasks.schedule_session_reminders",
+        "schedule": crontab(minute="*/5"),
+    },
+    "archive-completed-service-cards": {
+        "task": "core.tasks.archive_completed_service_cards",
+        "schedule": crontab(minute=30, hour=2),
+    },
+    "rollup-daily-stats": {
+        "task": "core.tasks.rollup_daily_stats",
+        "schedule": crontab(minute=15),
+    },
+    "flush-view-counts": {
+        "task": "core.tasks.flush_view_counts",
+        "schedule": timedelta(seconds=VIEW_COUNTS_FLUSH_INTERVAL),
+    },
+    "requeue-stuck-payments": {
+        "task": "core.tasks.requeue_stuck_payments",
+        "schedule": crontab(minute="*/5"),
+    },
+    "purge-dispatched-outbox-events": {
+        "task": "core.tasks.purge_dispatched_outbox_events",
+        "schedule": crontab(minute=0, hour=5),
+    },
+}
+RECOMMENDATIONS_TOP_K = env.int("RECOMMENDATIONS_TOP_K", default=10)
+# За сколько секунд до начала занятия отправлять напоминание
+SESSION_REMINDER_LEAD = env.int("SESSION_REMINDER_LEAD", default=60 * 60)
+SESSION_REMINDER_CHUNK_SIZE = env.int(
+    "SESSION_REMINDER_CHUNK_SIZE", default=500
+)
+# Через сколько дней после завершения карточка уходит в архив
+ARCHIVE_RETENTION_DAYS = env.int("ARCHIVE_RETENTION_DAYS", default=180)
+ARCHIVE_BATCH_SIZE = env.int("ARCHIVE_BATCH_SIZE", default=500)
+# Сколько уже посчитанных дней статистики пересчитывать повторно
+ROLLUP_LOOKBACK_DAYS = env.int("ROLLUP_LOOKBACK_DAYS", default=1)
+# Ретранслятор outbox: размер пачки, пауза между опросами и после сбоя брокера
+OUTBOX_BATCH_SIZE = env.int("OUTBOX_BATCH_SIZE", default=100)
+OUTBOX_POLL_INTERVAL = env.float("OUTBOX_POLL_INTERVAL", default=1.0)
+OUTBOX_RETRY_DELAY = env.int("OUTBOX_RETRY_DELAY", default=30)
+OUTBOX_RETENTION_DAYS = env.int("OUTBOX_RETENTION_DAYS", default=7)
+
+"""STRIPE"""
+STRIPE_SECRET_KEY = env("STRIPE_SECRET_KEY", default="")
+# Локальная заглушка вместо Stripe для разработки без сети
+STRIPE_STUB = env.bool("STRIPE_STUB", default=False)
+PAYMENT_CONNECT_TIMEOUT = env.float("PAYMENT_CONNECT_TIMEOUT", default=3)
+PAYMENT_READ_TIMEOUT = env.float("PAYMENT_READ_TIMEOUT", default=10)
+PAYMENT_POOL_SIZE = env.int("PAYMENT_POOL_SIZE", default=10)
+PAYMENT_MAX_RETRIES = env.int("PAYMENT_MAX_RETRIES", default=2)
+PAYMENT_RETRY_BACKOFF = env.float("PAYMENT_RETRY_BACKOFF", default=0.5)
+# Сколько ошибок подряд открывают предохранитель и на сколько секунд
+PAYMENT_BREAKER_THRESHOLD = env.int("PAYMENT_BREAKER_THRESHOLD", default=5)
+PAYMENT_BREAKER_RESET_TIMEOUT = env.float(
+    "PAYMENT_BREAKER_RESET_TIMEOUT", default=30
+)
+# Через сколько секунд платеж в PROCESSING считается зависшим. Должно
+# превышать время одной попытки со всеми повторами и таймаутами
+PAYMENT_PROCESSING_TIMEOUT = env.int("PAYMENT_PROCESSING_TIMEOUT", default=300)
+# Stripe хранит ключи идемпотентности сутки: в этом окне платеж
+# с неизвестным исходом можно безопасно провести повторно
+PAYMENT_RECONCILE_WINDOW = env.int("PAYMENT_RECONCILE_WINDOW", default=86400)
 
 
 # JWT Token
@@ -176,6 +333,7 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
+    # Отозванные jti хранятся в Redis до истечения токена, см. core.revocation
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS256",
@@ -193,12 +351,24 @@ SIMPLE_JWT = {
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
     "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    "TOKEN_REFRESH_SERIALIZER": (
+        "core.serializers.RevocableTokenRefreshSerializer"
+    ),
     "JTI_CLAIM": "jti",
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
+# Кэш аккаунтов для core.authentication: размер и срок жизни записи в секундах.
+# Кэш свой у каждого процесса, и сохранение или удаление аккаунта сбрасывает
+# запись только там, где оно произошло. Другие процессы увидят блокировку,
+# удаление или смену прав не позже чем через AUTH_USER_CACHE_TTL, а если
+# записи нет, поля берутся из токена и живут до ACCESS_TOKEN_LIFETIME.
+# Поэтому TTL не стоит делать больше ACCESS_TOKEN_LIFETIME
+AUTH_USER_CACHE_SIZE = env.int("AUTH_USER_CACHE_SIZE", default=10000)
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=300)
+
 SPECTULAR_SETTINGS = {
     "TITLE": "Design Online API",
     "DESCRIPTION": "Онлайн журнал",